@@ -0,0 +1,65 @@
+"""
+Measures what log_service_call adds to the success path of EntryService
+methods by timing each decorated method against its undecorated original
+(`__wrapped__`), on the in-memory backend.
+
+Run from the api directory:
+    python -m benchmarks.bench_decorator --iterations 100000
+"""
+import argparse
+import asyncio
+import time
+
+from models.entry import InputEntry
+from repositories.memory_repository import InMemoryDB, InMemoryStatsDB
+from services.entry_cache import InMemoryEntryCache
+from services.entry_service import EntryService
+from services.search_index import InMemorySearchIndex
+from services.single_flight import SingleFlight
+
+USER_ID = "bench-user"
+
+
+async def time_calls(call, iterations: int) -> float:
+    """Returns the mean time per call in nanoseconds."""
+    start = time.perf_counter_ns()
+    for _ in range(iterations):
+        await call()
+    return (time.perf_counter_ns() - start) / iterations
+
+
+async def main(iterations: int) -> None:
+    service = EntryService(
+        InMemoryDB(),
+        InMemoryEntryCache(),
+        InMemorySearchIndex(),
+        InMemoryStatsDB(),
+        SingleFlight()
+    )
+    entry = InputEntry(work="Benchmark", struggle="Overhead", intention="Measure it")
+    await service.create_entry(entry, USER_ID)
+    entry_id = (await service.db.get_all_entries(USER_ID))[0]["id"]
+
+    cases = {
+        "get_entry": lambda method: method(service, entry_id, USER_ID),
+        "get_entry_etag": lambda method: method(service, entry_id, USER_ID),
+        "update_entry": lambda method: method(service, entry_id, entry, USER_ID),
+    }
+
+    for name, make_call in cases.items():
+        decorated = getattr(EntryService, name)
+        original = decorated.__wrapped__
+
+        plain_ns = await time_calls(lambda: make_call(original), iterations)
+        wrapped_ns = await time_calls(lambda: make_call(decorated), iterations)
+        print(
+            f"{name:<16} plain {plain_ns:>9.0f}ns  decorated {wrapped_ns:>9.0f}ns  "
+            f"overhead {wrapped_ns - plain_ns:>7.0f}ns"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=100_000)
+    args = parser.parse_args()
+    asyncio.run(main(args.iterations))
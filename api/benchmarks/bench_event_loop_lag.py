@@ -0,0 +1,84 @@
+"""
+Measures event-loop lag while a burst of logins verifies bcrypt hashes,
+once with bcrypt called inline on the loop and once through PasswordHasher.
+
+Run from the api directory:
+    python -m benchmarks.bench_event_loop_lag --logins 50
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import bcrypt
+
+from services.password_hasher import PasswordHasher, SALT_ROUNDS
+
+PROBE_INTERVAL = 0.001
+
+
+async def probe_lag(samples: list, stop: asyncio.Event) -> None:
+    """Records how late each 1ms sleep wakes up."""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL)
+        samples.append(time.perf_counter() - start - PROBE_INTERVAL)
+
+
+async def inline_login(password: bytes, hashed: bytes) -> None:
+    bcrypt.checkpw(password, hashed)
+    await asyncio.sleep(0)
+
+
+async def offloaded_login(hasher: PasswordHasher, password: str, hashed: str) -> None:
+    await hasher.verify(password, hashed)
+
+
+async def run(label: str, make_login, logins: int) -> None:
+    samples: list = []
+    stop = asyncio.Event()
+    probe = asyncio.create_task(probe_lag(samples, stop))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(make_login() for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await probe
+
+    lag_ms = sorted(sample * 1000 for sample in samples) or [0.0]
+    p99 = lag_ms[min(len(lag_ms) - 1, int(len(lag_ms) * 0.99))]
+    print(
+        f"{label:<10} logins={logins} total={elapsed:.2f}s "
+        f"lag mean={statistics.fmean(lag_ms):.2f}ms p99={p99:.2f}ms "
+        f"max={lag_ms[-1]:.2f}ms"
+    )
+
+
+async def main(logins: int, workers: int) -> None:
+    password = "Correct-Horse-1"
+    hashed = bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(SALT_ROUNDS))
+
+    await run(
+        "inline",
+        lambda: inline_login(password.encode("utf-8"), hashed),
+        logins
+    )
+
+    hasher = PasswordHasher(max_workers=workers, max_pending=logins)
+    try:
+        await run(
+            "offloaded",
+            lambda: offloaded_login(hasher, password, hashed.decode("utf-8")),
+            logins
+        )
+    finally:
+        hasher.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logins", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+    asyncio.run(main(args.logins, args.workers))
@@ -0,0 +1,74 @@
+"""
+Compares the peak memory and time of an export job with the all-entries
+endpoint's path (get_all_entries plus one summary per entry), on the
+in-memory backend. Peak memory is what Python allocates during the call,
+measured with tracemalloc.
+
+Run from the api directory:
+    python -m benchmarks.bench_export --entries 20000
+"""
+import argparse
+import asyncio
+import gzip
+import tempfile
+import time
+import tracemalloc
+
+from models.entry import EnrichedEntry
+from repositories.memory_repository import InMemoryDB
+from services.entry_service import summarize_entry
+from services.export_service import DONE, ExportService
+
+USER_ID = "bench-user"
+TEXT = "A fairly ordinary sentence about the day's work and what got in the way. " * 3
+
+
+async def measure(label: str, call) -> None:
+    tracemalloc.start()
+    start = time.perf_counter()
+    await call()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<10} {elapsed * 1000:>8.0f}ms  peak {peak / 1_000_000:>7.1f}MB")
+
+
+async def main(entries: int, page_size: int) -> None:
+    db = InMemoryDB()
+    for _ in range(entries):
+        entry = EnrichedEntry(work=TEXT, struggle=TEXT, intention=TEXT).model_dump()
+        entry["user_id"] = USER_ID
+        await db.create_entry(entry)
+
+    async def get_all() -> None:
+        raw_entries = await db.get_all_entries(USER_ID)
+        [summarize_entry(entry) for entry in raw_entries]
+
+    with tempfile.TemporaryDirectory() as directory:
+        exports = ExportService(db, directory=directory, page_size=page_size)
+        await exports.start()
+
+        job_ids = []
+
+        async def export() -> None:
+            job = await exports.submit(USER_ID)
+            job_ids.append(job["id"])
+            while exports.get(USER_ID, job["id"])["status"] != DONE:
+                await asyncio.sleep(0.01)
+
+        await measure("get_all", get_all)
+        await measure("export", export)
+
+        job = exports.get(USER_ID, job_ids[0])
+        with gzip.open(exports.download_path(USER_ID, job["id"])) as f:
+            lines = sum(1 for _ in f)
+        print(f"export file {job['size_bytes'] / 1_000_000:.1f}MB, {lines} lines")
+        exports.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--entries", type=int, default=20000)
+    parser.add_argument("--page-size", type=int, default=1000)
+    args = parser.parse_args()
+    asyncio.run(main(args.entries, args.page_size))
@@ -0,0 +1,66 @@
+"""
+Compares records per second of MyJSONFormatter and FastJSONFormatter with
+each available serializer, using the fmt_keys from logging_configs/config.json.
+
+Run from the api directory:
+    python -m benchmarks.bench_log_formatter --records 200000
+"""
+import argparse
+import json
+import logging
+import time
+from pathlib import Path
+
+from logging_configs.mylogger import FastJSONFormatter, MyJSONFormatter, orjson
+
+CONFIG_PATH = Path(__file__).resolve().parent.parent / "logging_configs" / "config.json"
+
+
+def make_record() -> logging.LogRecord:
+    record = logging.LogRecord(
+        name="journal",
+        level=logging.INFO,
+        pathname=__file__,
+        lineno=42,
+        msg="Successfully retrieved entry %s for %s",
+        args=("3f1c6a2e-entry", "9b7d-user"),
+        exc_info=None,
+        func="get_entry",
+    )
+    record.request_id = "c0ffee"
+    return record
+
+
+def records_per_second(formatter: logging.Formatter, records: int) -> float:
+    record = make_record()
+    start = time.perf_counter()
+    for _ in range(records):
+        formatter.format(record)
+    return records / (time.perf_counter() - start)
+
+
+def main(records: int) -> None:
+    fmt_keys = json.loads(CONFIG_PATH.read_text())["formatters"]["json"]["fmt_keys"]
+
+    formatters = {
+        "MyJSONFormatter": MyJSONFormatter(fmt_keys=fmt_keys),
+        "FastJSONFormatter[json]": FastJSONFormatter(fmt_keys=fmt_keys, serializer="json"),
+    }
+    if orjson is not None:
+        formatters["FastJSONFormatter[orjson]"] = FastJSONFormatter(
+            fmt_keys=fmt_keys,
+            serializer="orjson"
+        )
+
+    baseline = None
+    for name, formatter in formatters.items():
+        rate = records_per_second(formatter, records)
+        baseline = baseline or rate
+        print(f"{name:<28} {rate:>12,.0f} records/s  {rate / baseline:>5.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", type=int, default=200_000)
+    args = parser.parse_args()
+    main(args.records)
@@ -0,0 +1,115 @@
+"""
+Measures what RateLimitMiddleware adds to a request by timing a no-op ASGI
+app with and without it in front. Route templates are resolved before
+timing, since MetricsMiddleware pays for that lookup anyway.
+
+Cases: an entry route with a cached access token, the same route for an
+anonymous client, a client over its budget (rejected with 429), and a
+new client address per request, which keeps the bucket LRU churning.
+
+Run from the api directory:
+    python -m benchmarks.bench_rate_limit --iterations 100000
+"""
+import os
+import uuid
+import argparse
+import asyncio
+import time
+
+os.environ.setdefault("SECRET_KEY", uuid.uuid4().hex)
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("TOKEN_EXPIRE_MINUTES", "30")
+
+import jwt
+from fastapi import FastAPI
+
+from controllers import journal_router, login_router
+from middleware.rate_limit import RateLimit, RateLimitMiddleware
+from middleware.routing import route_template
+from services.rate_limiter import InMemoryRateLimitStore
+from services.token_service import TokenVerifier
+
+UNLIMITED = RateLimit(per_minute=1e12, burst=10**9)
+
+
+async def noop_app(scope, receive, send) -> None:
+    pass
+
+
+async def receive():
+    return {"type": "http.request", "body": b""}
+
+
+async def send(message) -> None:
+    pass
+
+
+def make_scope(app: FastAPI, path: str, token: str | None = None, ip: str = "10.0.0.1") -> dict:
+    headers = [(b"authorization", f"Bearer {token}".encode())] if token else []
+    scope = {
+        "type": "http",
+        "app": app,
+        "method": "GET",
+        "path": path,
+        "root_path": "",
+        "query_string": b"",
+        "headers": headers,
+        "client": (ip, 50000),
+    }
+    route_template(scope)
+    return scope
+
+
+async def time_calls(handler, scopes, iterations: int) -> float:
+    """Returns the mean time per request in nanoseconds."""
+    start = time.perf_counter_ns()
+    for i in range(iterations):
+        await handler(dict(scopes[i % len(scopes)]), receive, send)
+    return (time.perf_counter_ns() - start) / iterations
+
+
+async def main(iterations: int) -> None:
+    app = FastAPI()
+    app.include_router(login_router.router)
+    app.include_router(journal_router.router)
+    app.state.token_verifier = TokenVerifier()
+    token = jwt.encode(
+        {"sub": "bench-user", "exp": int(time.time()) + 3600},
+        os.environ["SECRET_KEY"],
+        algorithm=os.environ["ALGORITHM"]
+    )
+
+    path = "/users/me/entries/all"
+    limiter = RateLimitMiddleware(noop_app, entry_limit=UNLIMITED)
+    rejecting = RateLimitMiddleware(noop_app, entry_limit=RateLimit(per_minute=1, burst=1))
+    churning = RateLimitMiddleware(
+        noop_app,
+        store=InMemoryRateLimitStore(max_keys=10_000),
+        entry_limit=UNLIMITED
+    )
+
+    cases = {
+        "user token": (limiter, [make_scope(app, path, token)]),
+        "anonymous": (limiter, [make_scope(app, path)]),
+        "over budget (429)": (rejecting, [make_scope(app, path, token)]),
+        "new client each": (
+            churning,
+            [make_scope(app, path, ip=f"10.{i // 65536}.{i // 256 % 256}.{i % 256}")
+             for i in range(50_000)]
+        ),
+    }
+
+    for name, (middleware, scopes) in cases.items():
+        plain_ns = await time_calls(noop_app, scopes, iterations)
+        limited_ns = await time_calls(middleware, scopes, iterations)
+        print(
+            f"{name:<18} plain {plain_ns:>7.0f}ns  limited {limited_ns:>7.0f}ns  "
+            f"overhead {limited_ns - plain_ns:>7.0f}ns"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=100_000)
+    args = parser.parse_args()
+    asyncio.run(main(args.iterations))
@@ -0,0 +1,109 @@
+"""
+Drives point reads through the resilience layer against the fault-injecting
+repository and reports, per phase, how many calls succeeded, how many
+requests were retried, and the latency of successes and of failures.
+
+Phases: a healthy backend, heavy throttling, an outage (the circuit
+breaker opens and calls fail fast), recovery, and a run capped by the RU
+limiter.
+
+Run from the api directory:
+    python -m benchmarks.bench_resilience --calls 2000
+"""
+import argparse
+import asyncio
+import logging
+import time
+from collections import Counter
+
+from exceptions import ServiceOverloaded
+from repositories.fault_repository import FaultInjectingDB, FaultInjector
+from repositories.resilience import CHARGE_LIMITER, CIRCUIT_BREAKER, RETRIES
+
+USER_ID = "bench-user"
+
+
+def percentile(samples: list, fraction: float) -> float:
+    if not samples:
+        return 0.0
+    samples = sorted(samples)
+    return samples[max(0, int(len(samples) * fraction) - 1)]
+
+
+def retried() -> int:
+    return sum(child.value for child in RETRIES._children.values())
+
+
+async def run_phase(
+    label: str,
+    db: FaultInjectingDB,
+    entry_id: str,
+    calls: int,
+    concurrency: int
+) -> None:
+    outcomes = Counter()
+    ok_ms, failed_ms = [], []
+    semaphore = asyncio.Semaphore(concurrency)
+    retries_before = retried()
+    requests_before = db.faults.requests
+
+    async def call() -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await db.get_entry(entry_id, USER_ID)
+                outcomes["ok"] += 1
+                ok_ms.append((time.perf_counter() - start) * 1000)
+            except ServiceOverloaded:
+                outcomes["503"] += 1
+                failed_ms.append((time.perf_counter() - start) * 1000)
+            except Exception:
+                outcomes["error"] += 1
+                failed_ms.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(call() for _ in range(calls)))
+    elapsed = time.perf_counter() - start
+
+    print(
+        f"{label:<12} ok={outcomes['ok']:<5} 503={outcomes['503']:<5} "
+        f"error={outcomes['error']:<4} requests={db.faults.requests - requests_before:<5} "
+        f"retries={retried() - retries_before:<5.0f} {calls / elapsed:>6.0f} calls/s  "
+        f"ok p50={percentile(ok_ms, 0.5):.1f}ms p99={percentile(ok_ms, 0.99):.1f}ms  "
+        f"failed p99={percentile(failed_ms, 0.99):.1f}ms"
+    )
+
+
+async def main(calls: int, concurrency: int) -> None:
+    faults = FaultInjector(error_rate=0, seed=42)
+    db = FaultInjectingDB(faults)
+    entry = await db.create_entry({"id": "bench-entry", "user_id": USER_ID})
+    CIRCUIT_BREAKER.cooldown = 1.0
+
+    faults.error_rate = 0.05
+    await run_phase("healthy", db, entry["id"], calls, concurrency)
+    faults.error_rate = 0.5
+    await run_phase("throttled", db, entry["id"], calls, concurrency)
+    faults.error_rate = 1.0
+    await run_phase("outage", db, entry["id"], calls, concurrency)
+
+    faults.error_rate = 0.0
+    await asyncio.sleep(CIRCUIT_BREAKER.cooldown)
+    # The first call after the cooldown is the breaker's trial.
+    await db.get_entry(entry["id"], USER_ID)
+    await run_phase("recovered", db, entry["id"], calls, concurrency)
+
+    # 100 RU/s at 5 RU per read: a burst of 20 reads, then about 20 a second.
+    # Calls that would wait longer than COSMOS_RU_MAX_WAIT_MS get 503.
+    CHARGE_LIMITER.rate = CHARGE_LIMITER.tokens = 100
+    await run_phase("ru_limited", db, entry["id"], min(calls, 100), concurrency)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+    # Each call that gives up logs a warning; keep the report readable.
+    logging.getLogger("journal").setLevel(logging.ERROR)
+    asyncio.run(main(args.calls, args.concurrency))
@@ -0,0 +1,74 @@
+"""
+Measures search latency on one user's index as the journal grows, plus
+the one-off cost of loading the index and of keeping it current on writes.
+
+Run from the api directory:
+    python -m benchmarks.bench_search --entries 20000
+"""
+import random
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+from services.search_index import InMemorySearchIndex
+
+USER_ID = "bench-user"
+VOCABULARY = [f"word{i}" for i in range(20000)]
+# Zipf ranks of real text, minus the top ranks, which are the stopwords
+# the tokenizer drops. word50 lands in roughly one entry in ten.
+WEIGHTS = [1 / rank for rank in range(51, 51 + len(VOCABULARY))]
+QUERIES = ["word0", "word0 word1 word2", "word10 word200", "word5000", "missing"]
+
+
+def make_entry(rng: random.Random) -> dict:
+    def sentence() -> str:
+        return " ".join(rng.choices(VOCABULARY, WEIGHTS, k=rng.randint(5, 30)))
+    return {
+        "id": str(uuid.uuid4()),
+        "work": sentence(),
+        "struggle": sentence(),
+        "intention": sentence(),
+    }
+
+
+async def main(entries: int, searches: int, limit: int) -> None:
+    rng = random.Random(42)
+    documents = [make_entry(rng) for _ in range(entries)]
+
+    async def source():
+        for document in documents:
+            yield document
+
+    index = InMemorySearchIndex()
+    start = time.perf_counter()
+    await index.search(USER_ID, "warmup", limit, source)
+    print(f"load     {entries} entries in {(time.perf_counter() - start) * 1000:.1f}ms")
+
+    for query in QUERIES:
+        samples = []
+        for _ in range(searches):
+            start = time.perf_counter()
+            await index.search(USER_ID, query, limit, source)
+            samples.append((time.perf_counter() - start) * 1000)
+        samples.sort()
+        print(
+            f"search   {query!r:<22} mean={statistics.fmean(samples):.3f}ms "
+            f"p99={samples[int(len(samples) * 0.99) - 1]:.3f}ms"
+        )
+
+    start = time.perf_counter()
+    for document in documents[:1000]:
+        await index.add(USER_ID, {**document, "work": "rewritten entry"})
+    elapsed_us = (time.perf_counter() - start) * 1_000_000
+    print(f"update   mean={elapsed_us / 1000:.1f}us per entry")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--entries", type=int, default=20000)
+    parser.add_argument("--searches", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.entries, args.searches, args.limit))
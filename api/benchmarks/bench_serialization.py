@@ -0,0 +1,108 @@
+"""
+Times how a list of entries becomes response bytes, before and after the
+fast path, on the in-memory backend:
+
+- before: full documents, an EnrichedEntry built and dumped per entry,
+  FastAPI's jsonable_encoder, then JSONResponse.
+- after: documents projected to the summary fields, copied into
+  summaries, then FastJSONResponse (orjson when installed).
+
+It also times the NDJSON stream lines and building documents for new
+entries, and checks the old and new responses are byte for byte equal.
+
+Run from the api directory:
+    python -m benchmarks.bench_serialization --entries 10000
+"""
+import json
+import argparse
+import asyncio
+import time
+from statistics import median
+
+from fastapi.routing import serialize_response
+from starlette.responses import JSONResponse
+
+from models.entry import EnrichedEntry, InputEntry, SUMMARY_FIELDS
+from repositories.memory_repository import InMemoryDB
+from services.entry_service import summarize_entry
+from utils.fast_json import FastJSONResponse, dumps, orjson
+
+USER_ID = "bench-user"
+ENTRY = InputEntry(
+    work="Write the quarterly report and send it to the team",
+    struggle="Too many meetings in the afternoon",
+    intention="Block two focus hours every morning"
+)
+EXCLUDE = ["created_at", "updated_at", "created_ts", "updated_ts"]
+
+
+async def timed(call, repeat: int) -> float:
+    """Returns the median time of `repeat` runs in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await call()
+        samples.append((time.perf_counter() - start) * 1000)
+    return median(samples)
+
+
+async def main(entries: int, repeat: int) -> None:
+    db = InMemoryDB()
+    documents = [EnrichedEntry.new_document(ENTRY) for _ in range(entries)]
+    for document in documents:
+        document["user_id"] = USER_ID
+    await db.create_entries(USER_ID, documents)
+
+    async def before() -> bytes:
+        raw_entries = await db.get_all_entries(USER_ID)
+        summaries = [EnrichedEntry(**entry).model_dump(exclude=EXCLUDE) for entry in raw_entries]
+        content = await serialize_response(response_content=summaries)
+        return JSONResponse(content).body
+
+    async def after_stdlib() -> bytes:
+        raw_entries = await db.get_all_entries(USER_ID, SUMMARY_FIELDS + ("_etag",))
+        return JSONResponse([summarize_entry(entry) for entry in raw_entries]).body
+
+    async def after() -> bytes:
+        raw_entries = await db.get_all_entries(USER_ID, SUMMARY_FIELDS + ("_etag",))
+        return FastJSONResponse([summarize_entry(entry) for entry in raw_entries]).body
+
+    async def stream_before() -> None:
+        for entry in await db.get_all_entries(USER_ID):
+            (json.dumps(EnrichedEntry(**entry).model_dump(exclude=EXCLUDE)) + "\n").encode("utf-8")
+
+    async def stream_after() -> None:
+        for entry in await db.get_all_entries(USER_ID):
+            dumps(summarize_entry(entry)) + b"\n"
+
+    async def create_before() -> None:
+        for _ in range(entries):
+            EnrichedEntry(**ENTRY.model_dump()).model_dump()
+
+    async def create_after() -> None:
+        for _ in range(entries):
+            EnrichedEntry.new_document(ENTRY)
+
+    print(f"{entries} entries, orjson {'installed' if orjson is not None else 'not installed'}")
+    cases = [
+        ("GET /all before", before),
+        ("GET /all after, stdlib json", after_stdlib),
+        ("GET /all after", after),
+        ("stream lines before", stream_before),
+        ("stream lines after", stream_after),
+        ("new documents before", create_before),
+        ("new documents after", create_after),
+    ]
+    for name, call in cases:
+        print(f"{name:<30} {await timed(call, repeat):>9.1f}ms")
+
+    body_before, body_after = await before(), await after()
+    print(f"same response bytes: {body_before == body_after} ({len(body_after)} bytes)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--entries", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(main(args.entries, args.repeat))
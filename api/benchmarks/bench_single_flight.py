@@ -0,0 +1,123 @@
+"""
+Sends bursts of identical concurrent reads through EntryService and counts
+the requests that reach the database, against the fault-injecting backend
+with no faults and a fixed latency. Each burst runs once with reads
+coalesced and once with a service per caller, as without coalescing.
+
+It also checks that a read started after a write doesn't join one that
+was in flight before it, and that a read in flight when an update lands
+doesn't leave the old entry in the cache.
+
+Run from the api directory:
+    python -m benchmarks.bench_single_flight --callers 50
+"""
+import argparse
+import asyncio
+import logging
+import time
+
+from models.entry import InputEntry
+from repositories.fault_repository import FaultInjectingDB, FaultInjector
+from repositories.memory_repository import InMemoryDB, InMemoryStatsDB
+from services.entry_cache import InMemoryEntryCache
+from services.entry_service import EntryService
+from services.search_index import InMemorySearchIndex
+from services.single_flight import SingleFlight
+
+USER_ID = "bench-user"
+ENTRY = InputEntry(work="Benchmark", struggle="Duplicate reads", intention="Share them")
+UPDATE = InputEntry(work="Updated", struggle="", intention="")
+
+
+class LateReplyDB(FaultInjectingDB):
+    """
+    Reads the entry before waiting out the latency, like a reply still on
+    its way back when a write lands.
+    """
+    async def get_entry(self, entry_id: str, user_id: str):
+        entry = await InMemoryDB.get_entry(self, entry_id, user_id)
+        await self.faults.request()
+        return entry
+
+
+async def burst(label: str, db: FaultInjectingDB, calls) -> None:
+    requests_before = db.faults.requests
+    start = time.perf_counter()
+    await asyncio.gather(*(call() for call in calls))
+    elapsed = (time.perf_counter() - start) * 1000
+    print(
+        f"{label:<32} callers={len(calls):<4} "
+        f"db requests={db.faults.requests - requests_before:<4} {elapsed:>7.1f}ms"
+    )
+
+
+async def main(callers: int, entries: int, latency_ms: float) -> None:
+    db = FaultInjectingDB(FaultInjector(error_rate=0, latency_ms=latency_ms))
+    # Nothing is cached, so every get_entry goes to the database.
+    cache = InMemoryEntryCache(ttl=0)
+    search_index = InMemorySearchIndex()
+    stats_db = InMemoryStatsDB()
+    service = EntryService(db, cache, search_index, stats_db, SingleFlight())
+
+    def uncoalesced() -> EntryService:
+        return EntryService(db, cache, search_index, stats_db, SingleFlight())
+
+    await service.create_entries([ENTRY] * entries, USER_ID)
+    entry_id = (await db.get_all_entries(USER_ID))[0]["id"]
+
+    await burst(
+        "get_all_entries (uncoalesced)", db,
+        [lambda: uncoalesced().get_all_entries(USER_ID)] * callers
+    )
+    await burst(
+        "get_all_entries (coalesced)", db,
+        [lambda: service.get_all_entries(USER_ID)] * callers
+    )
+    await burst(
+        "get_entry (uncoalesced)", db,
+        [lambda: uncoalesced().get_entry(entry_id, USER_ID)] * callers
+    )
+    await burst(
+        "get_entry (coalesced)", db,
+        [lambda: service.get_entry(entry_id, USER_ID)] * callers
+    )
+
+    # A read in flight when a write lands must not be shared with callers
+    # that arrive after the write. The write skips the latency so it lands
+    # while the first read is still waiting.
+    first = asyncio.create_task(service.get_all_entries(USER_ID))
+    await asyncio.sleep(0)
+    db.faults.latency_ms = 0
+    await service.create_entry(ENTRY, USER_ID)
+    db.faults.latency_ms = latency_ms
+    requests_before = db.faults.requests
+    await asyncio.gather(first, service.get_all_entries(USER_ID))
+    print(f"a read after a write sent its own request: {db.faults.requests > requests_before}")
+
+    # An update landing while a cache miss is in flight: the miss returns
+    # the old entry, but mustn't cache it over the update.
+    db = LateReplyDB(FaultInjector(error_rate=0, latency_ms=latency_ms))
+    service = EntryService(db, InMemoryEntryCache(), search_index, stats_db, SingleFlight())
+    await service.create_entries([ENTRY], USER_ID)
+    entry_id = (await db.get_all_entries(USER_ID))[0]["id"]
+    first = asyncio.create_task(service.get_entry(entry_id, USER_ID))
+    await asyncio.sleep(latency_ms / 2000)
+    db.faults.latency_ms = 0
+    etag = await service.update_entry(entry_id, UPDATE, USER_ID)
+    db.faults.latency_ms = latency_ms
+    await first
+    entry, entry_etag = await service.get_entry(entry_id, USER_ID)
+    print(
+        "a read after an update returned the update: "
+        f"{entry['work'] == UPDATE.work and entry_etag == etag}"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--callers", type=int, default=50)
+    parser.add_argument("--entries", type=int, default=500)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    args = parser.parse_args()
+    logging.getLogger("journal").setLevel(logging.WARNING)
+    asyncio.run(main(args.callers, args.entries, args.latency_ms))
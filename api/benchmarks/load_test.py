@@ -0,0 +1,405 @@
+"""
+Drives every route in login_router and journal_router with concurrent
+clients and reports throughput and p50/p95/p99 latency per endpoint.
+
+By default it runs against the in-memory backend, so the numbers are the
+API's own overhead without the network. Requests go straight to the ASGI
+app through httpx (see benchmarks/requirements.txt).
+
+Run from the api directory:
+    python -m benchmarks.load_test --save-baseline
+    python -m benchmarks.load_test --compare
+"""
+import os
+import sys
+import json
+import uuid
+import asyncio
+import argparse
+import itertools
+import tempfile
+from dataclasses import dataclass, field
+from pathlib import Path
+from time import perf_counter
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline.json"
+PASSWORD = "Benchmark-Passw0rd!"
+ENTRY = {
+    "work": "Write the quarterly report",
+    "struggle": "Too many meetings",
+    "intention": "Block two focus hours every morning",
+}
+
+
+@dataclass
+class Worker:
+    username: str
+    headers: Dict[str, str] = field(default_factory=dict)
+    entry_ids: List[str] = field(default_factory=list)
+    etag: Optional[str] = None
+    export_id: Optional[str] = None
+
+
+@dataclass
+class Scenario:
+    name: str
+    expected_status: int
+    call: Callable[[httpx.AsyncClient, Worker, int], Awaitable[httpx.Response]]
+    prepare: Optional[Callable[[httpx.AsyncClient, List[Worker], int], Awaitable[None]]] = None
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def bulk_create(client: httpx.AsyncClient, worker: Worker, count: int) -> List[str]:
+    created = []
+    for start in range(0, count, 1000):
+        size = min(1000, count - start)
+        response = await client.post(
+            "/users/me/entries/bulk",
+            json=[ENTRY] * size,
+            headers=worker.headers
+        )
+        response.raise_for_status()
+        created.extend(result["id"] for result in response.json()["results"])
+    return created
+
+
+async def refill_entries(client: httpx.AsyncClient, workers: List[Worker], total: int) -> None:
+    """
+    Gives every worker enough fresh entries for a destructive scenario.
+    Workers don't share the requests evenly, so each gets enough for all.
+    """
+    for worker in workers:
+        worker.entry_ids = await bulk_create(client, worker, total)
+
+
+async def fetch_etag(client: httpx.AsyncClient, workers: List[Worker], total: int) -> None:
+    for worker in workers:
+        response = await client.get(
+            f"/users/me/entries/{worker.entry_ids[0]}",
+            headers=worker.headers
+        )
+        worker.etag = response.headers["ETag"]
+
+
+async def finish_exports(client: httpx.AsyncClient, workers: List[Worker], total: int) -> None:
+    """Exports every worker's entries and waits for the files."""
+    for worker in workers:
+        response = await client.post("/users/me/entries/export", headers=worker.headers)
+        response.raise_for_status()
+        worker.export_id = response.json()["id"]
+    for worker in workers:
+        while True:
+            response = await client.get(
+                f"/users/me/entries/export/{worker.export_id}",
+                headers=worker.headers
+            )
+            response.raise_for_status()
+            status = response.json()["status"]
+            if status == "done":
+                break
+            if status == "failed":
+                raise RuntimeError(f"Export {worker.export_id} failed")
+            await asyncio.sleep(0.05)
+
+
+def build_scenarios() -> List[Scenario]:
+    def first_entry(worker: Worker) -> str:
+        return worker.entry_ids[0]
+
+    return [
+        Scenario(
+            "POST /user/me/register", 200,
+            lambda client, worker, i: client.post(
+                "/user/me/register",
+                json={"username": f"u{uuid.uuid4().hex[:20]}", "password": PASSWORD}
+            )
+        ),
+        Scenario(
+            "POST /user/me/token", 200,
+            lambda client, worker, i: client.post(
+                "/user/me/token",
+                data={"username": worker.username, "password": PASSWORD}
+            )
+        ),
+        Scenario(
+            "GET /user/me/", 200,
+            lambda client, worker, i: client.get("/user/me/", headers=worker.headers)
+        ),
+        Scenario(
+            "POST /users/me/entries/create", 201,
+            lambda client, worker, i: client.post(
+                "/users/me/entries/create", json=ENTRY, headers=worker.headers
+            )
+        ),
+        Scenario(
+            "POST /users/me/entries/bulk", 200,
+            lambda client, worker, i: client.post(
+                "/users/me/entries/bulk", json=[ENTRY] * 10, headers=worker.headers
+            )
+        ),
+        Scenario(
+            "GET /users/me/entries/all", 200,
+            lambda client, worker, i: client.get(
+                "/users/me/entries/all", headers=worker.headers
+            )
+        ),
+        Scenario(
+            "GET /users/me/entries/all?limit=50", 200,
+            lambda client, worker, i: client.get(
+                "/users/me/entries/all", params={"limit": 50}, headers=worker.headers
+            )
+        ),
+        Scenario(
+            "GET /users/me/entries/all?stream=true", 200,
+            lambda client, worker, i: client.get(
+                "/users/me/entries/all", params={"stream": "true"}, headers=worker.headers
+            )
+        ),
+        Scenario(
+            "GET /users/me/entries?from=...", 200,
+            lambda client, worker, i: client.get(
+                "/users/me/entries",
+                params={"from": "2000-01-01T00:00:00", "limit": 50},
+                headers=worker.headers
+            )
+        ),
+        Scenario(
+            "GET /users/me/entries/stats", 200,
+            lambda client, worker, i: client.get(
+                "/users/me/entries/stats", headers=worker.headers
+            )
+        ),
+        Scenario(
+            "GET /users/me/entries/search", 200,
+            lambda client, worker, i: client.get(
+                "/users/me/entries/search",
+                params={"q": "quarterly meetings"},
+                headers=worker.headers
+            )
+        ),
+        Scenario(
+            "GET /users/me/entries/{entry_id}", 200,
+            lambda client, worker, i: client.get(
+                f"/users/me/entries/{first_entry(worker)}", headers=worker.headers
+            )
+        ),
+        Scenario(
+            "GET /users/me/entries/{entry_id} (304)", 304,
+            lambda client, worker, i: client.get(
+                f"/users/me/entries/{first_entry(worker)}",
+                headers={**worker.headers, "If-None-Match": worker.etag}
+            ),
+            prepare=fetch_etag
+        ),
+        Scenario(
+            "PATCH /users/me/entries/update/{entry_id}", 200,
+            lambda client, worker, i: client.patch(
+                f"/users/me/entries/update/{first_entry(worker)}",
+                json={**ENTRY, "work": f"Revision {i}"},
+                headers=worker.headers
+            )
+        ),
+        Scenario(
+            "DELETE /users/me/entries/delete/{entry_id}", 200,
+            lambda client, worker, i: client.delete(
+                f"/users/me/entries/delete/{worker.entry_ids.pop()}",
+                headers=worker.headers
+            ),
+            prepare=refill_entries
+        ),
+        Scenario(
+            "POST /users/me/entries/bulk/delete", 200,
+            lambda client, worker, i: client.post(
+                "/users/me/entries/bulk/delete",
+                json={"ids": [worker.entry_ids.pop()]},
+                headers=worker.headers
+            ),
+            prepare=refill_entries
+        ),
+        Scenario(
+            # Repeats return the export already underway, like a client
+            # pressing the button again.
+            "POST /users/me/entries/export", 202,
+            lambda client, worker, i: client.post(
+                "/users/me/entries/export", headers=worker.headers
+            )
+        ),
+        Scenario(
+            "GET /users/me/entries/export/{job_id}", 200,
+            lambda client, worker, i: client.get(
+                f"/users/me/entries/export/{worker.export_id}", headers=worker.headers
+            ),
+            prepare=finish_exports
+        ),
+        Scenario(
+            "GET /users/me/entries/export/{job_id}/download", 200,
+            lambda client, worker, i: client.get(
+                f"/users/me/entries/export/{worker.export_id}/download",
+                headers=worker.headers
+            )
+        ),
+        Scenario(
+            "DELETE /users/me/entries/all", 200,
+            lambda client, worker, i: client.delete(
+                "/users/me/entries/all", headers=worker.headers
+            )
+        ),
+    ]
+
+
+async def run_scenario(
+        client: httpx.AsyncClient,
+        scenario: Scenario,
+        workers: List[Worker],
+        total: int
+) -> Dict[str, Any]:
+    if scenario.prepare is not None:
+        await scenario.prepare(client, workers, total)
+
+    latencies: List[float] = []
+    errors = 0
+    counter = itertools.count()
+
+    async def drive(worker: Worker) -> None:
+        nonlocal errors
+        while (i := next(counter)) < total:
+            start = perf_counter()
+            response = await scenario.call(client, worker, i)
+            latencies.append(perf_counter() - start)
+            if response.status_code != scenario.expected_status:
+                errors += 1
+
+    start = perf_counter()
+    await asyncio.gather(*(drive(worker) for worker in workers))
+    elapsed = perf_counter() - start
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+    }
+
+
+async def setup_workers(client: httpx.AsyncClient, concurrency: int, entries: int) -> List[Worker]:
+    workers = [Worker(username=f"bench{uuid.uuid4().hex[:16]}") for _ in range(concurrency)]
+    for worker in workers:
+        response = await client.post(
+            "/user/me/register",
+            json={"username": worker.username, "password": PASSWORD}
+        )
+        response.raise_for_status()
+        response = await client.post(
+            "/user/me/token",
+            data={"username": worker.username, "password": PASSWORD}
+        )
+        response.raise_for_status()
+        worker.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        worker.entry_ids = await bulk_create(client, worker, entries)
+    return workers
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Dict[str, Any]]:
+    # main reads its settings at import, so the backend must be chosen first.
+    from main import app
+
+    results = {}
+    async with app.router.lifespan_context(app):
+        # Count unhandled errors as the 500s a server would send.
+        transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            workers = await setup_workers(client, args.concurrency, args.entries)
+            for scenario in build_scenarios():
+                results[scenario.name] = await run_scenario(
+                    client, scenario, workers, args.requests
+                )
+                print_row(scenario.name, results[scenario.name])
+    return results
+
+
+def print_row(name: str, result: Dict[str, Any]) -> None:
+    print(
+        f"{name:<48} {result['throughput_rps']:>9} rps  "
+        f"p50 {result['p50_ms']:>8}ms  p95 {result['p95_ms']:>8}ms  "
+        f"p99 {result['p99_ms']:>8}ms  errors {result['errors']}"
+    )
+
+
+def compare(results: Dict[str, Dict[str, Any]], tolerance: float) -> bool:
+    """Prints endpoints that regressed past the tolerance. True if none did."""
+    baseline = json.loads(BASELINE_PATH.read_text())["results"]
+    healthy = True
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        if result["p95_ms"] > previous["p95_ms"] * (1 + tolerance):
+            print(f"REGRESSION {name}: p95 {previous['p95_ms']}ms -> {result['p95_ms']}ms")
+            healthy = False
+        if result["throughput_rps"] < previous["throughput_rps"] * (1 - tolerance):
+            print(
+                f"REGRESSION {name}: throughput "
+                f"{previous['throughput_rps']} -> {result['throughput_rps']} rps"
+            )
+            healthy = False
+    return healthy
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--backend", default="memory", choices=["memory", "faulty", "cosmos"])
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--requests", type=int, default=500, help="requests per endpoint")
+    parser.add_argument("--entries", type=int, default=100, help="entries per user")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--compare", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    if args.compare and not args.save_baseline and not BASELINE_PATH.exists():
+        print(
+            f"No baseline at {BASELINE_PATH}. Run with --save-baseline first.",
+            file=sys.stderr
+        )
+        return 2
+
+    os.environ["REPOSITORY_BACKEND"] = args.backend
+    os.environ.setdefault("SECRET_KEY", uuid.uuid4().hex)
+    os.environ.setdefault("ALGORITHM", "HS256")
+    os.environ.setdefault("TOKEN_EXPIRE_MINUTES", "30")
+    # Every worker shares one client address, and each sends far more than
+    # a real client would. The in-flight cap stays on.
+    os.environ.setdefault("RATE_LIMIT_AUTH_PER_MINUTE", "0")
+    os.environ.setdefault("RATE_LIMIT_ENTRIES_PER_MINUTE", "0")
+    # Export files are throwaway output.
+    os.environ.setdefault("EXPORT_DIR", tempfile.mkdtemp(prefix="load-test-exports-"))
+
+    results = asyncio.run(run(args))
+
+    if args.save_baseline:
+        config = {
+            name: getattr(args, name)
+            for name in ("backend", "concurrency", "requests", "entries")
+        }
+        BASELINE_PATH.write_text(
+            json.dumps({"config": config, "results": results}, indent=2)
+        )
+        print(f"Saved baseline to {BASELINE_PATH}")
+
+    if args.compare and not compare(results, args.tolerance):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,61 @@
+from fastapi import Request
+
+from repositories.interface_repository import (
+    DatabaseInterface,
+    StatsDatabaseInterface,
+    UserDatabaseInterface
+)
+from services.entry_cache import EntryCache
+from services.export_service import ExportService
+from services.password_hasher import PasswordHasher
+from services.search_index import SearchIndex
+from services.single_flight import SingleFlight
+from services.token_service import TokenVerifier
+
+
+async def get_entry_db(request: Request) -> DatabaseInterface:
+    """
+    Returns the process-wide entry repository opened in the app lifespan.
+    Dependencies here are async so FastAPI doesn't hop to its threadpool.
+    """
+    return request.app.state.entry_db
+
+
+async def get_user_db(request: Request) -> UserDatabaseInterface:
+    """Returns the process-wide user repository opened in the app lifespan."""
+    return request.app.state.user_db
+
+
+async def get_stats_db(request: Request) -> StatsDatabaseInterface:
+    """Returns the process-wide journal stats repository."""
+    return request.app.state.stats_db
+
+
+async def get_password_hasher(request: Request) -> PasswordHasher:
+    """Returns the process-wide bcrypt worker pool."""
+    return request.app.state.password_hasher
+
+
+async def get_token_verifier(request: Request) -> TokenVerifier:
+    """Returns the process-wide token verifier and its decoded-token cache."""
+    return request.app.state.token_verifier
+
+
+async def get_entry_cache(request: Request) -> EntryCache:
+    """Returns the process-wide entry cache."""
+    return request.app.state.entry_cache
+
+
+async def get_export_service(request: Request) -> ExportService:
+    """Returns the process-wide export job runner."""
+    return request.app.state.export_service
+
+
+async def get_search_index(request: Request) -> SearchIndex:
+    """Returns the process-wide full-text index of entries."""
+    return request.app.state.search_index
+
+
+async def get_single_flight(request: Request) -> SingleFlight:
+    """Returns the process-wide table of entry reads in flight."""
+    return request.app.state.single_flight
@@ -1,20 +1,60 @@
 import logging
-from typing import Annotated, Dict, List, Any
+from datetime import datetime
+from typing import Annotated, Dict, List, Any, Literal, Optional
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Body, Depends, Header, Query, Response, status
+from fastapi.responses import FileResponse, StreamingResponse
 
 from services.entry_service import EntryService
-from repositories.cosmos_repository import CosmosDB
-from models.entry import InputEntry
+from services.entry_cache import EntryCache
+from services.export_service import ExportService
+from services.search_index import SearchIndex
+from services.single_flight import SingleFlight
+from services.stats_service import StatsService
+from repositories.interface_repository import (
+    DatabaseInterface,
+    StatsDatabaseInterface
+)
+from models.entry import InputEntry, BulkDeleteRequest, MAX_BULK_SIZE
+from controllers.dependencies import (
+    get_entry_db,
+    get_entry_cache,
+    get_export_service,
+    get_search_index,
+    get_single_flight,
+    get_stats_db
+)
 from controllers.login_router import oauth2_scheme, read_users_me
+from utils.etag import etag_matches
+from utils.fast_json import FastJSONResponse
 
 logger = logging.getLogger("journal")
 router = APIRouter(prefix="/users/me/entries", dependencies=[Depends(oauth2_scheme)])
 
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 1000
+DEFAULT_SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 100
 
-async def get_entry_service():
-    async with CosmosDB() as db:
-        yield EntryService(db)
+
+async def get_entry_service(
+    db: Annotated[DatabaseInterface, Depends(get_entry_db)],
+    cache: Annotated[EntryCache, Depends(get_entry_cache)],
+    search_index: Annotated[SearchIndex, Depends(get_search_index)],
+    stats_db: Annotated[StatsDatabaseInterface, Depends(get_stats_db)],
+    reads: Annotated[SingleFlight, Depends(get_single_flight)]
+) -> EntryService:
+    return EntryService(db, cache, search_index, stats_db, reads)
+
+
+async def get_stats_service(
+    db: Annotated[StatsDatabaseInterface, Depends(get_stats_db)]
+) -> StatsService:
+    return StatsService(db)
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
 
 
 @router.post("/create", status_code=201)
@@ -28,34 +68,176 @@ async def create_entry(
     return {"detail": "Entry created successfully"}
 
 
-@router.get("/all")
-async def get_all_entries(
+@router.post("/bulk")
+async def create_entries(
+    entries_data: Annotated[
+        List[InputEntry],
+        Body(min_length=1, max_length=MAX_BULK_SIZE)
+    ],
     current_user_id: Annotated[str, Depends(read_users_me)],
     entry_service: Annotated[EntryService, Depends(get_entry_service)]
-) -> List[Dict[str, Any]]:
+) -> Dict[str, List[Dict[str, Any]]]:
+    logger.info("Creating %s entries in bulk", len(entries_data))
+    results = await entry_service.create_entries(entries_data, current_user_id)
+    return {"results": results}
+
+
+@router.post("/bulk/delete")
+async def delete_entries(
+    delete_request: BulkDeleteRequest,
+    current_user_id: Annotated[str, Depends(read_users_me)],
+    entry_service: Annotated[EntryService, Depends(get_entry_service)]
+) -> Dict[str, List[Dict[str, Any]]]:
+    logger.info("Deleting %s entries in bulk", len(delete_request.ids))
+    results = await entry_service.delete_entries(delete_request.ids, current_user_id)
+    return {"results": results}
+
+
+@router.post("/export", status_code=202)
+async def start_export(
+    current_user_id: Annotated[str, Depends(read_users_me)],
+    export_service: Annotated[ExportService, Depends(get_export_service)]
+) -> Dict[str, Any]:
+    logger.info("Starting an export")
+    return await export_service.submit(current_user_id)
+
+
+@router.get("/export/{job_id}")
+async def get_export(
+    job_id: str,
+    current_user_id: Annotated[str, Depends(read_users_me)],
+    export_service: Annotated[ExportService, Depends(get_export_service)]
+) -> Dict[str, Any]:
+    return export_service.get(current_user_id, job_id)
+
+
+@router.get("/export/{job_id}/download", response_class=FileResponse)
+async def download_export(
+    job_id: str,
+    current_user_id: Annotated[str, Depends(read_users_me)],
+    export_service: Annotated[ExportService, Depends(get_export_service)]
+) -> FileResponse:
+    logger.info("Downloading export %s", job_id)
+    return FileResponse(
+        export_service.download_path(current_user_id, job_id),
+        media_type="application/gzip",
+        filename=f"journal-entries-{job_id}.ndjson.gz"
+    )
+
+
+@router.get("", response_model=None)
+async def query_entries(
+    current_user_id: Annotated[str, Depends(read_users_me)],
+    entry_service: Annotated[EntryService, Depends(get_entry_service)],
+    from_: Annotated[Optional[datetime], Query(alias="from")] = None,
+    to: Optional[datetime] = None,
+    order: Literal["asc", "desc"] = "desc",
+    limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None
+) -> Response:
+    logger.info("Querying entries by date")
+    return FastJSONResponse(await entry_service.query_entries(
+        current_user_id,
+        limit,
+        from_,
+        to,
+        order == "desc",
+        cursor
+    ))
+
+
+@router.get("/all", response_model=None)
+async def get_all_entries(
+    current_user_id: Annotated[str, Depends(read_users_me)],
+    entry_service: Annotated[EntryService, Depends(get_entry_service)],
+    limit: Annotated[Optional[int], Query(ge=1, le=MAX_PAGE_SIZE)] = None,
+    cursor: Optional[str] = None,
+    stream: bool = False,
+    if_none_match: Annotated[Optional[str], Header()] = None
+) -> Response:
+    # Lists can hold thousands of entries, so they're sent as they come
+    # from the service instead of through FastAPI's encoder.
+    if stream:
+        logger.info("Streaming all entries")
+        return StreamingResponse(
+            entry_service.stream_entries(
+                current_user_id,
+                limit or DEFAULT_PAGE_SIZE
+            ),
+            media_type="application/x-ndjson"
+        )
+
+    if limit is not None or cursor is not None:
+        logger.info("Retrieving a page of entries")
+        return FastJSONResponse(await entry_service.get_entries_page(
+            current_user_id,
+            limit or DEFAULT_PAGE_SIZE,
+            cursor
+        ))
+
     logger.info("Retrieving all entries")
-    return await entry_service.get_all_entries(current_user_id)
+    entries, etag = await entry_service.get_all_entries(current_user_id, if_none_match)
+    if entries is None:
+        return not_modified(etag)
+    return FastJSONResponse(entries, headers={"ETag": etag})
+
+
+# Registered before /{entry_id}, which would otherwise match "stats".
+@router.get("/stats")
+async def get_stats(
+    current_user_id: Annotated[str, Depends(read_users_me)],
+    stats_service: Annotated[StatsService, Depends(get_stats_service)]
+) -> Dict[str, Any]:
+    logger.info("Retrieving journal stats")
+    return await stats_service.get_stats(current_user_id)
 
 
-@router.get("/{entry_id}")
+# Registered before /{entry_id}, which would otherwise match "search".
+@router.get("/search")
+async def search_entries(
+    q: Annotated[str, Query(min_length=1, max_length=256)],
+    current_user_id: Annotated[str, Depends(read_users_me)],
+    entry_service: Annotated[EntryService, Depends(get_entry_service)],
+    limit: Annotated[int, Query(ge=1, le=MAX_SEARCH_LIMIT)] = DEFAULT_SEARCH_LIMIT
+) -> Dict[str, List[Dict[str, Any]]]:
+    logger.info("Searching entries")
+    results = await entry_service.search_entries(current_user_id, q, limit)
+    return {"results": results}
+
+
+@router.get("/{entry_id}", response_model=None)
 async def get_entry(
     entry_id: str, 
     current_user_id: Annotated[str, Depends(read_users_me)],
-    entry_service: Annotated[EntryService, Depends(get_entry_service)]
-) -> Dict[str, Any]:
+    entry_service: Annotated[EntryService, Depends(get_entry_service)],
+    if_none_match: Annotated[Optional[str], Header()] = None
+) -> Response:
+    if if_none_match:
+        etag = await entry_service.get_entry_etag(entry_id, current_user_id)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+
     logger.info("Retrieving entry with ID: %s", entry_id)
-    return await entry_service.get_entry(entry_id, current_user_id)
+    entry, etag = await entry_service.get_entry(entry_id, current_user_id)
+    return FastJSONResponse(entry, headers={"ETag": etag})
 
 
 @router.patch("/update/{entry_id}")
 async def update_entry(
     entry_id: str, 
     updated_data: InputEntry, 
+    response: Response,
     current_user_id: Annotated[str, Depends(read_users_me)],
-    entry_service: Annotated[EntryService, Depends(get_entry_service)]
+    entry_service: Annotated[EntryService, Depends(get_entry_service)],
+    if_match: Annotated[Optional[str], Header()] = None
 ) -> Dict[str, str]:
     logger.info("Updating entry with ID %s", entry_id)
-    await entry_service.update_entry(entry_id, updated_data, current_user_id)
+    response.headers["ETag"] = await entry_service.update_entry(
+        entry_id,
+        updated_data,
+        current_user_id,
+        if_match
+    )
     return {"detail": "Entry updated successfully"}
 
 
@@ -67,4 +249,24 @@ async def delete_entry(
 ) -> Dict[str, str]:
     logger.info("Deleting entry with ID %s", entry_id)
     await entry_service.delete_entry(entry_id, current_user_id)
-    return {"detail": "Entry deleted successfully"}
\ No newline at end of file
+    return {"detail": "Entry deleted successfully"}
+
+
+@router.delete("/all")
+async def delete_all_entries(
+    response: Response,
+    current_user_id: Annotated[str, Depends(read_users_me)],
+    entry_service: Annotated[EntryService, Depends(get_entry_service)]
+) -> Dict[str, Any]:
+    logger.info("Deleting all entries")
+    deleted, failed_ids = await entry_service.delete_all_entries(current_user_id)
+    if failed_ids:
+        response.status_code = status.HTTP_207_MULTI_STATUS
+        return {
+            "detail": (
+                f"Deleted {deleted} entries. {len(failed_ids)} entries "
+                "couldn't be deleted; please try again."
+            ),
+            "failed": failed_ids,
+        }
+    return {"detail": f"Deleted {deleted} entries successfully"}
\ No newline at end of file
@@ -7,14 +7,23 @@ from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from models.token import Token
 from models.user import CreateUser
 from services.auth_service import AuthService
-from repositories.cosmos_repository import UserDB
+from services.password_hasher import PasswordHasher
+from services.token_service import TokenVerifier
+from repositories.interface_repository import UserDatabaseInterface
+from controllers.dependencies import (
+    get_user_db,
+    get_password_hasher,
+    get_token_verifier
+)
 
 router = APIRouter(prefix="/user/me")
 logger = logging.getLogger("journal")
 
-async def get_auth_service():
-    async with UserDB() as db:
-        yield AuthService(db)
+async def get_auth_service(
+    db: Annotated[UserDatabaseInterface, Depends(get_user_db)],
+    hasher: Annotated[PasswordHasher, Depends(get_password_hasher)]
+) -> AuthService:
+    return AuthService(db, hasher)
 
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/user/me/token")
@@ -52,7 +61,7 @@ async def register_user(
 @router.get("/")
 async def read_users_me(
     token: Annotated[str, Depends(oauth2_scheme)],
-    auth_service: Annotated[AuthService, Depends(get_auth_service)]
+    verifier: Annotated[TokenVerifier, Depends(get_token_verifier)]
 ) -> str:
-    user_id = await auth_service.get_current_user(token)
-    return user_id
\ No newline at end of file
+    # Token verification is stateless, so this doesn't touch the user database.
+    return verifier.verify(token)
\ No newline at end of file
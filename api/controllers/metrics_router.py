@@ -0,0 +1,12 @@
+from fastapi import APIRouter, Response
+
+from utils.metrics import REGISTRY
+
+router = APIRouter()
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics() -> Response:
+    return Response(REGISTRY.render(), media_type=PROMETHEUS_CONTENT_TYPE)
@@ -3,6 +3,11 @@ class EntryNotFoundError(Exception):
     pass
 
 
+class EntryConflictError(Exception):
+    """Raised when an entry changed since the client's If-Match etag."""
+    pass
+
+
 class UserAlreadyExists(Exception):
     """Raised for already existing usernames"""
     pass
@@ -15,4 +20,25 @@ class WeakPassword(Exception):
 
 class IncorrectCredentials(Exception):
     """Raised for incorrect credentials"""
-    pass
\ No newline at end of file
+    pass
+
+class ServiceOverloaded(Exception):
+    """Raised when a bounded worker pool can't accept more work"""
+    def __init__(self, message: str, retry_after: int = 1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class InvalidCursor(Exception):
+    """Raised for malformed pagination cursors"""
+    pass
+
+
+class ExportNotFound(Exception):
+    """Raised when an export job doesn't exist or belongs to another user"""
+    pass
+
+
+class ExportNotReady(Exception):
+    """Raised when downloading an export that hasn't finished"""
+    pass
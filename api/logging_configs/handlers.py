@@ -0,0 +1,187 @@
+import datetime as dt
+import gzip
+import os
+import queue
+import shutil
+import threading
+import traceback
+import logging
+import logging.handlers
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import override
+
+
+class BatchingFileHandler(logging.Handler):
+    """
+    Buffers formatted records and writes each batch with a single write
+    call, once `flush_bytes` are buffered or `flush_interval` seconds have
+    passed. The file is rotated past `max_bytes`; rotated segments get a
+    timestamped name, are gzipped in the background when `compress` is set,
+    and only the newest `backup_count` are kept.
+
+    Meant to sit behind the QueueHandler listener, so disk I/O never happens
+    on the threads that log.
+    """
+    def __init__(
+        self,
+        filename: str,
+        max_bytes: int = 50 * 1024 * 1024,
+        backup_count: int = 5,
+        flush_bytes: int = 64 * 1024,
+        flush_interval: float = 1.0,
+        compress: bool = True,
+        encoding: str = "utf-8",
+    ):
+        super().__init__()
+        self.path = Path(filename).resolve()
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.flush_bytes = flush_bytes
+        self.flush_interval = flush_interval
+        self.encoding = encoding
+
+        self._buffer: list[bytes] = []
+        self._buffered = 0
+        self._fd = self._open()
+        self._size = os.fstat(self._fd).st_size
+        self._compressor = (
+            ThreadPoolExecutor(max_workers=1, thread_name_prefix="log-compress")
+            if compress else None
+        )
+
+        # Flushes a partial batch when no new records arrive to trigger it.
+        self._stop_flushing = threading.Event()
+        self._flusher = threading.Thread(
+            target=self._flush_periodically,
+            name="log-flush",
+            daemon=True
+        )
+        self._flusher.start()
+
+    def _open(self) -> int:
+        return os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+
+    def _flush_periodically(self) -> None:
+        while not self._stop_flushing.wait(self.flush_interval):
+            self.flush()
+
+    @override
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            line = (self.format(record) + "\n").encode(self.encoding)
+        except Exception:
+            self.handleError(record)
+            return
+
+        self._buffer.append(line)
+        self._buffered += len(line)
+        if self._buffered >= self.flush_bytes:
+            self._write_batch()
+
+    @override
+    def flush(self) -> None:
+        with self.lock:
+            if self._buffer:
+                self._write_batch()
+
+    def _write_batch(self) -> None:
+        """Writes the buffer with one write call. The caller holds the lock."""
+        data = memoryview(b"".join(self._buffer))
+        self._buffer.clear()
+        self._buffered = 0
+        try:
+            while data:
+                written = os.write(self._fd, data)
+                self._size += written
+                data = data[written:]
+        except OSError:
+            # Like Handler.handleError: report to stderr and keep logging.
+            if logging.raiseExceptions:
+                traceback.print_exc()
+            return
+
+        if self._size >= self.max_bytes:
+            self._rotate()
+
+    def _rotate(self) -> None:
+        os.close(self._fd)
+        stamp = dt.datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        segment = self.path.with_name(f"{self.path.name}.{stamp}")
+        os.replace(self.path, segment)
+        self._fd = self._open()
+        self._size = 0
+
+        if self._compressor is not None:
+            self._compressor.submit(self._compress, segment)
+        else:
+            self._prune()
+
+    def _compress(self, segment: Path) -> None:
+        with open(segment, "rb") as source, gzip.open(f"{segment}.gz", "wb") as target:
+            shutil.copyfileobj(source, target)
+        segment.unlink()
+        self._prune()
+
+    def _prune(self) -> None:
+        segments = sorted(
+            self.path.parent.glob(f"{self.path.name}.*"),
+            key=lambda segment: segment.name
+        )
+        for segment in segments[:-self.backup_count or None]:
+            segment.unlink(missing_ok=True)
+
+    @override
+    def close(self) -> None:
+        if self._stop_flushing.is_set():
+            return
+        self._stop_flushing.set()
+        with self.lock:
+            if self._buffer:
+                self._write_batch()
+            os.close(self._fd)
+        if self._compressor is not None:
+            self._compressor.shutdown(wait=True)
+        super().close()
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    A QueueHandler for a bounded queue that never blocks or raises when the
+    listener falls behind. Once the queue is `high_watermark` full, records
+    below WARNING are sampled (1 in `sample_rate` is kept), and anything
+    that still doesn't fit is dropped and counted in `dropped`.
+    """
+    def __init__(
+        self,
+        queue: queue.Queue,
+        high_watermark: float = 0.8,
+        sample_rate: int = 10,
+    ):
+        super().__init__(queue)
+        self.sample_rate = sample_rate
+        self.dropped = 0
+        self._sampled = 0
+        maxsize = getattr(queue, "maxsize", 0)
+        self._high_watermark = int(maxsize * high_watermark) if maxsize > 0 else None
+
+    @override
+    def emit(self, record: logging.LogRecord) -> None:
+        # Decide before prepare() so dropped records are never formatted.
+        if (
+            self._high_watermark is not None
+            and record.levelno < logging.WARNING
+            and self.queue.qsize() >= self._high_watermark
+        ):
+            self._sampled += 1
+            if self._sampled % self.sample_rate:
+                self.dropped += 1
+                return
+        super().emit(record)
+
+    @override
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
@@ -1,7 +1,13 @@
 import datetime as dt
 import json
 import logging
-from typing import override
+from operator import attrgetter
+from typing import Any, Callable, override
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 LOG_RECORD_BUILTIN_ATTRS = {
     "args",
@@ -72,6 +78,95 @@ class MyJSONFormatter(logging.Formatter):
         return message
 
 
+def _stdlib_dumps(message: dict[str, Any]) -> str:
+    return json.dumps(message, default=str)
+
+
+def _orjson_dumps(message: dict[str, Any]) -> str:
+    try:
+        return orjson.dumps(
+            message, default=str, option=orjson.OPT_NON_STR_KEYS
+        ).decode("utf-8")
+    except TypeError:
+        # e.g. integers past 64 bits, which the stdlib writes as they are.
+        return _stdlib_dumps(message)
+
+
+SERIALIZERS: dict[str, Callable[[dict[str, Any]], str]] = {
+    "json": _stdlib_dumps,
+    "orjson": _orjson_dumps,
+}
+
+
+class FastJSONFormatter(MyJSONFormatter):
+    """
+    Produces the same fields as MyJSONFormatter with less work per record:
+    the key mapping is resolved into getters once, the timestamp is cached
+    per second (only the milliseconds change within a second), and the
+    serializer is pluggable. `serializer="auto"` uses orjson when installed.
+    """
+    def __init__(
+        self,
+        *,
+        fmt_keys: dict[str, str] | None = None,
+        serializer: str = "auto",
+    ):
+        super().__init__(fmt_keys=fmt_keys)
+        if serializer == "auto":
+            serializer = "orjson" if orjson is not None else "json"
+        if serializer == "orjson" and orjson is None:
+            raise ValueError("The orjson serializer needs the orjson package.")
+        self._dumps = SERIALIZERS[serializer]
+
+        computed = {
+            "message": logging.LogRecord.getMessage,
+            "timestamp": self._timestamp,
+        }
+        self._getters = tuple(
+            (key, computed.get(val) or attrgetter(val))
+            for key, val in self.fmt_keys.items()
+        )
+        mapped = set(self.fmt_keys.values())
+        self._unmapped = tuple(
+            (name, getter) for name, getter in computed.items()
+            if name not in mapped
+        )
+        self._timestamp_cache: tuple[int, str] = (-1, "")
+
+    def _timestamp(self, record: logging.LogRecord) -> str:
+        second = int(record.created)
+        cached_second, prefix = self._timestamp_cache
+        if second != cached_second:
+            prefix = dt.datetime.fromtimestamp(
+                second, tz=dt.timezone.utc
+            ).strftime("%Y-%m-%dT%H:%M:%S")
+            self._timestamp_cache = (second, prefix)
+        return f"{prefix}.{int(record.msecs):03d}+00:00"
+
+    @override
+    def format(self, record: logging.LogRecord) -> str:
+        return self._dumps(self._prepare_log_dict(record))
+
+    @override
+    def _prepare_log_dict(self, record: logging.LogRecord):
+        message = {key: getter(record) for key, getter in self._getters}
+        for name, getter in self._unmapped:
+            message[name] = getter(record)
+
+        if record.exc_info is not None:
+            message["exc_info"] = self.formatException(record.exc_info)
+
+        if record.stack_info is not None:
+            message["stack_info"] = self.formatStack(record.stack_info)
+
+        record_dict = record.__dict__
+        # Sorted so lines from the same call site list extras in one order.
+        for key in sorted(record_dict.keys() - LOG_RECORD_BUILTIN_ATTRS):
+            message[key] = record_dict[key]
+
+        return message
+
+
 class NonErrorFilter(logging.Filter):
     @override
     def filter(self, record: logging.LogRecord) -> bool | logging.LogRecord:
@@ -0,0 +1,63 @@
+import logging
+from contextvars import ContextVar, Token
+from typing import override
+
+# Per-request threshold set by middleware.log_control. None means the
+# logger's own level applies.
+_level_override: ContextVar[int | None] = ContextVar("log_level_override", default=None)
+
+
+def set_request_log_level(level: int) -> Token:
+    return _level_override.set(level)
+
+
+def reset_request_log_level(token: Token) -> None:
+    _level_override.reset(token)
+
+
+class SamplingLogger(logging.Logger):
+    """
+    A Logger that honours the current request's log level override in
+    isEnabledFor, which runs before a record is built. Requests that were
+    sampled out skip INFO and DEBUG calls entirely, and forced requests log
+    everything down to DEBUG.
+    """
+    @override
+    def isEnabledFor(self, level: int) -> bool:
+        override = _level_override.get()
+        if override is not None and not self.disabled:
+            # Forced requests lower the threshold; sampled-out ones raise it.
+            if override <= logging.DEBUG:
+                return level >= override
+            if level < override:
+                return False
+        return super().isEnabledFor(level)
+
+
+class LogSampler:
+    """
+    Keeps 1 in N requests per route at full verbosity. `route_rates` maps
+    "METHOD /path/{template}" to its N; other routes use `default_rate`.
+    A rate of 1 keeps every request.
+    """
+    def __init__(
+        self,
+        default_rate: int = 1,
+        route_rates: dict[str, int] | None = None,
+    ):
+        self.default_rate = default_rate
+        self.route_rates = route_rates or {}
+        self._counters: dict[str, int] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.default_rate > 1 or any(rate > 1 for rate in self.route_rates.values())
+
+    def keep(self, route: str) -> bool:
+        rate = self.route_rates.get(route, self.default_rate)
+        if rate <= 1:
+            return True
+
+        count = self._counters.get(route, 0)
+        self._counters[route] = count + 1
+        return count % rate == 0
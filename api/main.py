@@ -1,18 +1,44 @@
 import atexit
+import asyncio
 import json
 import logging
+import logging.config
+from contextlib import asynccontextmanager
 from pathlib import Path
 
 from fastapi import FastAPI, status, Request
 from fastapi.responses import JSONResponse
 
-from controllers import login_router, journal_router
+from logging_configs.sampling import SamplingLogger
+
+# Must run before any module calls logging.getLogger("journal"), so the
+# journal logger can skip sampled-out calls before building a record.
+logging.setLoggerClass(SamplingLogger)
+
+from controllers import login_router, journal_router, metrics_router
 from logging_configs import mylogger
+from middleware.log_control import LogControlMiddleware
+from middleware.metrics import MetricsMiddleware
+from middleware.profiling import ProfilingMiddleware
+from middleware.rate_limit import RateLimitMiddleware
+from repositories.factory import open_repositories
+from services.entry_cache import InMemoryEntryCache
+from services.export_service import ExportService
+from services.password_hasher import PasswordHasher
+from services.search_index import InMemorySearchIndex
+from services.single_flight import SingleFlight
+from services.token_service import TokenVerifier
+from utils.metrics import REGISTRY, watch_event_loop_lag
 from exceptions import (
     EntryNotFoundError,
+    EntryConflictError,
     WeakPassword, 
     IncorrectCredentials, 
-    UserAlreadyExists
+    UserAlreadyExists,
+    ServiceOverloaded,
+    InvalidCursor,
+    ExportNotFound,
+    ExportNotReady
 )
 
 
@@ -42,7 +68,71 @@ setup_logging()
 logger = logging.getLogger("journal")
 logger.info("Opening Journal")
 
-app = FastAPI()
+
+def register_state_metrics(app: FastAPI) -> None:
+    """Exposes figures the app state already counts, read at scrape time."""
+    state = app.state
+    REGISTRY.gauge(
+        "bcrypt_in_flight",
+        "bcrypt calls running or waiting for a worker thread.",
+        callback=lambda: {(): state.password_hasher.in_flight}
+    )
+    REGISTRY.counter(
+        "entry_cache_events",
+        "Entry cache hits, misses and evictions.",
+        ("event",),
+        callback=lambda: {
+            (event,): count
+            for event, count in state.entry_cache.stats().items()
+            if event != "size"
+        }
+    )
+    REGISTRY.gauge(
+        "entry_cache_size",
+        "Entries currently held in the entry cache.",
+        callback=lambda: {(): state.entry_cache.stats().get("size", 0)}
+    )
+
+    queue_handler = logging.getHandlerByName("queue_handler")
+    if queue_handler is not None:
+        REGISTRY.counter(
+            "log_records_dropped",
+            "Log records dropped because the log queue was full.",
+            callback=lambda: {(): getattr(queue_handler, "dropped", 0)}
+        )
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    async with open_repositories() as repositories:
+        app.state.entry_db = repositories.entries
+        app.state.user_db = repositories.users
+        app.state.stats_db = repositories.stats
+        app.state.entry_cache = InMemoryEntryCache()
+        app.state.search_index = InMemorySearchIndex()
+        app.state.single_flight = SingleFlight()
+        app.state.password_hasher = PasswordHasher()
+        app.state.token_verifier = TokenVerifier()
+        app.state.export_service = ExportService(repositories.entries)
+        await app.state.export_service.start()
+        register_state_metrics(app)
+        lag_watcher = asyncio.create_task(watch_event_loop_lag())
+        try:
+            yield
+        finally:
+            lag_watcher.cancel()
+            app.state.export_service.shutdown()
+            app.state.password_hasher.shutdown()
+    logger.info("Closing Journal")
+
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(LogControlMiddleware)
+app.add_middleware(ProfilingMiddleware)
+# Rejects over-budget requests before logging or profiling them.
+app.add_middleware(RateLimitMiddleware)
+# Added last so it is outermost and times the whole middleware stack.
+app.add_middleware(MetricsMiddleware)
 
 @app.exception_handler(EntryNotFoundError)
 async def not_found_handler(request: Request, exc: EntryNotFoundError):
@@ -51,6 +141,27 @@ async def not_found_handler(request: Request, exc: EntryNotFoundError):
         content={"message": str(exc)},
     )
 
+@app.exception_handler(EntryConflictError)
+async def conflict_handler(request: Request, exc: EntryConflictError):
+    return JSONResponse(
+        status_code=status.HTTP_412_PRECONDITION_FAILED,
+        content={"message": str(exc)},
+    )
+
+@app.exception_handler(ExportNotFound)
+async def export_not_found_handler(request: Request, exc: ExportNotFound):
+    return JSONResponse(
+        status_code=status.HTTP_404_NOT_FOUND,
+        content={"message": str(exc)},
+    )
+
+@app.exception_handler(ExportNotReady)
+async def export_not_ready_handler(request: Request, exc: ExportNotReady):
+    return JSONResponse(
+        status_code=status.HTTP_409_CONFLICT,
+        content={"message": str(exc)},
+    )
+
 @app.exception_handler(WeakPassword)
 async def weak_password_handler(request: Request, exc: WeakPassword):
     return JSONResponse(
@@ -58,6 +169,13 @@ async def weak_password_handler(request: Request, exc: WeakPassword):
         content={"message": str(exc)}
     )
 
+@app.exception_handler(InvalidCursor)
+async def invalid_cursor_handler(request: Request, exc: InvalidCursor):
+    return JSONResponse(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        content={"message": str(exc)}
+    )
+
 @app.exception_handler(IncorrectCredentials)
 async def incorrect_authentication_handler(
         request: Request, 
@@ -75,6 +193,14 @@ async def taken_username_handler(request: Request, exc: UserAlreadyExists):
         content={"message": str(exc)}
     )
 
+@app.exception_handler(ServiceOverloaded)
+async def overloaded_handler(request: Request, exc: ServiceOverloaded):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"message": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
 @app.exception_handler(Exception)
 async def unexpected_error_handler(request: Request, exc: Exception):
     logger.error("Something unexpected happened: %s", exc, exc_info=True)
@@ -86,4 +212,5 @@ async def unexpected_error_handler(request: Request, exc: Exception):
 
 
 app.include_router(login_router.router)
-app.include_router(journal_router.router)
\ No newline at end of file
+app.include_router(journal_router.router)
+app.include_router(metrics_router.router)
\ No newline at end of file
@@ -0,0 +1,79 @@
+import os
+import hmac
+import logging
+
+from dotenv import load_dotenv
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from logging_configs.sampling import (
+    LogSampler,
+    set_request_log_level,
+    reset_request_log_level
+)
+from middleware.routing import route_template
+
+load_dotenv()
+logger = logging.getLogger("journal")
+
+LOG_SAMPLE_RATE = int(os.getenv("LOG_SAMPLE_RATE", "1"))
+# e.g. "GET /users/me/entries/all=10;GET /users/me/entries/{entry_id}=20"
+LOG_SAMPLE_ROUTE_RATES = os.getenv("LOG_SAMPLE_ROUTE_RATES", "")
+LOG_FORCE_HEADER = os.getenv("LOG_FORCE_HEADER", "X-Force-Logging")
+LOG_FORCE_TOKEN = os.getenv("LOG_FORCE_TOKEN")
+
+
+def parse_route_rates(spec: str) -> dict[str, int]:
+    rates = {}
+    for item in filter(None, (part.strip() for part in spec.split(";"))):
+        route, _, rate = item.rpartition("=")
+        rates[route.strip()] = int(rate)
+    return rates
+
+
+class LogControlMiddleware:
+    """
+    Picks each request's log verbosity before it runs. Sampled-out requests
+    only log WARNING and above. A request carrying the force header with
+    LOG_FORCE_TOKEN logs everything down to DEBUG. Without sampling or a
+    token configured, requests pass straight through.
+    """
+    def __init__(
+        self,
+        app: ASGIApp,
+        sampler: LogSampler | None = None,
+        force_header: str = LOG_FORCE_HEADER,
+        force_token: str | None = LOG_FORCE_TOKEN
+    ) -> None:
+        self.app = app
+        self.sampler = sampler or LogSampler(
+            LOG_SAMPLE_RATE,
+            parse_route_rates(LOG_SAMPLE_ROUTE_RATES)
+        )
+        self.force_header = force_header.lower().encode("latin-1")
+        self.force_token = force_token.encode("latin-1") if force_token else None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        level = self._request_level(scope)
+        if level is None:
+            await self.app(scope, receive, send)
+            return
+
+        token = set_request_log_level(level)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            reset_request_log_level(token)
+
+    def _request_level(self, scope: Scope) -> int | None:
+        if self.force_token is not None:
+            for name, value in scope["headers"]:
+                if name == self.force_header and hmac.compare_digest(value, self.force_token):
+                    return logging.DEBUG
+
+        if self.sampler.enabled and not self.sampler.keep(route_template(scope)):
+            return logging.WARNING
+        return None
@@ -0,0 +1,50 @@
+from time import perf_counter
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from middleware.routing import route_template
+from utils.metrics import REGISTRY
+
+HTTP_DURATION = REGISTRY.histogram(
+    "http_request_duration_seconds",
+    "Latency of HTTP requests until the response is complete.",
+    ("method", "route", "status")
+)
+HTTP_IN_FLIGHT = REGISTRY.gauge(
+    "http_requests_in_flight",
+    "HTTP requests currently being handled."
+)
+
+
+class MetricsMiddleware:
+    """
+    Records request latency by route template and status code, and the
+    number of requests in flight.
+    """
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        start = perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            HTTP_DURATION.labels(
+                scope["method"],
+                route_template(scope),
+                str(status_code)
+            ).observe(perf_counter() - start)
@@ -0,0 +1,95 @@
+import os
+import hmac
+import asyncio
+import logging
+from collections import Counter
+from time import perf_counter
+
+from dotenv import load_dotenv
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from middleware.routing import route_template
+from utils.profiler import ProfileRing, TaskSampler
+
+load_dotenv()
+logger = logging.getLogger("journal")
+
+# Profile 1 in N requests per route. 0 turns sampling off.
+PROFILE_SAMPLE_RATE = int(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_HEADER = os.getenv("PROFILE_HEADER", "X-Profile")
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN")
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "200"))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+
+
+class ProfilingMiddleware:
+    """
+    Profiles selected requests with a sampling profiler and saves one
+    collapsed-stack file per request in a bounded ring on disk (see
+    scripts/profile_report). A request is profiled when it carries the
+    profile header with PROFILE_TOKEN, or 1 in PROFILE_SAMPLE_RATE
+    requests per route. With neither configured, requests pass straight
+    through.
+    """
+    def __init__(
+        self,
+        app: ASGIApp,
+        sample_rate: int = PROFILE_SAMPLE_RATE,
+        header: str = PROFILE_HEADER,
+        token: str | None = PROFILE_TOKEN,
+        ring: ProfileRing | None = None,
+        sampler: TaskSampler | None = None
+    ) -> None:
+        self.app = app
+        self.sample_rate = sample_rate
+        self.header = header.lower().encode("latin-1")
+        self.token = token.encode("latin-1") if token else None
+        self.ring = ring or ProfileRing(PROFILE_DIR, PROFILE_MAX_FILES)
+        self.sampler = sampler or TaskSampler(PROFILE_INTERVAL_MS / 1000)
+        self._counters: dict[str, int] = {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self._should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        session = self.sampler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = perf_counter() - session.started
+            stacks = self.sampler.stop(session)
+            # The response has been sent; write the file off the event loop.
+            asyncio.get_running_loop().run_in_executor(
+                None, self._save, route_template(scope), status_code, duration, stacks
+            )
+
+    def _should_profile(self, scope: Scope) -> bool:
+        if self.token is not None:
+            for name, value in scope["headers"]:
+                if name == self.header and hmac.compare_digest(value, self.token):
+                    return True
+
+        if self.sample_rate <= 0:
+            return False
+        route = route_template(scope)
+        count = self._counters.get(route, 0)
+        self._counters[route] = count + 1
+        return count % self.sample_rate == 0
+
+    def _save(self, route: str, status_code: int, duration: float, stacks: Counter) -> None:
+        try:
+            path = self.ring.write(route, status_code, duration, stacks)
+        except OSError as e:
+            logger.warning("Couldn't save request profile: %s", e)
+            return
+        logger.debug("Saved profile of %s to %s", route, path)
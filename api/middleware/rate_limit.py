@@ -0,0 +1,134 @@
+import os
+import math
+from dataclasses import dataclass
+
+from dotenv import load_dotenv
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from exceptions import IncorrectCredentials
+from middleware.routing import route_template
+from services.rate_limiter import InMemoryRateLimitStore, RateLimitStore
+from utils.metrics import REGISTRY
+
+load_dotenv()
+
+# 0 turns a limit off.
+RATE_LIMIT_AUTH_PER_MINUTE = float(os.getenv("RATE_LIMIT_AUTH_PER_MINUTE", "20"))
+RATE_LIMIT_AUTH_BURST = int(os.getenv("RATE_LIMIT_AUTH_BURST", "5"))
+RATE_LIMIT_ENTRIES_PER_MINUTE = float(os.getenv("RATE_LIMIT_ENTRIES_PER_MINUTE", "600"))
+RATE_LIMIT_ENTRIES_BURST = int(os.getenv("RATE_LIMIT_ENTRIES_BURST", "60"))
+RATE_LIMIT_MAX_IN_FLIGHT = int(os.getenv("RATE_LIMIT_MAX_IN_FLIGHT", "8"))
+
+# Both run bcrypt, so they share one budget per client.
+AUTH_ROUTES = frozenset({"POST /user/me/token", "POST /user/me/register"})
+ENTRY_ROUTE_PREFIX = "/users/me/entries"
+
+RATE_LIMITED = REGISTRY.counter(
+    "http_rate_limited",
+    "Requests rejected with 429 by the rate limiter.",
+    ("group", "reason")
+)
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    per_minute: float
+    burst: int
+
+    @property
+    def enabled(self) -> bool:
+        return self.per_minute > 0 and self.burst > 0
+
+
+class RateLimitMiddleware:
+    """
+    Gives each client a token bucket for the auth routes and another for
+    the entry routes, and caps the entry requests a client has in flight.
+    Clients are keyed by the `sub` of a valid access token, otherwise by
+    IP address. Requests over budget get 429 with Retry-After before any
+    other work is done; other routes pass straight through.
+    """
+    def __init__(
+        self,
+        app: ASGIApp,
+        store: RateLimitStore | None = None,
+        auth_limit: RateLimit = RateLimit(RATE_LIMIT_AUTH_PER_MINUTE, RATE_LIMIT_AUTH_BURST),
+        entry_limit: RateLimit = RateLimit(
+            RATE_LIMIT_ENTRIES_PER_MINUTE,
+            RATE_LIMIT_ENTRIES_BURST
+        ),
+        max_in_flight: int = RATE_LIMIT_MAX_IN_FLIGHT
+    ) -> None:
+        self.app = app
+        self.store = store or InMemoryRateLimitStore()
+        self.auth_limit = auth_limit
+        self.entry_limit = entry_limit
+        self.max_in_flight = max_in_flight
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        template = route_template(scope)
+        if template in AUTH_ROUTES:
+            # The bcrypt pool already bounds how many hashes run at once.
+            group, limit, max_in_flight = "auth", self.auth_limit, 0
+        elif template.partition(" ")[2].startswith(ENTRY_ROUTE_PREFIX):
+            group, limit, max_in_flight = "entries", self.entry_limit, self.max_in_flight
+        else:
+            group, limit, max_in_flight = None, None, 0
+        if limit is None or not (limit.enabled or max_in_flight > 0):
+            await self.app(scope, receive, send)
+            return
+
+        client = _client_key(scope)
+        if limit.enabled:
+            wait = await self.store.take(f"{group}:{client}", limit.per_minute / 60, limit.burst)
+            if wait:
+                RATE_LIMITED.labels(group, "rate").inc()
+                await _too_many_requests(scope, receive, send, wait)
+                return
+
+        if max_in_flight <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        if not await self.store.acquire(client, max_in_flight):
+            RATE_LIMITED.labels(group, "in_flight").inc()
+            await _too_many_requests(scope, receive, send, 1)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            await self.store.release(client)
+
+
+def _client_key(scope: Scope) -> str:
+    verifier = getattr(scope["app"].state, "token_verifier", None)
+    if verifier is not None:
+        for name, value in scope["headers"]:
+            if name == b"authorization":
+                scheme, _, token = value.decode("latin-1").partition(" ")
+                if scheme.lower() == "bearer" and token:
+                    try:
+                        # Cached after the first request with this token. A
+                        # bad token is logged by the route that rejects it.
+                        user_id = verifier.verify(token, log_failures=False)
+                        return f"user:{user_id}"
+                    except IncorrectCredentials:
+                        pass
+                break
+
+    client = scope.get("client")
+    return f"ip:{client[0] if client else 'unknown'}"
+
+
+async def _too_many_requests(scope: Scope, receive: Receive, send: Send, wait: float) -> None:
+    response = JSONResponse(
+        status_code=429,
+        content={"message": "Too many requests. Please try again shortly."},
+        headers={"Retry-After": str(max(1, math.ceil(wait)))}
+    )
+    await response(scope, receive, send)
@@ -0,0 +1,37 @@
+from typing import Iterable, Optional
+
+from starlette.routing import BaseRoute, Match
+from starlette.types import Scope
+
+_SCOPE_KEY = "journal.route_template"
+
+
+def route_template(scope: Scope) -> str:
+    """
+    Resolves the route template for a request, e.g.
+    "GET /users/me/entries/{entry_id}", so all entry ids share one key.
+    The result is kept on the scope, so middlewares share one lookup.
+    """
+    template = scope.get(_SCOPE_KEY)
+    if template is None:
+        path = _match(scope["app"].routes, scope)
+        template = scope[_SCOPE_KEY] = (
+            f"{scope['method']} {path}" if path is not None else "UNMATCHED"
+        )
+    return template
+
+
+def _match(routes: Iterable[BaseRoute], scope: Scope) -> Optional[str]:
+    for route in routes:
+        candidates = getattr(route, "effective_candidates", None)
+        if candidates is not None:
+            # Newer FastAPI versions keep an included router as one route;
+            # its candidates carry the prefixed paths.
+            path = _match(candidates(), scope)
+            if path is not None:
+                return path
+            continue
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+    return None
@@ -1,7 +1,20 @@
 import uuid
 from datetime import datetime
-from pydantic import BaseModel, Field
-from typing import Optional, Annotated
+from pydantic import BaseModel, Field, model_validator
+from typing import Any, Dict, Optional, Annotated, List
+
+from utils.timestamps import created_timestamp
+
+MAX_BULK_SIZE = 1000
+
+
+def new_entry_id() -> str:
+    return str(uuid.uuid4())
+
+
+def now() -> str:
+    return datetime.now().isoformat("#", "seconds")
+
 
 class InputEntry(BaseModel):
     work: Annotated[str, Field(
@@ -22,14 +35,65 @@ class InputEntry(BaseModel):
 
 class EnrichedEntry(InputEntry):
     id: Annotated[str, Field(
-        default_factory= lambda: str(uuid.uuid4()),
+        default_factory=new_entry_id,
         description="Unique identifier for the entry."
     )]
     created_at: Annotated[Optional[str], Field(
-        default_factory= lambda: datetime.now().isoformat("#", "seconds"),
+        default_factory=now,
         description= "Date this entry was created."
     )]
     updated_at: Annotated[Optional[str], Field(
-        default= "None",
+        default=None,
         description="Date this entry was last modified."
+    )]
+    created_ts: Annotated[Optional[int], Field(
+        default=None,
+        description="created_at in Unix seconds, for range queries and sorting."
+    )]
+    updated_ts: Annotated[Optional[int], Field(
+        default=None,
+        description="updated_at in Unix seconds, for sorting."
+    )]
+
+    @model_validator(mode="after")
+    def fill_timestamps(self) -> "EnrichedEntry":
+        if self.created_ts is None:
+            self.created_ts = created_timestamp(self.created_at)
+        if self.updated_ts is None:
+            self.updated_ts = created_timestamp(self.updated_at)
+        return self
+
+    @classmethod
+    def new_document(cls, entry: InputEntry) -> Dict[str, Any]:
+        """
+        The document stored for a new entry. The input is already
+        validated, so only the generated fields are filled in, without
+        building and dumping the model again.
+        """
+        created_at = now()
+        return {
+            **entry.model_dump(),
+            "id": new_entry_id(),
+            "created_at": created_at,
+            "updated_at": None,
+            "created_ts": created_timestamp(created_at),
+            "updated_ts": None,
+        }
+
+
+# Fields of the full entries returned by the API.
+ENTRY_FIELDS = tuple(EnrichedEntry.model_fields)
+
+# Fields of the entry summaries returned by the list endpoints.
+SUMMARY_FIELDS = tuple(
+    name for name in EnrichedEntry.model_fields
+    if name not in ("created_at", "updated_at", "created_ts", "updated_ts")
+)
+
+class BulkDeleteRequest(BaseModel):
+    ids: Annotated[List[str], Field(
+        ...,
+        min_length=1,
+        max_length=MAX_BULK_SIZE,
+        description="IDs of the entries to delete."
     )]
\ No newline at end of file
@@ -0,0 +1,96 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from time import perf_counter
+from typing import Iterator, List, Optional
+
+from azure.cosmos.exceptions import CosmosHttpResponseError
+
+from utils.metrics import REGISTRY
+
+COSMOS_DURATION = REGISTRY.histogram(
+    "cosmos_operation_duration_seconds",
+    "Latency of repository methods backed by Cosmos DB.",
+    ("operation", "status")
+)
+COSMOS_REQUEST_UNITS = REGISTRY.histogram(
+    "cosmos_operation_request_units",
+    "Request units (x-ms-request-charge) consumed per repository method call.",
+    ("operation",),
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+)
+COSMOS_UNATTRIBUTED_REQUEST_UNITS = REGISTRY.counter(
+    "cosmos_unattributed_request_units",
+    "Request units charged outside an instrumented method, e.g. provisioning "
+    "or streamed reads."
+)
+
+# The charge accumulator of the repository method running in this task. A
+# query can span several pages, so each response adds its charge to it.
+_request_charge: ContextVar[Optional[List[float]]] = ContextVar(
+    "cosmos_request_charge",
+    default=None
+)
+
+
+def record_request_charge(pipeline_response) -> None:
+    """
+    raw_response_hook for the Cosmos client. Runs for every HTTP response
+    the SDK receives and charges it to the current repository method.
+    """
+    charge = pipeline_response.http_response.headers.get("x-ms-request-charge")
+    if charge:
+        add_request_charge(float(charge))
+
+
+def add_request_charge(charge: float) -> None:
+    """Charges request units to the current repository method."""
+    accumulator = _request_charge.get()
+    if accumulator is not None:
+        accumulator[0] += charge
+    else:
+        COSMOS_UNATTRIBUTED_REQUEST_UNITS.inc(charge)
+
+
+@contextmanager
+def track_request_charge() -> Iterator[List[float]]:
+    """
+    Collects the request units charged inside the block, then adds them to
+    the enclosing block's total, if any.
+    """
+    charge = [0.0]
+    token = _request_charge.set(charge)
+    try:
+        yield charge
+    finally:
+        _request_charge.reset(token)
+        parent = _request_charge.get()
+        if parent is not None:
+            parent[0] += charge[0]
+
+
+def instrument_cosmos_call(func):
+    """
+    Records the latency and request charge of a repository method, labelled
+    with the method name. A method that calls another instrumented method
+    includes its charge.
+    """
+    operation = func.__name__
+
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        status = "ok"
+        start = perf_counter()
+        with track_request_charge() as charge:
+            try:
+                return await func(*args, **kwargs)
+            except CosmosHttpResponseError as e:
+                status = str(e.status_code)
+                raise
+            except Exception:
+                status = "error"
+                raise
+            finally:
+                COSMOS_DURATION.labels(operation, status).observe(perf_counter() - start)
+                COSMOS_REQUEST_UNITS.labels(operation).observe(charge[0])
+    return wrapper
@@ -1,14 +1,44 @@
 import os
 import logging
-from typing import Dict, Any, List
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, Any, List, AsyncIterator, Optional, Sequence, Tuple
 
+import aiohttp
+from azure.core import MatchConditions
+from azure.core.async_paging import AsyncItemPaged
+from azure.core.pipeline.transport import AioHttpTransport
+from azure.cosmos.documents import ConnectionPolicy, RetryOptions
 from azure.cosmos.partition_key import PartitionKey
 from dotenv import load_dotenv
-from azure.cosmos.aio import CosmosClient
+from azure.cosmos.aio import CosmosClient, ContainerProxy
+from azure.cosmos.exceptions import (
+    CosmosAccessConditionFailedError,
+    CosmosBatchOperationError,
+    CosmosHttpResponseError,
+    CosmosResourceExistsError,
+    CosmosResourceNotFoundError
+)
 
+from exceptions import InvalidCursor
 from models.user import UserInDB
 from utils.decorator import handle_cosmos_exception
-from repositories.interface_repository import DatabaseInterface
+from repositories.cosmos_metrics import (
+    instrument_cosmos_call,
+    record_request_charge
+)
+from repositories.resilience import (
+    IDEMPOTENT,
+    MULTI_REQUEST,
+    SINGLE_REQUEST,
+    resilient,
+    with_retries
+)
+from repositories.interface_repository import (
+    DatabaseInterface,
+    StatsDatabaseInterface,
+    UserDatabaseInterface
+)
 
 load_dotenv()
 logger = logging.getLogger("journal")
@@ -19,90 +49,670 @@ ENTRY_DB = os.getenv("ENTRY_DB")
 ENTRY_CONTAINER = os.getenv("ENTRY_CONTAINER")
 USER_DB = os.getenv("USER_DB")
 USER_CONTAINER = os.getenv("USER_CONTAINER")
+STATS_CONTAINER = os.getenv("STATS_CONTAINER", "entry_stats")
+POOL_SIZE = int(os.getenv("COSMOS_POOL_SIZE", "100"))
+PROVISION = os.getenv("COSMOS_PROVISION", "true").lower() == "true"
+# Cosmos caps a transactional batch at 100 operations and a patch at 10.
+BATCH_SIZE = 100
+PATCH_SIZE = 10
+# Until every user has a lookup document (see scripts/backfill_username_index),
+# usernames missing from the index fall back to a cross-partition query.
+# Turn it off once the backfill has run.
+USERNAME_LOOKUP_FALLBACK = (
+    os.getenv("USERNAME_LOOKUP_FALLBACK", "true").lower() == "true"
+)
 if not (URL and KEY and ENTRY_DB and ENTRY_CONTAINER and USER_DB and USER_CONTAINER):
     logger.critical("Environment variables not loaded.")
     raise ValueError("Environment variables not loaded.")
 
-class CosmosDB(DatabaseInterface):
-    def __init__(self) -> None:
-        self.client = CosmosClient(URL, {"masterKey": KEY})
-        self.db = None
-        self.container = None
-
-    @handle_cosmos_exception("establish connection to database")
-    async def __aenter__(self):
-        self.db = await self.client.create_database_if_not_exists(ENTRY_DB)
-        self.container = await self.db.create_container_if_not_exists(
-            ENTRY_CONTAINER,
-            partition_key=PartitionKey(path=["/user_id"])
+
+async def _read_page(
+        items: AsyncItemPaged,
+        continuation_token: Optional[str]
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Reads the page of a query that starts at `continuation_token`, and the
+    token of the next page, or None when there are no more items. Cosmos
+    answers a token it can't resume from with 400, which is the client's
+    fault.
+    """
+    pages = items.by_page(continuation_token)
+    try:
+        page = await anext(pages, None)
+        if page is None:
+            return [], None
+        return [item async for item in page], pages.continuation_token
+    except CosmosHttpResponseError as e:
+        if continuation_token is not None and e.status_code == 400:
+            raise InvalidCursor("Invalid pagination cursor.") from e
+        raise
+
+
+def create_cosmos_client(
+        pool_size: int = POOL_SIZE,
+        sdk_throttle_retries: bool = True
+) -> CosmosClient:
+    """
+    Builds the process-wide Cosmos client on top of a bounded connection pool.
+    It is opened and closed once by the application lifespan.
+
+    The app turns off the SDK's own 429 retries (up to 9 within 30 seconds)
+    so repositories/resilience sees each 429 and retries within its budget.
+    Scripts keep them.
+    """
+    session = aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=pool_size)
+    )
+    transport = AioHttpTransport(session=session, session_owner=True)
+    connection_policy = ConnectionPolicy()
+    if not sdk_throttle_retries:
+        connection_policy.RetryOptions = RetryOptions(max_retry_attempt_count=0)
+    logger.debug("Created Cosmos client with a pool of %s connections.", pool_size)
+    return CosmosClient(
+        URL,
+        {"masterKey": KEY},
+        transport=transport,
+        connection_policy=connection_policy,
+        raw_response_hook=record_request_charge
+    )
+
+
+# Range queries and sorting on created_ts use the composite index. The free
+# text fields are never filtered on (search has its own index), so they are
+# left out of the index to make writes cheaper.
+ENTRY_INDEXING_POLICY = {
+    "indexingMode": "consistent",
+    "automatic": True,
+    "includedPaths": [{"path": "/*"}],
+    "excludedPaths": [
+        {"path": '/"_etag"/?'},
+        {"path": "/work/?"},
+        {"path": "/struggle/?"},
+        {"path": "/intention/?"},
+    ],
+    "compositeIndexes": [
+        [
+            {"path": "/user_id", "order": "ascending"},
+            {"path": "/created_ts", "order": "ascending"},
+        ],
+    ],
+}
+
+
+@dataclass
+class CosmosContainers:
+    entries: ContainerProxy
+    users: ContainerProxy
+    stats: ContainerProxy
+
+
+@handle_cosmos_exception("provision databases and containers")
+async def provision_containers(
+        client: CosmosClient,
+        provision: bool = PROVISION
+) -> CosmosContainers:
+    """
+    Resolves the container handles once at startup. With provisioning
+    disabled, it only binds to containers that must already exist.
+    """
+    if not provision:
+        logger.info("Skipping provisioning. Binding to existing containers.")
+        return CosmosContainers(
+            entries=client.get_database_client(ENTRY_DB)
+                .get_container_client(ENTRY_CONTAINER),
+            users=client.get_database_client(USER_DB)
+                .get_container_client(USER_CONTAINER),
+            stats=client.get_database_client(ENTRY_DB)
+                .get_container_client(STATS_CONTAINER),
         )
-        logger.debug("Established connection to database.")
-        return self
 
-    async def __aexit__(self, exc_type, exc_value, traceback):
-        await self.client.close()
+    entry_db = await client.create_database_if_not_exists(ENTRY_DB)
+    entries = await entry_db.create_container_if_not_exists(
+        ENTRY_CONTAINER,
+        partition_key=PartitionKey(path=["/user_id"]),
+        indexing_policy=ENTRY_INDEXING_POLICY
+    )
+    stats = await entry_db.create_container_if_not_exists(
+        STATS_CONTAINER,
+        partition_key=PartitionKey(path=["/user_id"])
+    )
+    user_db = await client.create_database_if_not_exists(USER_DB)
+    users = await user_db.create_container_if_not_exists(
+        USER_CONTAINER,
+        partition_key=PartitionKey(path=["/id"])
+    )
+    logger.info("Provisioned databases and containers.")
+    return CosmosContainers(entries=entries, users=users, stats=stats)
+
+
+@handle_cosmos_exception("apply the entry indexing policy")
+async def apply_entry_indexing_policy(client: CosmosClient) -> None:
+    """
+    Sets ENTRY_INDEXING_POLICY on an existing entry container. Creating a
+    container only applies it to new ones. Cosmos re-indexes in the
+    background.
+    """
+    await client.get_database_client(ENTRY_DB).replace_container(
+        ENTRY_CONTAINER,
+        partition_key=PartitionKey(path=["/user_id"]),
+        indexing_policy=ENTRY_INDEXING_POLICY
+    )
+    logger.info("Applied the indexing policy to %s.", ENTRY_CONTAINER)
+
+
+USERNAME_LOOKUP_TYPE = "username"
+
+
+def username_lookup_id(username: str) -> str:
+    return f"{USERNAME_LOOKUP_TYPE}:{username}"
+
+
+class CosmosDB(DatabaseInterface):
+    def __init__(self, container: ContainerProxy) -> None:
+        self.container = container
     
     @handle_cosmos_exception(error_msg="create entry")
-    async def create_entry(self, entry_data: Dict[str, Any]) -> None:
-        """Creates a new journal entry"""
-        await self.container.upsert_item(entry_data)
+    @resilient(SINGLE_REQUEST)
+    @instrument_cosmos_call
+    async def create_entry(self, entry_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Creates a new journal entry and returns the stored document"""
+        return await self.container.upsert_item(entry_data)
         
     @handle_cosmos_exception(error_msg="retrieve all entries")
-    async def get_all_entries(self, user_id: str) -> List[Dict[str, Any]]:
-        """Gets all entries for a specific user"""
+    @resilient(IDEMPOTENT)
+    @instrument_cosmos_call
+    async def get_all_entries(
+            self,
+            user_id: str,
+            fields: Optional[Sequence[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Gets all entries for a specific user. With `fields`, Cosmos projects
+        the documents, so less is read, sent and parsed.
+        """
+        projection = ", ".join(f"c.{field}" for field in fields) if fields else "*"
         raw_entries = self.container.query_items(
-            query='SELECT * FROM c WHERE c.user_id = @user_id',
+            query=f'SELECT {projection} FROM c WHERE c.user_id = @user_id',
             parameters=[{"name": "@user_id", "value": user_id}],
             partition_key=user_id
         )
         
         return [entry async for entry in raw_entries]
+
+    @handle_cosmos_exception(error_msg="retrieve a page of entries")
+    @resilient(IDEMPOTENT)
+    @instrument_cosmos_call
+    async def get_entries_page(
+            self,
+            user_id: str,
+            limit: int,
+            continuation_token: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Gets one page of a user's entries and the continuation token for the
+        next page, or None when there are no more entries.
+        """
+        raw_entries = self.container.query_items(
+            query='SELECT * FROM c WHERE c.user_id = @user_id',
+            parameters=[{"name": "@user_id", "value": user_id}],
+            partition_key=user_id,
+            max_item_count=limit
+        )
+        return await _read_page(raw_entries, continuation_token)
+
+    @handle_cosmos_exception(error_msg="query entries by date")
+    @resilient(IDEMPOTENT)
+    @instrument_cosmos_call
+    async def query_entries(
+            self,
+            user_id: str,
+            limit: int,
+            start_ts: Optional[int] = None,
+            end_ts: Optional[int] = None,
+            descending: bool = True,
+            continuation_token: Optional[str] = None,
+            fields: Optional[Sequence[str]] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Gets one page of a user's entries created in [start_ts, end_ts),
+        sorted by created_ts. The filter and the sort run in Cosmos on the
+        (user_id, created_ts) composite index, so only matching entries
+        are read. Entries without created_ts are not returned. With
+        `fields`, Cosmos projects the documents, as in get_all_entries.
+        """
+        conditions = ["c.user_id = @user_id"]
+        parameters = [{"name": "@user_id", "value": user_id}]
+        if start_ts is not None:
+            conditions.append("c.created_ts >= @start_ts")
+            parameters.append({"name": "@start_ts", "value": start_ts})
+        if end_ts is not None:
+            conditions.append("c.created_ts < @end_ts")
+            parameters.append({"name": "@end_ts", "value": end_ts})
+        direction = "DESC" if descending else "ASC"
+        projection = ", ".join(f"c.{field}" for field in fields) if fields else "*"
+
+        raw_entries = self.container.query_items(
+            query=(
+                f'SELECT {projection} FROM c WHERE {" AND ".join(conditions)} '
+                f'ORDER BY c.user_id {direction}, c.created_ts {direction}'
+            ),
+            parameters=parameters,
+            partition_key=user_id,
+            max_item_count=limit
+        )
+        return await _read_page(raw_entries, continuation_token)
+
+    async def iter_entries(
+            self,
+            user_id: str,
+            page_size: int
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Yields a user's entries as each page arrives from the database"""
+        raw_entries = self.container.query_items(
+            query='SELECT * FROM c WHERE c.user_id = @user_id',
+            parameters=[{"name": "@user_id", "value": user_id}],
+            partition_key=user_id,
+            max_item_count=page_size
+        )
+        async for entry in raw_entries:
+            yield entry
         
+    @handle_cosmos_exception(error_msg="retrieve entry etag")
+    @resilient(IDEMPOTENT)
+    @instrument_cosmos_call
+    async def get_entry_etag(self, entry_id: str, user_id: str) -> Optional[str]:
+        """Gets an entry's _etag without reading the whole document"""
+        raw_etags = self.container.query_items(
+            query='SELECT VALUE c._etag FROM c WHERE c.id = @entry_id',
+            parameters=[{"name": "@entry_id", "value": entry_id}],
+            partition_key=user_id
+        )
+
+        etags = [etag async for etag in raw_etags]
+        return etags[0] if etags else None
+
     @handle_cosmos_exception(error_msg="retrieve entry")
+    @resilient(IDEMPOTENT)
+    @instrument_cosmos_call
     async def get_entry(self, entry_id: str, user_id: str) -> Dict[str, Any]:
         """Gets an entry by id"""
         return await self.container.read_item(entry_id, partition_key=user_id)
+
+    @handle_cosmos_exception(error_msg="retrieve entry creation dates")
+    @resilient(IDEMPOTENT)
+    @instrument_cosmos_call
+    async def get_created_at(
+            self,
+            user_id: str,
+            entry_ids: List[str]
+    ) -> Dict[str, str]:
+        """Gets the created_at of each existing entry, by id"""
+        raw_entries = self.container.query_items(
+            query=(
+                'SELECT c.id, c.created_at FROM c '
+                'WHERE ARRAY_CONTAINS(@entry_ids, c.id)'
+            ),
+            parameters=[{"name": "@entry_ids", "value": entry_ids}],
+            partition_key=user_id
+        )
+
+        return {entry["id"]: entry["created_at"] async for entry in raw_entries}
     
     @handle_cosmos_exception(error_msg="update entry")
+    @resilient(SINGLE_REQUEST)
+    @instrument_cosmos_call
     async def update_entry(
             self, 
             entry_id: str, 
-            updated_data: Dict[str, Any]
-    ) -> None:
-        """Updates an entry"""
-        await self.container.replace_item(entry_id, updated_data)
+            user_id: str,
+            updated_fields: Dict[str, Any],
+            etag: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Sets only the given fields in one partial update and returns the
+        stored document. With an etag, the update fails with 412 if the
+        entry changed since that etag was issued.
+        """
+        patch_operations = [
+            {"op": "set", "path": f"/{field}", "value": value}
+            for field, value in updated_fields.items()
+        ]
+        conditions = {}
+        if etag is not None:
+            conditions = {"etag": etag, "match_condition": MatchConditions.IfNotModified}
+
+        return await self.container.patch_item(
+            entry_id,
+            partition_key=user_id,
+            patch_operations=patch_operations,
+            **conditions
+        )
+
+    async def _execute_batches(
+            self,
+            user_id: str,
+            item_ids: List[str],
+            operations: List[Tuple[str, Tuple[Any, ...]]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Runs operations as transactional batches within the user's partition
+        and reports a status code per item. A batch is all-or-nothing, so
+        when one operation fails the rest of its batch report 424.
+        """
+        results = []
+        for start in range(0, len(operations), BATCH_SIZE):
+            batch = operations[start:start + BATCH_SIZE]
+            try:
+                # A throttled batch wasn't applied, so it can be sent again.
+                responses = await with_retries(
+                    "execute_item_batch",
+                    lambda: self.container.execute_item_batch(
+                        batch_operations=batch,
+                        partition_key=user_id
+                    ),
+                    idempotent=False
+                )
+            except CosmosBatchOperationError as e:
+                logger.warning(
+                    "Batch for %s failed at operation %s: %s",
+                    user_id,
+                    start + e.error_index,
+                    e.message
+                )
+                responses = e.operation_responses
+
+            results.extend(
+                {"id": item_id, "status_code": response.get("statusCode")}
+                for item_id, response in zip(item_ids[start:], responses)
+            )
+        return results
 
-    async def delete_all_entries(self) -> None:
-        pass
+    @handle_cosmos_exception(error_msg="create entries in bulk")
+    @resilient(MULTI_REQUEST)
+    @instrument_cosmos_call
+    async def create_entries(
+            self,
+            user_id: str,
+            entries: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """Creates many entries in a user's partition"""
+        return await self._execute_batches(
+            user_id,
+            [entry["id"] for entry in entries],
+            [("create", (entry,)) for entry in entries]
+        )
+
+    @handle_cosmos_exception(error_msg="delete entries in bulk")
+    @resilient(MULTI_REQUEST)
+    @instrument_cosmos_call
+    async def delete_entries(
+            self,
+            user_id: str,
+            entry_ids: List[str]
+    ) -> List[Dict[str, Any]]:
+        """Deletes many entries from a user's partition"""
+        return await self._execute_batches(
+            user_id,
+            entry_ids,
+            [("delete", (entry_id,)) for entry_id in entry_ids]
+        )
+
+    @handle_cosmos_exception(error_msg="delete all entries")
+    @resilient(MULTI_REQUEST)
+    @instrument_cosmos_call
+    async def delete_all_entries(self, user_id: str) -> List[Dict[str, Any]]:
+        """
+        Deletes every entry in a user's partition and reports a status code
+        per entry, as delete_entries does.
+        """
+        async def read_ids() -> List[str]:
+            raw_ids = self.container.query_items(
+                query='SELECT VALUE c.id FROM c WHERE c.user_id = @user_id',
+                parameters=[{"name": "@user_id", "value": user_id}],
+                partition_key=user_id
+            )
+            return [entry_id async for entry_id in raw_ids]
+
+        entry_ids = await with_retries("read_entry_ids", read_ids, idempotent=True)
+
+        return await self.delete_entries(user_id, entry_ids)
     
     @handle_cosmos_exception(error_msg="delete entry")
+    @resilient(SINGLE_REQUEST)
+    @instrument_cosmos_call
     async def delete_entry(self, entry_id: str, user_id: str) -> None:
         """Deletes an entry"""
         await self.container.delete_item(entry_id, partition_key=user_id)
 
 
-class UserDB(CosmosDB):
-    def __init__(self):
-        super().__init__()
+class UserDB(CosmosDB, UserDatabaseInterface):
+    """
+    Each user is stored twice in the users container: the user document and
+    a lookup document whose id is derived from the username. The lookup
+    document is its own partition, so login is a single point read.
+    """
+    @staticmethod
+    def lookup_document(user_data: UserInDB) -> Dict[str, Any]:
+        lookup_id = username_lookup_id(user_data.username)
+        return {
+            "id": lookup_id,
+            "type": USERNAME_LOOKUP_TYPE,
+            "user_id": user_data.id,
+            "username": user_data.username,
+            "hashed_password": user_data.hashed_password,
+        }
 
-    @handle_cosmos_exception("establish connection to user database")
-    async def __aenter__(self):
-        self.db = await self.client.create_database_if_not_exists(USER_DB)
-        self.container = await self.db.create_container_if_not_exists(
-            USER_CONTAINER,
-            partition_key=PartitionKey(path=["/id"])
-        )
-        logger.debug("Established connection to user database.")
-        return self
-        
     @handle_cosmos_exception(error_msg="register user")
-    async def register_user(self, user_data: UserInDB) -> None:
-        await self.container.create_item(user_data.model_dump())
+    @resilient(MULTI_REQUEST)
+    @instrument_cosmos_call
+    async def register_user(self, user_data: UserInDB) -> bool:
+        """
+        Claims the username by creating its lookup document, then creates the
+        user. Returns False when the username is already claimed.
+
+        Users registered before the index have no lookup document; check
+        username_taken first, which also finds them.
+        """
+        lookup = self.lookup_document(user_data)
+        try:
+            await with_retries(
+                "create_item",
+                lambda: self.container.create_item(lookup),
+                idempotent=False
+            )
+        except CosmosResourceExistsError:
+            return False
+
+        try:
+            await with_retries(
+                "create_item",
+                lambda: self.container.create_item(user_data.model_dump()),
+                idempotent=False
+            )
+        except CosmosHttpResponseError:
+            # Release the username so a retry can claim it again.
+            await with_retries(
+                "delete_item",
+                lambda: self.container.delete_item(lookup["id"], partition_key=lookup["id"]),
+                idempotent=False
+            )
+            raise
+        return True
+
+    @handle_cosmos_exception(error_msg="add username to index")
+    @resilient(SINGLE_REQUEST)
+    @instrument_cosmos_call
+    async def index_username(self, user_data: UserInDB) -> bool:
+        """Creates a missing lookup document. Returns False if one exists."""
+        try:
+            await self.container.create_item(self.lookup_document(user_data))
+        except CosmosResourceExistsError:
+            return False
+        return True
     
+    @handle_cosmos_exception(error_msg="check username")
+    @resilient(IDEMPOTENT)
+    @instrument_cosmos_call
+    async def username_taken(self, username: str) -> bool:
+        """
+        Point-reads the username's lookup document. While
+        USERNAME_LOOKUP_FALLBACK is on, usernames missing from the index
+        are also queried, since users registered before it have none.
+        """
+        lookup_id = username_lookup_id(username)
+        try:
+            await self.container.read_item(lookup_id, partition_key=lookup_id)
+        except CosmosResourceNotFoundError:
+            return USERNAME_LOOKUP_FALLBACK and bool(await self.query_user(username))
+        return True
+
+    @handle_cosmos_exception(error_msg="retrieve user")
+    @resilient(IDEMPOTENT)
+    @instrument_cosmos_call
     async def get_user(self, username: str) -> List[Dict[str, Any]]:
+        lookup_id = username_lookup_id(username)
+        try:
+            lookup = await self.container.read_item(lookup_id, partition_key=lookup_id)
+        except CosmosResourceNotFoundError:
+            if not USERNAME_LOOKUP_FALLBACK:
+                return []
+            return await self.query_user(username)
+
+        return [{
+            "id": lookup["user_id"],
+            "username": lookup["username"],
+            "hashed_password": lookup["hashed_password"],
+        }]
+
+    @instrument_cosmos_call
+    async def query_user(self, username: str) -> List[Dict[str, Any]]:
+        """Finds a user with a cross-partition query instead of the index"""
         user = self.container.query_items(
-            query='SELECT * FROM c WHERE c.username = @username', 
+            query=(
+                'SELECT * FROM c WHERE c.username = @username '
+                'AND NOT IS_DEFINED(c.type)'
+            ),
             parameters=[{"name": "@username", "value": username}]
         )
             
         return [user_detail async for user_detail in user]
+
+    def iter_users(self) -> AsyncIterator[Dict[str, Any]]:
+        """Yields every user document, skipping lookup documents"""
+        return self.container.query_items(
+            query='SELECT * FROM c WHERE NOT IS_DEFINED(c.type)'
+        )
+
+
+class StatsDB(StatsDatabaseInterface):
+    """
+    One aggregate document per user, in its own partition of the stats
+    container. Writes are atomic `incr` patches, so concurrent requests
+    never overwrite each other's counts.
+    """
+    def __init__(self, container: ContainerProxy) -> None:
+        self.container = container
+
+    @staticmethod
+    def stats_document(user_id: str, day_counts: Dict[str, int]) -> Dict[str, Any]:
+        return {
+            "id": user_id,
+            "user_id": user_id,
+            "total": sum(day_counts.values()),
+            "days": day_counts,
+        }
+
+    @handle_cosmos_exception(error_msg="retrieve journal stats")
+    @resilient(IDEMPOTENT)
+    @instrument_cosmos_call
+    async def get_stats(self, user_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            return await self.container.read_item(user_id, partition_key=user_id)
+        except CosmosResourceNotFoundError:
+            return None
+
+    @handle_cosmos_exception(error_msg="update journal stats")
+    @resilient(MULTI_REQUEST)
+    @instrument_cosmos_call
+    async def increment_stats(self, user_id: str, day_counts: Dict[str, int]) -> None:
+        """
+        Adds the counts (negative for deletes) with incr patches, creating
+        the document on first use. A patch holds at most 10 operations, so
+        a write touching many days needs several; they go in one
+        transactional batch, so they apply together or not at all.
+        """
+        operations = [
+            {"op": "incr", "path": "/total", "value": sum(day_counts.values())}
+        ] + [
+            {"op": "incr", "path": f"/days/{day}", "value": count}
+            for day, count in day_counts.items()
+        ]
+        patches = [
+            ("patch", (user_id, operations[start:start + PATCH_SIZE]))
+            for start in range(0, len(operations), PATCH_SIZE)
+        ]
+        if len(patches) > BATCH_SIZE:
+            # More days than one batch holds; rare enough to read and replace.
+            await self._replace_counts(user_id, day_counts)
+            return
+
+        def patch():
+            return self.container.execute_item_batch(
+                batch_operations=patches,
+                partition_key=user_id
+            )
+
+        try:
+            await with_retries("execute_item_batch", patch, idempotent=False)
+        except CosmosBatchOperationError as e:
+            if e.operation_responses[e.error_index].get("statusCode") != 404:
+                raise
+            try:
+                await with_retries(
+                    "create_item",
+                    lambda: self.container.create_item(self.stats_document(user_id, {})),
+                    idempotent=False
+                )
+            except CosmosResourceExistsError:
+                # Another request created it first.
+                pass
+            await with_retries("execute_item_batch", patch, idempotent=False)
+
+    async def _replace_counts(self, user_id: str, day_counts: Dict[str, int]) -> None:
+        """
+        Adds the counts by replacing the whole document, on the condition
+        that it hasn't changed since it was read. Another write landing in
+        between makes it read again.
+        """
+        while True:
+            try:
+                stats = await self.container.read_item(user_id, partition_key=user_id)
+            except CosmosResourceNotFoundError:
+                try:
+                    await self.container.create_item(self.stats_document(user_id, day_counts))
+                    return
+                except CosmosResourceExistsError:
+                    continue
+
+            days = Counter(stats["days"])
+            days.update(day_counts)
+            try:
+                await self.container.replace_item(
+                    user_id,
+                    self.stats_document(user_id, dict(days)),
+                    etag=stats["_etag"],
+                    match_condition=MatchConditions.IfNotModified
+                )
+                return
+            except CosmosAccessConditionFailedError:
+                continue
+
+    @handle_cosmos_exception(error_msg="replace journal stats")
+    @resilient(IDEMPOTENT)
+    @instrument_cosmos_call
+    async def replace_stats(self, user_id: str, day_counts: Dict[str, int]) -> None:
+        await self.container.upsert_item(self.stats_document(user_id, day_counts))
+
+    def iter_user_ids(self) -> AsyncIterator[str]:
+        """Yields the user_id of every stats document"""
+        return self.container.query_items(query='SELECT VALUE c.user_id FROM c')
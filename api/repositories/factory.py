@@ -0,0 +1,84 @@
+import os
+import logging
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator
+
+from dotenv import load_dotenv
+
+from repositories.interface_repository import (
+    DatabaseInterface,
+    StatsDatabaseInterface,
+    UserDatabaseInterface
+)
+
+load_dotenv()
+logger = logging.getLogger("journal")
+
+REPOSITORY_BACKEND = os.getenv("REPOSITORY_BACKEND", "cosmos").lower()
+
+
+@dataclass
+class Repositories:
+    entries: DatabaseInterface
+    users: UserDatabaseInterface
+    stats: StatsDatabaseInterface
+
+
+@asynccontextmanager
+async def open_repositories(
+        backend: str = REPOSITORY_BACKEND
+) -> AsyncIterator[Repositories]:
+    """
+    Opens the repositories for the configured backend for the lifetime of
+    the app. Backends are imported lazily so the in-memory backend doesn't
+    need Cosmos settings.
+    """
+    if backend == "memory":
+        from repositories.memory_repository import (
+            InMemoryDB,
+            InMemoryStatsDB,
+            InMemoryUserDB
+        )
+
+        logger.warning("Using the in-memory backend. Data won't be persisted.")
+        yield Repositories(
+            entries=InMemoryDB(),
+            users=InMemoryUserDB(),
+            stats=InMemoryStatsDB()
+        )
+
+    elif backend == "faulty":
+        from repositories.fault_repository import FaultInjectingDB
+        from repositories.memory_repository import InMemoryStatsDB, InMemoryUserDB
+
+        logger.warning("Using the fault-injecting in-memory backend.")
+        yield Repositories(
+            entries=FaultInjectingDB(),
+            users=InMemoryUserDB(),
+            stats=InMemoryStatsDB()
+        )
+
+    elif backend == "cosmos":
+        from repositories.cosmos_repository import (
+            CosmosDB,
+            StatsDB,
+            UserDB,
+            create_cosmos_client,
+            provision_containers
+        )
+
+        # One pooled client for the whole process instead of one per request.
+        async with create_cosmos_client(sdk_throttle_retries=False) as cosmos_client:
+            # Containers are provisioned (or just bound) once, and their
+            # handles are reused by every request.
+            containers = await provision_containers(cosmos_client)
+            yield Repositories(
+                entries=CosmosDB(containers.entries),
+                users=UserDB(containers.users),
+                stats=StatsDB(containers.stats)
+            )
+
+    else:
+        logger.critical("Unknown repository backend: %s", backend)
+        raise ValueError(f"Unknown repository backend: {backend}")
@@ -0,0 +1,204 @@
+import os
+import random
+import asyncio
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from azure.core.exceptions import ServiceResponseError
+from azure.cosmos.exceptions import CosmosHttpResponseError
+from dotenv import load_dotenv
+
+from repositories.cosmos_metrics import add_request_charge, instrument_cosmos_call
+from repositories.memory_repository import InMemoryDB
+from repositories.resilience import (
+    IDEMPOTENT,
+    MULTI_REQUEST,
+    RETRY_AFTER_HEADER,
+    SINGLE_REQUEST,
+    resilient,
+    with_retries
+)
+
+load_dotenv()
+
+FAULT_ERROR_RATE = float(os.getenv("FAULT_ERROR_RATE", "0.05"))
+FAULT_RETRY_AFTER_MS = int(os.getenv("FAULT_RETRY_AFTER_MS", "50"))
+FAULT_LATENCY_MS = float(os.getenv("FAULT_LATENCY_MS", "5"))
+FAULT_REQUEST_CHARGE = float(os.getenv("FAULT_REQUEST_CHARGE", "5"))
+
+# How injected errors are split: mostly throttling, as under real load.
+FAULTS = (
+    (0.8, 429),
+    (0.1, 503),
+    (0.1, "connection"),
+)
+
+
+def _fault(kind: Any, retry_after_ms: int) -> Exception:
+    if kind == "connection":
+        return ServiceResponseError("Injected fault: connection reset")
+    error = CosmosHttpResponseError(status_code=kind, message=f"Injected fault: {kind}")
+    if kind == 429:
+        error.headers[RETRY_AFTER_HEADER] = str(retry_after_ms)
+    return error
+
+
+class FaultInjector:
+    """
+    Simulates one Cosmos request: waits `latency_ms`, charges
+    `request_charge` RU and fails `error_rate` of the time. The settings
+    can be changed while running, e.g. to simulate an outage.
+    """
+    def __init__(
+            self,
+            error_rate: float = FAULT_ERROR_RATE,
+            retry_after_ms: int = FAULT_RETRY_AFTER_MS,
+            latency_ms: float = FAULT_LATENCY_MS,
+            request_charge: float = FAULT_REQUEST_CHARGE,
+            seed: Optional[int] = None
+    ) -> None:
+        self.error_rate = error_rate
+        self.retry_after_ms = retry_after_ms
+        self.latency_ms = latency_ms
+        self.request_charge = request_charge
+        self.requests = 0
+        self.failures = 0
+        self._random = random.Random(seed)
+
+    async def request(self) -> None:
+        self.requests += 1
+        if self.latency_ms:
+            await asyncio.sleep(self.latency_ms / 1000)
+        add_request_charge(self.request_charge)
+        if self._random.random() < self.error_rate:
+            self.failures += 1
+            kind = self._random.choices(
+                [kind for _, kind in FAULTS],
+                [share for share, _ in FAULTS]
+            )[0]
+            raise _fault(kind, self.retry_after_ms)
+
+
+class FaultInjectingDB(InMemoryDB):
+    """
+    The in-memory repository behind injected latency, request charges and
+    Cosmos failures, wrapped in the same resilience layer as CosmosDB. Use
+    it to see retries, the RU limiter and the circuit breaker at work
+    without Cosmos (REPOSITORY_BACKEND=faulty).
+
+    Faults are injected before the data is touched, so a failed request is
+    never applied.
+    """
+    def __init__(self, faults: Optional[FaultInjector] = None) -> None:
+        super().__init__()
+        self.faults = faults or FaultInjector()
+
+    @resilient(SINGLE_REQUEST)
+    @instrument_cosmos_call
+    async def create_entry(self, entry_data: Dict[str, Any]) -> Dict[str, Any]:
+        await self.faults.request()
+        return await super().create_entry(entry_data)
+
+    @resilient(IDEMPOTENT)
+    @instrument_cosmos_call
+    async def get_all_entries(
+            self,
+            user_id: str,
+            fields: Optional[Sequence[str]] = None
+    ) -> List[Dict[str, Any]]:
+        await self.faults.request()
+        return await super().get_all_entries(user_id, fields)
+
+    @resilient(IDEMPOTENT)
+    @instrument_cosmos_call
+    async def get_entries_page(
+            self,
+            user_id: str,
+            limit: int,
+            continuation_token: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        await self.faults.request()
+        return await super().get_entries_page(user_id, limit, continuation_token)
+
+    @resilient(IDEMPOTENT)
+    @instrument_cosmos_call
+    async def query_entries(
+            self,
+            user_id: str,
+            limit: int,
+            start_ts: Optional[int] = None,
+            end_ts: Optional[int] = None,
+            descending: bool = True,
+            continuation_token: Optional[str] = None,
+            fields: Optional[Sequence[str]] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        await self.faults.request()
+        return await super().query_entries(
+            user_id, limit, start_ts, end_ts, descending, continuation_token, fields
+        )
+
+    @resilient(IDEMPOTENT)
+    @instrument_cosmos_call
+    async def get_entry_etag(self, entry_id: str, user_id: str) -> Optional[str]:
+        await self.faults.request()
+        return await super().get_entry_etag(entry_id, user_id)
+
+    @resilient(IDEMPOTENT)
+    @instrument_cosmos_call
+    async def get_entry(self, entry_id: str, user_id: str) -> Dict[str, Any]:
+        await self.faults.request()
+        return await super().get_entry(entry_id, user_id)
+
+    @resilient(IDEMPOTENT)
+    @instrument_cosmos_call
+    async def get_created_at(
+            self,
+            user_id: str,
+            entry_ids: List[str]
+    ) -> Dict[str, str]:
+        await self.faults.request()
+        return await super().get_created_at(user_id, entry_ids)
+
+    @resilient(SINGLE_REQUEST)
+    @instrument_cosmos_call
+    async def update_entry(
+            self,
+            entry_id: str,
+            user_id: str,
+            updated_fields: Dict[str, Any],
+            etag: Optional[str] = None
+    ) -> Dict[str, Any]:
+        await self.faults.request()
+        return await super().update_entry(entry_id, user_id, updated_fields, etag)
+
+    @resilient(MULTI_REQUEST)
+    @instrument_cosmos_call
+    async def create_entries(
+            self,
+            user_id: str,
+            entries: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        await with_retries("execute_item_batch", self.faults.request, idempotent=False)
+        return await super().create_entries(user_id, entries)
+
+    @resilient(MULTI_REQUEST)
+    @instrument_cosmos_call
+    async def delete_entries(
+            self,
+            user_id: str,
+            entry_ids: List[str]
+    ) -> List[Dict[str, Any]]:
+        await with_retries("execute_item_batch", self.faults.request, idempotent=False)
+        return await super().delete_entries(user_id, entry_ids)
+
+    @resilient(MULTI_REQUEST)
+    @instrument_cosmos_call
+    async def delete_all_entries(self, user_id: str) -> List[Dict[str, Any]]:
+        await with_retries("read_entry_ids", self.faults.request, idempotent=True)
+        await with_retries("execute_item_batch", self.faults.request, idempotent=False)
+        return await super().delete_all_entries(user_id)
+
+    @resilient(SINGLE_REQUEST)
+    @instrument_cosmos_call
+    async def delete_entry(self, entry_id: str, user_id: str) -> None:
+        await self.faults.request()
+        await super().delete_entry(entry_id, user_id)
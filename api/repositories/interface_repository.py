@@ -1,27 +1,133 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List
+from typing import Dict, Any, List, AsyncIterator, Optional, Sequence, Tuple
+
+from models.user import UserInDB
 
 class DatabaseInterface(ABC):
     @abstractmethod
-    async def create_entry(self, entry_data: Dict[str, Any]) -> None:
+    async def create_entry(self, entry_data: Dict[str, Any]) -> Dict[str, Any]:
+        pass
+
+    @abstractmethod
+    async def get_all_entries(
+        self,
+        user_id: str,
+        fields: Optional[Sequence[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """Reads only `fields` of each entry when given."""
+        pass
+
+    @abstractmethod
+    async def get_entries_page(
+        self,
+        user_id: str,
+        limit: int,
+        continuation_token: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        pass
+
+    @abstractmethod
+    async def query_entries(
+        self,
+        user_id: str,
+        limit: int,
+        start_ts: Optional[int] = None,
+        end_ts: Optional[int] = None,
+        descending: bool = True,
+        continuation_token: Optional[str] = None,
+        fields: Optional[Sequence[str]] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Reads only `fields` of each entry when given."""
+        pass
+
+    @abstractmethod
+    def iter_entries(self, user_id: str, page_size: int) -> AsyncIterator[Dict[str, Any]]:
+        pass
+
+    @abstractmethod
+    async def get_entry_etag(self, entry_id: str, user_id: str) -> Optional[str]:
+        pass
+
+    @abstractmethod
+    async def get_entry(self, entry_id: str, user_id: str) -> Dict[str, Any]:
+        pass
+
+    @abstractmethod
+    async def get_created_at(
+        self,
+        user_id: str,
+        entry_ids: List[str]
+    ) -> Dict[str, str]:
         pass
 
     @abstractmethod
-    async def get_all_entries(self) -> List[Dict[str, Any]]:
+    async def update_entry(
+        self,
+        entry_id: str,
+        user_id: str,
+        updated_fields: Dict[str, Any],
+        etag: Optional[str] = None
+    ) -> Dict[str, Any]:
         pass
 
     @abstractmethod
-    async def get_entry(self, entry_id: str) -> Dict[str, Any]:
+    async def create_entries(
+        self,
+        user_id: str,
+        entries: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
         pass
 
     @abstractmethod
-    async def update_entry(self, entry_id: str, updated_data: Dict[str, Any]) -> None:
+    async def delete_entries(
+        self,
+        user_id: str,
+        entry_ids: List[str]
+    ) -> List[Dict[str, Any]]:
         pass
 
     @abstractmethod
-    async def delete_all_entries(self) -> None:
+    async def delete_all_entries(self, user_id: str) -> List[Dict[str, Any]]:
+        """Deletes every entry of the user and returns a status per entry"""
         pass
 
     @abstractmethod
-    async def delete_entry(self, entry_id: str) -> None:
-        pass
\ No newline at end of file
+    async def delete_entry(self, entry_id: str, user_id: str) -> None:
+        pass
+
+
+class UserDatabaseInterface(ABC):
+    @abstractmethod
+    async def register_user(self, user_data: UserInDB) -> bool:
+        pass
+
+    @abstractmethod
+    async def get_user(self, username: str) -> List[Dict[str, Any]]:
+        pass
+
+    @abstractmethod
+    async def username_taken(self, username: str) -> bool:
+        """
+        A cheap check run before hashing a new user's password.
+        register_user still decides when two registrations race.
+        """
+        pass
+
+
+
+class StatsDatabaseInterface(ABC):
+    """
+    Stores one aggregate document per user: the entry count and the number
+    of entries per day ("YYYY-MM-DD").
+    """
+    @abstractmethod
+    async def get_stats(self, user_id: str) -> Optional[Dict[str, Any]]:
+        pass
+
+    @abstractmethod
+    async def increment_stats(self, user_id: str, day_counts: Dict[str, int]) -> None:
+        pass
+
+    @abstractmethod
+    async def replace_stats(self, user_id: str, day_counts: Dict[str, int]) -> None:
+        pass
@@ -0,0 +1,257 @@
+import time
+import uuid
+import logging
+from typing import Dict, Any, List, AsyncIterator, Optional, Sequence, Tuple
+
+from azure.cosmos.exceptions import (
+    CosmosAccessConditionFailedError,
+    CosmosResourceNotFoundError
+)
+
+from exceptions import InvalidCursor
+from models.user import UserInDB
+from repositories.interface_repository import (
+    DatabaseInterface,
+    StatsDatabaseInterface,
+    UserDatabaseInterface
+)
+
+logger = logging.getLogger("journal")
+
+
+def _offset(continuation_token: Optional[str]) -> int:
+    """Reads the list offset stored in a continuation token."""
+    if not continuation_token:
+        return 0
+    try:
+        offset = int(continuation_token)
+    except ValueError as e:
+        raise InvalidCursor("Invalid pagination cursor.") from e
+    if offset < 0:
+        raise InvalidCursor("Invalid pagination cursor.")
+    return offset
+
+
+def _project(entry: Dict[str, Any], fields: Optional[Sequence[str]]) -> Dict[str, Any]:
+    """Copies `fields` of an entry, or all of it when not given."""
+    if not fields:
+        return dict(entry)
+    # Like a Cosmos projection, fields a document lacks are left out.
+    return {field: entry[field] for field in fields if field in entry}
+
+
+def _stamp(document: Dict[str, Any]) -> Dict[str, Any]:
+    """Adds the system properties Cosmos sets on every write."""
+    document["_etag"] = f'"{uuid.uuid4()}"'
+    document["_ts"] = int(time.time())
+    return document
+
+
+def _not_found(entry_id: str) -> CosmosResourceNotFoundError:
+    return CosmosResourceNotFoundError(
+        status_code=404,
+        message=f"Entity with the specified id {entry_id} does not exist."
+    )
+
+
+class InMemoryDB(DatabaseInterface):
+    """
+    Keeps entries in process memory, partitioned by user_id like the Cosmos
+    container. It raises the same Cosmos exceptions, so services behave the
+    same on both backends. Meant for local runs and benchmarks; nothing is
+    persisted.
+
+    Unlike Cosmos batches, bulk operations here succeed or fail per item.
+    """
+    def __init__(self) -> None:
+        self._partitions: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        logger.debug("Initialized in-memory entry repository.")
+
+    def _partition(self, user_id: str) -> Dict[str, Dict[str, Any]]:
+        return self._partitions.setdefault(user_id, {})
+
+    async def create_entry(self, entry_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Creates a new journal entry and returns the stored document"""
+        document = _stamp(dict(entry_data))
+        self._partition(document["user_id"])[document["id"]] = document
+        return dict(document)
+
+    async def get_all_entries(
+            self,
+            user_id: str,
+            fields: Optional[Sequence[str]] = None
+    ) -> List[Dict[str, Any]]:
+        return [_project(entry, fields) for entry in self._partition(user_id).values()]
+
+    async def get_entries_page(
+            self,
+            user_id: str,
+            limit: int,
+            continuation_token: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        entries = list(self._partition(user_id).values())
+        start = _offset(continuation_token)
+        end = start + limit
+        next_token = str(end) if end < len(entries) else None
+        return [dict(entry) for entry in entries[start:end]], next_token
+
+    async def query_entries(
+            self,
+            user_id: str,
+            limit: int,
+            start_ts: Optional[int] = None,
+            end_ts: Optional[int] = None,
+            descending: bool = True,
+            continuation_token: Optional[str] = None,
+            fields: Optional[Sequence[str]] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        entries = sorted(
+            (
+                entry for entry in self._partition(user_id).values()
+                if entry.get("created_ts") is not None
+                and (start_ts is None or entry["created_ts"] >= start_ts)
+                and (end_ts is None or entry["created_ts"] < end_ts)
+            ),
+            key=lambda entry: entry["created_ts"],
+            reverse=descending
+        )
+        start = _offset(continuation_token)
+        end = start + limit
+        next_token = str(end) if end < len(entries) else None
+        return [_project(entry, fields) for entry in entries[start:end]], next_token
+
+    async def iter_entries(
+            self,
+            user_id: str,
+            page_size: int
+    ) -> AsyncIterator[Dict[str, Any]]:
+        for entry in list(self._partition(user_id).values()):
+            yield dict(entry)
+
+    async def get_entry_etag(self, entry_id: str, user_id: str) -> Optional[str]:
+        entry = self._partition(user_id).get(entry_id)
+        return entry["_etag"] if entry is not None else None
+
+    async def get_entry(self, entry_id: str, user_id: str) -> Dict[str, Any]:
+        entry = self._partition(user_id).get(entry_id)
+        if entry is None:
+            raise _not_found(entry_id)
+        return dict(entry)
+
+    async def get_created_at(
+            self,
+            user_id: str,
+            entry_ids: List[str]
+    ) -> Dict[str, str]:
+        partition = self._partition(user_id)
+        return {
+            entry_id: partition[entry_id]["created_at"]
+            for entry_id in entry_ids
+            if entry_id in partition
+        }
+
+    async def update_entry(
+            self,
+            entry_id: str,
+            user_id: str,
+            updated_fields: Dict[str, Any],
+            etag: Optional[str] = None
+    ) -> Dict[str, Any]:
+        entry = self._partition(user_id).get(entry_id)
+        if entry is None:
+            raise _not_found(entry_id)
+        if etag is not None and etag != entry["_etag"]:
+            raise CosmosAccessConditionFailedError(
+                status_code=412,
+                message="One of the specified pre-condition is not met."
+            )
+
+        entry.update(updated_fields)
+        return dict(_stamp(entry))
+
+    async def create_entries(
+            self,
+            user_id: str,
+            entries: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        partition = self._partition(user_id)
+        results = []
+        for entry in entries:
+            if entry["id"] in partition:
+                results.append({"id": entry["id"], "status_code": 409})
+                continue
+            partition[entry["id"]] = _stamp(dict(entry))
+            results.append({"id": entry["id"], "status_code": 201})
+        return results
+
+    async def delete_entries(
+            self,
+            user_id: str,
+            entry_ids: List[str]
+    ) -> List[Dict[str, Any]]:
+        partition = self._partition(user_id)
+        return [
+            {
+                "id": entry_id,
+                "status_code": 204 if partition.pop(entry_id, None) else 404
+            }
+            for entry_id in entry_ids
+        ]
+
+    async def delete_all_entries(self, user_id: str) -> List[Dict[str, Any]]:
+        return [
+            {"id": entry_id, "status_code": 204}
+            for entry_id in self._partitions.pop(user_id, {})
+        ]
+
+    async def delete_entry(self, entry_id: str, user_id: str) -> None:
+        if self._partition(user_id).pop(entry_id, None) is None:
+            raise _not_found(entry_id)
+
+
+class InMemoryUserDB(UserDatabaseInterface):
+    def __init__(self) -> None:
+        self._users: Dict[str, Dict[str, Any]] = {}
+        logger.debug("Initialized in-memory user repository.")
+
+    async def register_user(self, user_data: UserInDB) -> bool:
+        if user_data.username in self._users:
+            return False
+        self._users[user_data.username] = user_data.model_dump()
+        return True
+
+    async def get_user(self, username: str) -> List[Dict[str, Any]]:
+        user = self._users.get(username)
+        return [dict(user)] if user is not None else []
+
+    async def username_taken(self, username: str) -> bool:
+        return username in self._users
+
+
+class InMemoryStatsDB(StatsDatabaseInterface):
+    def __init__(self) -> None:
+        self._stats: Dict[str, Dict[str, Any]] = {}
+        logger.debug("Initialized in-memory stats repository.")
+
+    async def get_stats(self, user_id: str) -> Optional[Dict[str, Any]]:
+        stats = self._stats.get(user_id)
+        if stats is None:
+            return None
+        return {**stats, "days": dict(stats["days"])}
+
+    async def increment_stats(self, user_id: str, day_counts: Dict[str, int]) -> None:
+        stats = self._stats.setdefault(
+            user_id,
+            {"id": user_id, "user_id": user_id, "total": 0, "days": {}}
+        )
+        stats["total"] += sum(day_counts.values())
+        for day, count in day_counts.items():
+            stats["days"][day] = stats["days"].get(day, 0) + count
+
+    async def replace_stats(self, user_id: str, day_counts: Dict[str, int]) -> None:
+        self._stats[user_id] = {
+            "id": user_id,
+            "user_id": user_id,
+            "total": sum(day_counts.values()),
+            "days": dict(day_counts),
+        }
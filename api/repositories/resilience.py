@@ -0,0 +1,325 @@
+import os
+import math
+import random
+import asyncio
+import logging
+from contextvars import ContextVar
+from functools import wraps
+from time import monotonic
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from azure.core.exceptions import ServiceRequestError, ServiceResponseError
+from azure.cosmos.exceptions import CosmosHttpResponseError
+from dotenv import load_dotenv
+
+from exceptions import ServiceOverloaded
+from repositories.cosmos_metrics import track_request_charge
+from utils.metrics import REGISTRY
+
+load_dotenv()
+logger = logging.getLogger("journal")
+
+COSMOS_MAX_RETRIES = int(os.getenv("COSMOS_MAX_RETRIES", "3"))
+# Total time a call may spend waiting between attempts.
+COSMOS_RETRY_BUDGET_MS = float(os.getenv("COSMOS_RETRY_BUDGET_MS", "3000"))
+# This process's share of the provisioned throughput. 0 turns the limiter off.
+COSMOS_RU_PER_SECOND = float(os.getenv("COSMOS_RU_PER_SECOND", "0"))
+# Calls that would wait longer than this for RU budget fail with 503.
+COSMOS_RU_MAX_WAIT_MS = float(os.getenv("COSMOS_RU_MAX_WAIT_MS", "1000"))
+COSMOS_BREAKER_THRESHOLD = int(os.getenv("COSMOS_BREAKER_THRESHOLD", "5"))
+COSMOS_BREAKER_COOLDOWN = float(os.getenv("COSMOS_BREAKER_COOLDOWN", "10"))
+
+BACKOFF_BASE = 0.05
+BACKOFF_MAX = 2.0
+RETRY_AFTER_HEADER = "x-ms-retry-after-ms"
+
+# Cosmos rejected the request before executing it, so any request can be
+# sent again.
+THROTTLED = frozenset({429, 449})
+# The request may or may not have been applied.
+TRANSIENT = frozenset({408, 503})
+# Responses that mean Cosmos is overloaded rather than the request is wrong.
+SATURATED = frozenset({429, 503})
+UNHEALTHY = SATURATED | TRANSIENT
+
+# How a decorated method may be retried.
+IDEMPOTENT = "idempotent"
+SINGLE_REQUEST = "single_request"
+MULTI_REQUEST = "multi_request"
+
+RETRIES = REGISTRY.counter(
+    "cosmos_retries",
+    "Cosmos requests sent again after a throttled or transient failure.",
+    ("operation", "reason")
+)
+REJECTED = REGISTRY.counter(
+    "cosmos_rejected",
+    "Repository calls failed fast without reaching Cosmos.",
+    ("reason",)
+)
+
+T = TypeVar("T")
+
+
+class RequestChargeLimiter:
+    """
+    A token bucket of request units for this process. Refills at `rate` RU
+    per second, up to one second's worth.
+
+    A call's charge is only known once it returns, so calls are admitted
+    while the bucket isn't empty and charged afterwards. The bucket can go
+    into debt, and later calls wait until it's paid off. A 429 empties the
+    bucket, since Cosmos just said the budget is spent.
+    """
+    def __init__(self, rate: float, max_wait: float) -> None:
+        self.rate = rate
+        self.max_wait = max_wait
+        self.tokens = rate
+        self._updated = monotonic()
+
+    def _refill(self) -> None:
+        now = monotonic()
+        self.tokens = min(self.rate, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        self._refill()
+        if self.tokens > 0:
+            return
+
+        wait = -self.tokens / self.rate
+        if wait > self.max_wait:
+            REJECTED.labels("ru_budget").inc()
+            raise ServiceOverloaded(
+                "The database is busy. Please try again shortly.",
+                retry_after=math.ceil(wait)
+            )
+        await asyncio.sleep(wait)
+
+    def consume(self, charge: float) -> None:
+        if self.rate > 0:
+            self._refill()
+            self.tokens -= charge
+
+    def throttled(self) -> None:
+        if self.rate > 0:
+            self._refill()
+            self.tokens = min(self.tokens, 0.0)
+
+
+class CircuitBreaker:
+    """
+    Fails calls fast once `threshold` calls in a row found Cosmos saturated
+    or unreachable. After `cooldown` seconds one trial call goes through:
+    its success closes the breaker, its failure opens it again.
+    """
+    CLOSED = 0
+    HALF_OPEN = 1
+    OPEN = 2
+
+    def __init__(self, threshold: int, cooldown: float) -> None:
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+
+    def allow(self) -> None:
+        if self.state == self.CLOSED:
+            return
+        if self.state == self.OPEN:
+            remaining = self._opened_at + self.cooldown - monotonic()
+            if remaining <= 0:
+                # This call is the trial; others fail until it finishes.
+                self.state = self.HALF_OPEN
+                return
+        else:
+            remaining = self.cooldown
+
+        REJECTED.labels("circuit_open").inc()
+        raise ServiceOverloaded(
+            "The database is unavailable. Please try again shortly.",
+            retry_after=max(1, math.ceil(remaining))
+        )
+
+    def record(self, healthy: Optional[bool]) -> None:
+        """Records a call's outcome. None means it was cancelled."""
+        if healthy is None:
+            if self.state == self.HALF_OPEN:
+                # Let the next call be the trial instead.
+                self.state = self.OPEN
+                self._opened_at = monotonic() - self.cooldown
+            return
+        if healthy:
+            self._failures = 0
+            self.state = self.CLOSED
+            return
+
+        self._failures += 1
+        if self.state == self.HALF_OPEN or self._failures >= self.threshold:
+            if self.state != self.OPEN:
+                logger.warning(
+                    "Opening the Cosmos circuit breaker for %ss after %s failures",
+                    self.cooldown,
+                    self._failures
+                )
+            self.state = self.OPEN
+            self._opened_at = monotonic()
+
+
+CHARGE_LIMITER = RequestChargeLimiter(COSMOS_RU_PER_SECOND, COSMOS_RU_MAX_WAIT_MS / 1000)
+CIRCUIT_BREAKER = CircuitBreaker(COSMOS_BREAKER_THRESHOLD, COSMOS_BREAKER_COOLDOWN)
+
+REGISTRY.gauge(
+    "cosmos_circuit_state",
+    "Cosmos circuit breaker state: 0 closed, 1 half-open, 2 open.",
+    callback=lambda: {(): CIRCUIT_BREAKER.state}
+)
+REGISTRY.gauge(
+    "cosmos_ru_budget_available",
+    "Request units left in this process's token bucket.",
+    callback=lambda: {(): CHARGE_LIMITER.tokens}
+)
+
+# Set while a resilient method runs, so methods it calls don't retry,
+# admit or charge the same work a second time.
+_in_resilient_call: ContextVar[bool] = ContextVar("in_resilient_call", default=False)
+
+
+def _status(error: Exception) -> Optional[int]:
+    return error.status_code if isinstance(error, CosmosHttpResponseError) else None
+
+
+def _is_unhealthy(error: Exception) -> bool:
+    return (
+        _status(error) in UNHEALTHY
+        or isinstance(error, (ServiceRequestError, ServiceResponseError))
+    )
+
+
+def _retry_delay(error: Exception, attempt: int, idempotent: bool) -> Optional[float]:
+    """
+    Returns how long to wait before sending the request again, or None if
+    it can't be retried. Waits at least the x-ms-retry-after-ms Cosmos
+    asks for, otherwise backs off exponentially with full jitter.
+    """
+    status = _status(error)
+    if status in THROTTLED:
+        retry_after = error.headers.get(RETRY_AFTER_HEADER)
+        if retry_after:
+            return float(retry_after) / 1000 + random.uniform(0, BACKOFF_BASE)
+    elif not (
+        # A ServiceRequestError means the request never left this process.
+        isinstance(error, ServiceRequestError)
+        or idempotent and (status in TRANSIENT or isinstance(error, ServiceResponseError))
+    ):
+        return None
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+
+async def with_retries(
+    operation: str,
+    call: Callable[[], Awaitable[T]],
+    idempotent: bool
+) -> T:
+    """
+    Sends a request, and sends it again after throttling, or after a
+    transient failure when `idempotent`, within COSMOS_MAX_RETRIES and
+    COSMOS_RETRY_BUDGET_MS.
+    """
+    deadline = monotonic() + COSMOS_RETRY_BUDGET_MS / 1000
+    attempt = 0
+    while True:
+        try:
+            return await call()
+        except (CosmosHttpResponseError, ServiceRequestError, ServiceResponseError) as e:
+            if _status(e) == 429:
+                CHARGE_LIMITER.throttled()
+            delay = _retry_delay(e, attempt, idempotent)
+            if (
+                delay is None
+                or attempt >= COSMOS_MAX_RETRIES
+                or monotonic() + delay > deadline
+            ):
+                raise
+            attempt += 1
+            RETRIES.labels(operation, str(_status(e) or "connection")).inc()
+            logger.debug(
+                "Retrying %s in %.0fms after %s",
+                operation,
+                delay * 1000,
+                _status(e) or type(e).__name__
+            )
+            await asyncio.sleep(delay)
+
+
+def resilient(retry: str):
+    """
+    Runs a repository method through the circuit breaker and the request
+    charge limiter, and retries it according to `retry`:
+
+    - IDEMPOTENT: safe to repeat; retried after throttling and transient
+      failures.
+    - SINGLE_REQUEST: one write; retried only when Cosmos rejected it
+      without applying it (429, 449).
+    - MULTI_REQUEST: several writes, which can't be repeated as a whole.
+      The method wraps each of its requests in with_retries instead.
+
+    When Cosmos stays saturated or unreachable, or a write can't be
+    retried after a transient failure, the call fails with
+    ServiceOverloaded, so clients get 503 with Retry-After rather than a
+    500.
+    """
+    def decorator(func):
+        operation = func.__name__
+
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            if _in_resilient_call.get():
+                return await func(*args, **kwargs)
+
+            await CHARGE_LIMITER.acquire()
+            CIRCUIT_BREAKER.allow()
+            scope = _in_resilient_call.set(True)
+            healthy = None
+            try:
+                with track_request_charge() as charge:
+                    try:
+                        if retry == MULTI_REQUEST:
+                            result = await func(*args, **kwargs)
+                        else:
+                            result = await with_retries(
+                                operation,
+                                lambda: func(*args, **kwargs),
+                                idempotent=retry == IDEMPOTENT
+                            )
+                        healthy = True
+                        return result
+                    finally:
+                        CHARGE_LIMITER.consume(charge[0])
+            except Exception as e:
+                healthy = not _is_unhealthy(e)
+                if _status(e) in SATURATED:
+                    retry_after = e.headers.get(RETRY_AFTER_HEADER)
+                    logger.warning("Cosmos is saturated. %s failed with %s", operation, _status(e))
+                    raise ServiceOverloaded(
+                        "The database is busy. Please try again shortly.",
+                        retry_after=max(1, math.ceil(float(retry_after or 0) / 1000))
+                    ) from e
+                if not healthy:
+                    logger.warning(
+                        "Cosmos is unavailable. %s failed with %s",
+                        operation,
+                        _status(e) or type(e).__name__
+                    )
+                    raise ServiceOverloaded(
+                        "The database is unavailable. Please try again shortly."
+                    ) from e
+                raise
+            finally:
+                _in_resilient_call.reset(scope)
+                CIRCUIT_BREAKER.record(healthy)
+        return wrapper
+    return decorator
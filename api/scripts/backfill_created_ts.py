@@ -0,0 +1,71 @@
+"""
+Prepares existing entry containers for date-range queries: applies the
+entry indexing policy (composite index on user_id + created_ts) and sets
+created_ts and updated_ts on entries written before those fields existed.
+The "None" older entries have as updated_at becomes null. Safe to run more
+than once.
+
+Run from the api directory:
+    python -m scripts.backfill_created_ts
+"""
+import asyncio
+import logging
+
+from repositories.cosmos_repository import (
+    apply_entry_indexing_policy,
+    create_cosmos_client,
+    provision_containers
+)
+from utils.timestamps import created_timestamp
+
+logger = logging.getLogger("journal")
+
+
+async def backfill() -> None:
+    updated = skipped = 0
+    async with create_cosmos_client() as client:
+        containers = await provision_containers(client)
+        await apply_entry_indexing_policy(client)
+
+        missing = containers.entries.query_items(
+            query=(
+                'SELECT c.id, c.user_id, c.created_at, c.updated_at, '
+                'IS_DEFINED(c.created_ts) AS has_created_ts FROM c '
+                'WHERE NOT IS_DEFINED(c.created_ts) OR NOT IS_DEFINED(c.updated_ts)'
+            )
+        )
+        async for entry in missing:
+            operations = []
+            if not entry["has_created_ts"]:
+                created_ts = created_timestamp(entry.get("created_at"))
+                if created_ts is None:
+                    logger.warning("Entry %s has no usable created_at.", entry["id"])
+                    skipped += 1
+                else:
+                    operations.append(
+                        {"op": "set", "path": "/created_ts", "value": created_ts}
+                    )
+
+            # Set even when null, so the entry isn't selected again.
+            updated_ts = created_timestamp(entry.get("updated_at"))
+            operations.append({"op": "set", "path": "/updated_ts", "value": updated_ts})
+            if updated_ts is None and entry.get("updated_at") is not None:
+                operations.append({"op": "set", "path": "/updated_at", "value": None})
+
+            await containers.entries.patch_item(
+                entry["id"],
+                partition_key=entry["user_id"],
+                patch_operations=operations
+            )
+            updated += 1
+
+    logger.info(
+        "Timestamp backfill finished: %s updated, %s without a usable created_at.",
+        updated,
+        skipped
+    )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(backfill())
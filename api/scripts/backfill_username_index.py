@@ -0,0 +1,42 @@
+"""
+Creates the username lookup documents for users registered before the
+username index existed. Safe to run more than once.
+
+Run from the api directory:
+    python -m scripts.backfill_username_index
+"""
+import asyncio
+import logging
+
+from models.user import UserInDB
+from repositories.cosmos_repository import (
+    UserDB,
+    create_cosmos_client,
+    provision_containers
+)
+
+logger = logging.getLogger("journal")
+
+
+async def backfill() -> None:
+    indexed = skipped = 0
+    async with create_cosmos_client() as client:
+        containers = await provision_containers(client)
+        db = UserDB(containers.users)
+
+        async for user in db.iter_users():
+            if await db.index_username(UserInDB(**user)):
+                indexed += 1
+            else:
+                skipped += 1
+
+    logger.info(
+        "Username backfill finished: %s indexed, %s already indexed.",
+        indexed,
+        skipped
+    )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(backfill())
@@ -0,0 +1,106 @@
+"""
+Aggregates the request profiles saved by ProfilingMiddleware by route and
+prints where the time went: the hottest frames by self and total samples,
+split into time running on the event loop and time spent waiting.
+
+Run from the api directory:
+    python -m scripts.profile_report
+    python -m scripts.profile_report --route "GET /users/me/entries/all" --top 30
+    python -m scripts.profile_report --collapsed merged.collapsed
+The merged file can be opened in speedscope or fed to flamegraph.pl.
+"""
+import sys
+import argparse
+import statistics
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, List
+
+from middleware.profiling import PROFILE_DIR
+from utils.profiler import PROFILE_SUFFIX, parse_profile_filename
+
+
+def load_profiles(directory: Path, route: str | None) -> Dict[str, List[dict]]:
+    profiles = defaultdict(list)
+    for path in sorted(directory.glob(f"*{PROFILE_SUFFIX}")):
+        meta = parse_profile_filename(path.name)
+        if route is not None and meta["route"] != route:
+            continue
+
+        stacks = Counter()
+        for line in path.read_text().splitlines():
+            stack, _, count = line.rpartition(" ")
+            if stack:
+                stacks[stack] += int(count)
+        meta["stacks"] = stacks
+        profiles[meta["route"]].append(meta)
+    return profiles
+
+
+def frame_totals(stacks: Counter) -> tuple[Counter, Counter]:
+    """Samples per frame: as the leaf (self) and anywhere in the stack (total)."""
+    self_samples, total_samples = Counter(), Counter()
+    for stack, count in stacks.items():
+        frames = stack.split(";")
+        self_samples[frames[-1]] += count
+        for frame in set(frames):
+            total_samples[frame] += count
+    return self_samples, total_samples
+
+
+def print_route(route: str, profiles: List[dict], top: int) -> None:
+    durations = [profile["duration_ms"] for profile in profiles]
+    stacks = sum((profile["stacks"] for profile in profiles), Counter())
+    samples = sum(stacks.values()) or 1
+    running = sum(count for stack, count in stacks.items() if stack.startswith("running"))
+
+    print(f"\n{route}")
+    print(
+        f"  profiles={len(profiles)} median={statistics.median(durations)}ms "
+        f"max={max(durations)}ms samples={samples} "
+        f"running={running / samples:.0%} waiting={1 - running / samples:.0%}"
+    )
+
+    self_samples, total_samples = frame_totals(stacks)
+    print(f"  {'self':>6} {'total':>6}  frame")
+    for frame, count in self_samples.most_common(top):
+        print(
+            f"  {count / samples:>6.1%} {total_samples[frame] / samples:>6.1%}  {frame}"
+        )
+
+
+def write_collapsed(profiles: Dict[str, List[dict]], output: Path) -> None:
+    """Merges every profile into one file with the route as the root frame."""
+    merged = Counter()
+    for route, route_profiles in profiles.items():
+        for profile in route_profiles:
+            for stack, count in profile["stacks"].items():
+                merged[f"{route};{stack}"] += count
+    output.write_text(
+        "".join(f"{stack} {count}\n" for stack, count in merged.most_common())
+    )
+    print(f"\nWrote {len(merged)} stacks to {output}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--dir", default=PROFILE_DIR, type=Path)
+    parser.add_argument("--route", help='e.g. "GET /users/me/entries/{entry_id}"')
+    parser.add_argument("--top", type=int, default=15, help="frames shown per route")
+    parser.add_argument("--collapsed", type=Path, help="also write a merged collapsed-stack file")
+    args = parser.parse_args()
+
+    profiles = load_profiles(args.dir, args.route)
+    if not profiles:
+        print(f"No profiles found in {args.dir}")
+        return 1
+
+    for route, route_profiles in sorted(profiles.items()):
+        print_route(route, route_profiles, args.top)
+    if args.collapsed is not None:
+        write_collapsed(profiles, args.collapsed)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
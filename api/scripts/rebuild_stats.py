@@ -0,0 +1,103 @@
+"""
+Recomputes every user's journal stats from the entry container's change
+feed and overwrites the aggregate documents. Each feed range holds whole
+partitions (users), so ranges are read in parallel and each one is
+aggregated on its own. Users with stats but no entries left get their
+stats reset.
+
+Run it once after enabling stats, and whenever they may have drifted.
+Counts changed by requests while a range is being read can be off until
+the next entry write or rebuild, so prefer a quiet period.
+
+Run from the api directory:
+    python -m scripts.rebuild_stats --concurrency 8
+"""
+import asyncio
+import argparse
+import logging
+from collections import Counter, defaultdict
+from typing import Any, Dict, Set
+
+from azure.cosmos.aio import ContainerProxy
+
+from repositories.cosmos_repository import (
+    StatsDB,
+    create_cosmos_client,
+    provision_containers
+)
+from utils.timestamps import created_day
+
+logger = logging.getLogger("journal")
+
+
+async def rebuild_range(
+        entries: ContainerProxy,
+        stats_db: StatsDB,
+        feed_range: Dict[str, Any],
+        semaphore: asyncio.Semaphore
+) -> Set[str]:
+    """
+    Aggregates one feed range, writes the stats of its users and returns
+    their ids.
+    """
+    async with semaphore:
+        day_counts: Dict[str, Counter] = defaultdict(Counter)
+        # The latest-version change feed from the beginning holds the
+        # current version of every entry that still exists.
+        changes = entries.query_items_change_feed(
+            feed_range=feed_range,
+            start_time="Beginning"
+        )
+        async for entry in changes:
+            day_counts[entry["user_id"]][created_day(entry["created_at"])] += 1
+
+        for user_id, counts in day_counts.items():
+            await stats_db.replace_stats(user_id, dict(counts))
+        return set(day_counts)
+
+
+async def reset_unseen(stats_db: StatsDB, seen: Set[str]) -> int:
+    """
+    Resets the stats of users the change feed had no entries for, e.g.
+    when a delete's stats update failed after the last entry was removed.
+    """
+    reset = 0
+    async for user_id in stats_db.iter_user_ids():
+        if user_id not in seen:
+            await stats_db.replace_stats(user_id, {})
+            reset += 1
+    return reset
+
+
+async def rebuild(concurrency: int) -> None:
+    async with create_cosmos_client() as client:
+        containers = await provision_containers(client)
+        stats_db = StatsDB(containers.stats)
+
+        feed_ranges = [
+            feed_range
+            async for feed_range in containers.entries.read_feed_ranges()
+        ]
+        semaphore = asyncio.Semaphore(concurrency)
+        users = await asyncio.gather(*(
+            rebuild_range(containers.entries, stats_db, feed_range, semaphore)
+            for feed_range in feed_ranges
+        ))
+        seen = set().union(*users)
+        reset = await reset_unseen(stats_db, seen)
+
+    logger.info(
+        "Stats rebuild finished: %s users across %s feed ranges, %s reset.",
+        len(seen),
+        len(feed_ranges),
+        reset
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(rebuild(args.concurrency))
@@ -4,26 +4,25 @@ import logging
 from datetime import datetime, timedelta
 
 import jwt
-import bcrypt
 
 from models.user import UserInDB
-from repositories.cosmos_repository import UserDB
+from repositories.interface_repository import UserDatabaseInterface
+from services.password_hasher import PasswordHasher
+from services.token_service import SECRET_KEY, ALGORITHM
 from exceptions import IncorrectCredentials, UserAlreadyExists, WeakPassword
 
 logger = logging.getLogger("journal")
 
-SALT_ROUNDS = 10
-SECRET_KEY = os.getenv("SECRET_KEY")
-ALGORITHM = os.getenv("ALGORITHM")
 TOKEN_EXPIRE_MINUTES = int(os.getenv("TOKEN_EXPIRE_MINUTES"))
-if not (SECRET_KEY and ALGORITHM and TOKEN_EXPIRE_MINUTES):
+if not TOKEN_EXPIRE_MINUTES:
     logger.critical("Environment variables not loaded.")
     raise ValueError("Environment variables not loaded.")
 
 
 class AuthService():
-    def __init__(self, db: UserDB):
+    def __init__(self, db: UserDatabaseInterface, hasher: PasswordHasher):
         self.db = db
+        self.hasher = hasher
         logger.debug("Initialized authentication service")
     
     async def get_user(self, username: str) -> UserInDB | None:
@@ -52,35 +51,36 @@ class AuthService():
                 "one lowercase, uppercase letter, number and special character."
             )
     
-    def hash_password(self, plain_password: str) -> str:
-        return bcrypt.hashpw(plain_password.encode('utf-8'), bcrypt.gensalt(SALT_ROUNDS))
+    async def hash_password(self, plain_password: str) -> str:
+        return await self.hasher.hash(plain_password)
     
-    def verify_password(self, plain_password: str, hashed_password: str) -> bool:
-        return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
+    async def verify_password(self, plain_password: str, hashed_password: str) -> bool:
+        return await self.hasher.verify(plain_password, hashed_password)
     
     async def register_user(self, username: str, password: str) -> bool:
-        existing_user = await self.get_user(username)
-    
-        if existing_user is None:
-            logger.debug("Username %s is available.", username)
-            
-            self.check_password_strength(password)
-            hashed_password = self.hash_password(password)
-            enriched_user = UserInDB(
-                username= username,
-                hashed_password= hashed_password
-            )
+        self.check_password_strength(password)
+        # Rejected before hashing, so taken names can't tie up the hash pool.
+        if await self.db.username_taken(username):
+            logger.error("Username %s is taken.", username)
+            raise UserAlreadyExists(f"Username {username} is not available.")
+
+        hashed_password = await self.hash_password(password)
+        enriched_user = UserInDB(
+            username= username,
+            hashed_password= hashed_password
+        )
 
-            await self.db.register_user(enriched_user)
+        # The atomic claim catches a registration that raced this one.
+        if await self.db.register_user(enriched_user):
             logger.info("User %s was successfully registered.", username)
             return True
-        else:
-            logger.error("Username %s is taken.", username)
-            raise UserAlreadyExists(f"Username {username} is not available.")
+
+        logger.error("Username %s is taken.", username)
+        raise UserAlreadyExists(f"Username {username} is not available.")
 
     async def authenticate_user(self, username: str, password: str) -> UserInDB:
         user = await self.get_user(username)
-        if not (user and self.verify_password(password, user.hashed_password)):
+        if not (user and await self.verify_password(password, user.hashed_password)):
             logger.error("Incorrect username or password")
             raise IncorrectCredentials("Incorrect username or password")
         logger.info("User %s has logged in successfully.", username)
@@ -92,12 +92,4 @@ class AuthService():
         to_encode.update({"exp": expire})
         encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
         logger.debug("Token issued successfully.")
-        return encoded_jwt
-
-    async def get_current_user(self, token: str) -> str:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id = payload.get("sub", None)
-        if user_id is None:
-            logger.error("Incorrect username or password")
-            raise IncorrectCredentials("Incorrect username or password")
-        return user_id
\ No newline at end of file
+        return encoded_jwt
\ No newline at end of file
@@ -0,0 +1,118 @@
+import os
+import logging
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional
+
+from dotenv import load_dotenv
+
+from utils.ttl_cache import TTLCache
+
+load_dotenv()
+logger = logging.getLogger("journal")
+
+ENTRY_CACHE_SIZE = int(os.getenv("ENTRY_CACHE_SIZE", "10000"))
+ENTRY_CACHE_TTL = float(os.getenv("ENTRY_CACHE_TTL", "60"))
+# Write generations are kept per stripe of users rather than per user, so
+# they take fixed memory. Users sharing a stripe only skip each other's fills.
+GENERATION_STRIPES = 1024
+
+
+class EntryCache(ABC):
+    """
+    Read-through cache for stored entries, keyed by (user_id, entry_id).
+    Cached values are the stored documents, so they keep their `_etag`.
+
+    Every write to a user's entries bumps the user's write generation. A
+    read that loaded an entry from the database fills the cache with it
+    only if the generation it saw before loading is still current, so a
+    read that raced a write can't cache the document from before it.
+
+    Methods are async so a shared backend (e.g. Redis) can implement them.
+    """
+    @abstractmethod
+    async def get(self, user_id: str, entry_id: str) -> Optional[Dict[str, Any]]:
+        pass
+
+    @abstractmethod
+    async def set(self, user_id: str, entry_id: str, entry: Dict[str, Any]) -> None:
+        pass
+
+    @abstractmethod
+    async def invalidate(self, user_id: str, entry_id: str) -> None:
+        pass
+
+    @abstractmethod
+    async def generation(self, user_id: str) -> int:
+        """Returns the user's write generation, to pass to `fill`."""
+        pass
+
+    @abstractmethod
+    async def bump(self, user_id: str) -> None:
+        """Starts a new write generation for the user."""
+        pass
+
+    @abstractmethod
+    async def fill(
+            self,
+            user_id: str,
+            entry_id: str,
+            entry: Dict[str, Any],
+            generation: int
+    ) -> bool:
+        """
+        Caches an entry loaded from the database, unless the user's
+        generation moved past `generation`. Returns whether it was cached.
+        """
+        pass
+
+    @abstractmethod
+    def stats(self) -> Dict[str, int]:
+        pass
+
+
+class InMemoryEntryCache(EntryCache):
+    def __init__(
+            self,
+            max_size: int = ENTRY_CACHE_SIZE,
+            ttl: float = ENTRY_CACHE_TTL
+    ) -> None:
+        self._cache = TTLCache(max_size=max_size, ttl=ttl)
+        self._generations = [0] * GENERATION_STRIPES
+        logger.debug("Initialized in-memory entry cache")
+
+    async def get(self, user_id: str, entry_id: str) -> Optional[Dict[str, Any]]:
+        entry = self._cache.get((user_id, entry_id))
+        # Hand out copies so callers can't mutate the cached document.
+        return dict(entry) if entry is not None else None
+
+    async def set(self, user_id: str, entry_id: str, entry: Dict[str, Any]) -> None:
+        self._cache.set((user_id, entry_id), dict(entry))
+
+    async def invalidate(self, user_id: str, entry_id: str) -> None:
+        self._cache.pop((user_id, entry_id))
+
+    async def generation(self, user_id: str) -> int:
+        return self._generations[hash(user_id) % GENERATION_STRIPES]
+
+    async def bump(self, user_id: str) -> None:
+        self._generations[hash(user_id) % GENERATION_STRIPES] += 1
+
+    async def fill(
+            self,
+            user_id: str,
+            entry_id: str,
+            entry: Dict[str, Any],
+            generation: int
+    ) -> bool:
+        if await self.generation(user_id) != generation:
+            return False
+        await self.set(user_id, entry_id, entry)
+        return True
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self._cache.hits,
+            "misses": self._cache.misses,
+            "evictions": self._cache.evictions,
+            "size": len(self._cache),
+        }
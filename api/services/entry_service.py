@@ -1,67 +1,419 @@
 import logging
-from typing import Any, Dict, List
+from collections import Counter
+from typing import Any, AsyncIterator, Awaitable, Dict, List, Optional, Tuple, TypeVar
 from datetime import datetime
 
-from models.entry import InputEntry, EnrichedEntry
-from repositories.cosmos_repository import CosmosDB
+from models.entry import InputEntry, EnrichedEntry, ENTRY_FIELDS, SUMMARY_FIELDS
+from repositories.interface_repository import (
+    DatabaseInterface,
+    StatsDatabaseInterface
+)
+from services.entry_cache import EntryCache
+from services.search_index import SearchIndex, LOAD_PAGE_SIZE
+from services.single_flight import SingleFlight
+from utils.cursor import decode_cursor, encode_cursor
 from utils.decorator import log_service_call
+from utils.etag import collection_etag, etag_matches
+from utils.fast_json import dumps
+from utils.timestamps import created_day, created_timestamp
+from exceptions import EntryNotFoundError
 
 logger = logging.getLogger("journal")
 
+T = TypeVar("T")
+
+
+def summarize_entry(entry: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Shapes a stored entry into the summary returned by list endpoints.
+    Entries were validated when they were written, so the fields are
+    copied rather than run through the model again.
+    """
+    return {field: entry[field] for field in SUMMARY_FIELDS}
+
+
+def present_entry(entry: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Shapes a stored entry into the full entry returned by the API, without
+    validating it again. Older entries may lack the Unix timestamps, which
+    are derived here as EnrichedEntry would.
+    """
+    shaped = {field: entry.get(field) for field in ENTRY_FIELDS}
+    if shaped["created_ts"] is None:
+        shaped["created_ts"] = created_timestamp(shaped["created_at"])
+    if shaped["updated_ts"] is None:
+        shaped["updated_ts"] = created_timestamp(shaped["updated_at"])
+    return shaped
+
 
 class EntryService:
-    def __init__(self, db: CosmosDB):
+    def __init__(
+            self,
+            db: DatabaseInterface,
+            cache: EntryCache,
+            search_index: SearchIndex,
+            stats_db: StatsDatabaseInterface,
+            reads: SingleFlight
+    ):
         self.db = db
-        logger.debug("EntryService initialized with CosmosDB.")
+        self.cache = cache
+        self.search_index = search_index
+        self.stats_db = stats_db
+        self.reads = reads
+        logger.debug("EntryService initialized with %s.", type(db).__name__)
+
+    async def _read_entry(self, entry_id: str, user_id: str) -> Dict[str, Any]:
+        """Reads an entry through the cache, sharing concurrent misses"""
+        entry = await self.cache.get(user_id, entry_id)
+        if entry is None:
+            entry = await self.reads.do(
+                user_id,
+                ("get_entry", entry_id),
+                lambda: self._load_entry(entry_id, user_id)
+            )
+        return entry
+
+    async def _load_entry(self, entry_id: str, user_id: str) -> Dict[str, Any]:
+        # Taken before the read, so a write landing meanwhile stops the fill.
+        generation = await self.cache.generation(user_id)
+        entry = dict(await self.db.get_entry(entry_id, user_id))
+        await self.cache.fill(user_id, entry_id, entry, generation)
+        return entry
+
+    async def _write(self, user_id: str, write: Awaitable[T]) -> T:
+        """
+        Runs a write to the user's partition. Reads in flight may have
+        missed it, so they don't fill the cache and later reads don't join
+        them, even if the write failed after being applied.
+        """
+        try:
+            return await write
+        finally:
+            await self.cache.bump(user_id)
+            self.reads.forget(user_id)
+
+    async def _record_stats(self, user_id: str, day_counts: Dict[str, int]) -> None:
+        """
+        Applies entry count changes to the user's stats. The entry write has
+        already succeeded, so a failure here is only logged;
+        scripts/rebuild_stats corrects any drift.
+        """
+        day_counts = {day: count for day, count in day_counts.items() if count}
+        if not day_counts:
+            return
+        try:
+            await self.stats_db.increment_stats(user_id, day_counts)
+        except Exception:
+            logger.warning("Couldn't update journal stats for %s", user_id, exc_info=True)
 
     @log_service_call("create entry")
     async def create_entry(self, entry_data: InputEntry, user_id: str) -> None:
-        enriched_entry = EnrichedEntry(**entry_data.model_dump())
-        enriched_entry_dict = enriched_entry.model_dump()
+        enriched_entry_dict = EnrichedEntry.new_document(entry_data)
         enriched_entry_dict['user_id'] = user_id
         
-        await self.db.create_entry(enriched_entry_dict)
+        stored_entry = await self._write(
+            user_id,
+            self.db.create_entry(enriched_entry_dict)
+        )
+        await self.cache.set(user_id, stored_entry["id"], stored_entry)
+        await self.search_index.add(user_id, stored_entry)
+        await self._record_stats(user_id, {created_day(stored_entry["created_at"]): 1})
         logger.info(
             "Successfully created entry: %s for %s", 
-            enriched_entry_dict, 
+            enriched_entry_dict["id"], 
             user_id
         )
     
     @log_service_call("retrieve all entries")
-    async def get_all_entries(self, user_id: str) -> List[Dict[str, Any]]:
-        raw_entries = await self.db.get_all_entries(user_id)
+    async def get_all_entries(
+        self,
+        user_id: str,
+        if_none_match: Optional[str] = None
+    ) -> Tuple[Optional[List[Dict[str, Any]]], str]:
+        """
+        Returns the entry summaries and the collection ETag, both from one
+        query. When `if_none_match` matches the ETag the summaries aren't
+        built, and None is returned in their place. Concurrent callers
+        share the query and each shapes its own response.
+        """
+        raw_entries = await self.reads.do(
+            user_id,
+            ("get_all_entries",),
+            # Only what the summaries and the ETag need.
+            lambda: self.db.get_all_entries(user_id, SUMMARY_FIELDS + ("_etag",))
+        )
         logger.info("Successfully retrieved all entries for %s", user_id)
 
-        return [
-            EnrichedEntry(**entry).model_dump(exclude=["created_at", "updated_at"])
-            for entry in raw_entries
-        ]
+        etag = collection_etag(
+            (entry["id"], entry["_etag"]) for entry in raw_entries
+        )
+        if if_none_match and etag_matches(if_none_match, etag):
+            return None, etag
+        return [summarize_entry(entry) for entry in raw_entries], etag
+
+    @log_service_call("retrieve a page of entries")
+    async def get_entries_page(
+        self,
+        user_id: str,
+        limit: int,
+        cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        continuation_token = decode_cursor(cursor, "all") if cursor else None
+        raw_entries, continuation_token = await self.db.get_entries_page(
+            user_id,
+            limit,
+            continuation_token
+        )
+        logger.info("Successfully retrieved a page of entries for %s", user_id)
+
+        return {
+            "entries": [summarize_entry(entry) for entry in raw_entries],
+            "next_cursor": encode_cursor(continuation_token, "all"),
+        }
+
+    @log_service_call("query entries by date")
+    async def query_entries(
+        self,
+        user_id: str,
+        limit: int,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        descending: bool = True,
+        cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Returns one page of full entries created in [start, end), newest
+        first unless `descending` is False. Naive datetimes are read as
+        server local time, like created_at.
+        """
+        start_ts = int(start.timestamp()) if start else None
+        end_ts = int(end.timestamp()) if end else None
+        # A continuation token only resumes the query that issued it.
+        scope = f"query:{start_ts}:{end_ts}:{descending}"
+        continuation_token = decode_cursor(cursor, scope) if cursor else None
+        raw_entries, continuation_token = await self.db.query_entries(
+            user_id,
+            limit,
+            start_ts,
+            end_ts,
+            descending,
+            continuation_token,
+            ENTRY_FIELDS
+        )
+        logger.info("Successfully queried entries by date for %s", user_id)
+
+        return {
+            "entries": [present_entry(entry) for entry in raw_entries],
+            "next_cursor": encode_cursor(continuation_token, scope),
+        }
+
+    async def stream_entries(
+        self,
+        user_id: str,
+        page_size: int
+    ) -> AsyncIterator[bytes]:
+        """
+        Yields entries as NDJSON lines while pages arrive from the database,
+        without buffering the whole result set.
+        """
+        try:
+            async for entry in self.db.iter_entries(user_id, page_size):
+                yield dumps(summarize_entry(entry)) + b"\n"
+        except Exception:
+            # Headers are already sent, so the error can only be logged.
+            logger.exception("Couldn't stream entries for %s", user_id)
+            raise
+        logger.info("Successfully streamed all entries for %s", user_id)
+
+    @log_service_call("search entries")
+    async def search_entries(
+        self,
+        user_id: str,
+        query: str,
+        limit: int
+    ) -> List[Dict[str, Any]]:
+        """Returns the best matching entry summaries, each with its score"""
+        results = await self.search_index.search(
+            user_id,
+            query,
+            limit,
+            lambda: self.db.iter_entries(user_id, LOAD_PAGE_SIZE)
+        )
+        logger.info("Found %s entries matching the search for %s", len(results), user_id)
+        return results
     
     @log_service_call("retrieve entry")
-    async def get_entry(self, entry_id: str, user_id: str) -> Dict[str, Any]:
-        entry = dict(await self.db.get_entry(entry_id, user_id))
+    async def get_entry(
+        self,
+        entry_id: str,
+        user_id: str
+    ) -> Tuple[Dict[str, Any], str]:
+        """Returns the entry and its ETag"""
+        entry = await self._read_entry(entry_id, user_id)
         logger.info("Successfully retrieved entry %s for %s", entry_id, user_id)
-        return EnrichedEntry(**entry).model_dump()
+        return present_entry(entry), entry["_etag"]
+
+    @log_service_call("retrieve entry etag")
+    async def get_entry_etag(self, entry_id: str, user_id: str) -> str:
+        """Gets the ETag from the cache, or from a metadata-only read"""
+        entry = await self.cache.get(user_id, entry_id)
+        if entry is not None:
+            return entry["_etag"]
+
+        etag = await self.reads.do(
+            user_id,
+            ("get_entry_etag", entry_id),
+            lambda: self.db.get_entry_etag(entry_id, user_id)
+        )
+        if etag is None:
+            logger.warning("Couldn't retrieve entry etag. Entry %s not found", entry_id)
+            raise EntryNotFoundError("Entry not found.")
+        return etag
 
     @log_service_call("update entry")
     async def update_entry(
         self, 
         entry_id: str, 
         updated_data: InputEntry, 
-        user_id: str
-    ) -> None:
-        entry = await self.db.get_entry(entry_id, user_id)
+        user_id: str,
+        etag: Optional[str] = None
+    ) -> str:
+        """
+        Sends only the non-blank fields in a single partial update and
+        returns the new ETag. A stale `etag` fails with EntryConflictError.
+        """
         updated_data_dict = updated_data.model_dump()
-        
-        for field in ["work", "struggle", "intention"]:
-            if updated_data_dict[field].strip():
-                entry[field] = updated_data_dict[field]
-        
-        entry["updated_at"] = datetime.now().isoformat("#", "seconds")
-        await self.db.update_entry(entry_id, entry)
+        updated_fields = {
+            field: updated_data_dict[field]
+            for field in ["work", "struggle", "intention"]
+            if updated_data_dict[field].strip()
+        }
+        updated_at = datetime.now().isoformat("#", "seconds")
+        updated_fields["updated_at"] = updated_at
+        updated_fields["updated_ts"] = created_timestamp(updated_at)
+
+        try:
+            stored_entry = await self._write(
+                user_id,
+                self.db.update_entry(entry_id, user_id, updated_fields, etag)
+            )
+        except Exception:
+            await self.cache.invalidate(user_id, entry_id)
+            raise
+        await self.cache.set(user_id, entry_id, stored_entry)
+        await self.search_index.add(user_id, stored_entry)
         logger.info("Successfully updated entry %s for %s", entry_id, user_id)
+        return stored_entry["_etag"]
     
     @log_service_call("delete entry")
     async def delete_entry(self, entry_id: str, user_id: str) -> None:
-        await self.db.delete_entry(entry_id, user_id)
-        logger.info("Successfully deleted entry %s for %s", entry_id, user_id)
\ No newline at end of file
+        # The stats need the entry's day, which the delete doesn't return.
+        entry = await self.cache.get(user_id, entry_id)
+        if entry is not None:
+            created_at = entry["created_at"]
+        else:
+            created_at = (await self.db.get_created_at(user_id, [entry_id])).get(entry_id)
+        try:
+            await self._write(user_id, self.db.delete_entry(entry_id, user_id))
+        finally:
+            await self.cache.invalidate(user_id, entry_id)
+        await self.search_index.remove(user_id, entry_id)
+        if created_at is not None:
+            await self._record_stats(user_id, {created_day(created_at): -1})
+        logger.info("Successfully deleted entry %s for %s", entry_id, user_id)
+
+    @log_service_call("create entries in bulk")
+    async def create_entries(
+        self,
+        entries_data: List[InputEntry],
+        user_id: str
+    ) -> List[Dict[str, Any]]:
+        """Creates many entries at once and returns a status per entry"""
+        enriched_entries = []
+        for entry_data in entries_data:
+            enriched_entry_dict = EnrichedEntry.new_document(entry_data)
+            enriched_entry_dict['user_id'] = user_id
+            enriched_entries.append(enriched_entry_dict)
+
+        results = await self._write(
+            user_id,
+            self.db.create_entries(user_id, enriched_entries)
+        )
+        created_days = Counter()
+        for entry, result in zip(enriched_entries, results):
+            if result["status_code"] == 201:
+                await self.search_index.add(user_id, entry)
+                created_days[created_day(entry["created_at"])] += 1
+        await self._record_stats(user_id, created_days)
+        logger.info("Created %s entries in bulk for %s", len(results), user_id)
+        return results
+
+    @log_service_call("delete entries in bulk")
+    async def delete_entries(
+        self,
+        entry_ids: List[str],
+        user_id: str
+    ) -> List[Dict[str, Any]]:
+        """Deletes many entries at once and returns a status per entry"""
+        created_at = await self.db.get_created_at(user_id, entry_ids)
+        try:
+            results = await self._write(
+                user_id,
+                self.db.delete_entries(user_id, entry_ids)
+            )
+        finally:
+            for entry_id in entry_ids:
+                await self.cache.invalidate(user_id, entry_id)
+        deleted_days = Counter()
+        for result in results:
+            if result["status_code"] == 204:
+                await self.search_index.remove(user_id, result["id"])
+                if result["id"] in created_at:
+                    deleted_days[created_day(created_at[result["id"]])] -= 1
+        await self._record_stats(user_id, deleted_days)
+        logger.info("Deleted %s entries in bulk for %s", len(results), user_id)
+        return results
+
+    @log_service_call("delete all entries")
+    async def delete_all_entries(self, user_id: str) -> Tuple[int, List[str]]:
+        """
+        Returns how many entries were deleted and the ids of those that
+        couldn't be, which stay in search and in the stats.
+        """
+        results = await self._write(user_id, self.db.delete_all_entries(user_id))
+        deleted_ids = [
+            result["id"] for result in results if result["status_code"] == 204
+        ]
+        failed_ids = [
+            result["id"] for result in results if result["status_code"] != 204
+        ]
+        for entry_id in deleted_ids:
+            await self.cache.invalidate(user_id, entry_id)
+
+        if not failed_ids:
+            await self.search_index.remove_all(user_id)
+            try:
+                await self.stats_db.replace_stats(user_id, {})
+            except Exception:
+                logger.warning("Couldn't reset journal stats for %s", user_id, exc_info=True)
+            logger.info("Deleted all %s entries for %s", len(deleted_ids), user_id)
+            return len(deleted_ids), failed_ids
+
+        for entry_id in deleted_ids:
+            await self.search_index.remove(user_id, entry_id)
+        try:
+            # The entries left are the whole journal now, so they are the stats.
+            created_at = await self.db.get_created_at(user_id, failed_ids)
+            await self.stats_db.replace_stats(
+                user_id,
+                Counter(created_day(value) for value in created_at.values())
+            )
+        except Exception:
+            logger.warning("Couldn't update journal stats for %s", user_id, exc_info=True)
+        logger.warning(
+            "Deleted %s entries for %s, %s couldn't be deleted",
+            len(deleted_ids),
+            user_id,
+            len(failed_ids)
+        )
+        return len(deleted_ids), failed_ids
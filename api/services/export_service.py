@@ -0,0 +1,355 @@
+import os
+import gzip
+import json
+import uuid
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from time import time
+from typing import Any, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+from repositories.interface_repository import DatabaseInterface
+from exceptions import ExportNotFound, ExportNotReady, ServiceOverloaded
+
+load_dotenv()
+logger = logging.getLogger("journal")
+
+EXPORT_DIR = os.getenv("EXPORT_DIR", "exports")
+EXPORT_WORKERS = int(os.getenv("EXPORT_WORKERS", "2"))
+EXPORT_MAX_PENDING = int(os.getenv("EXPORT_MAX_PENDING", "16"))
+EXPORT_PAGE_SIZE = int(os.getenv("EXPORT_PAGE_SIZE", "1000"))
+# Seconds a finished export stays available for download.
+EXPORT_RETENTION = float(os.getenv("EXPORT_RETENTION", "86400"))
+# Seconds between sweeps that delete expired exports from disk.
+EXPORT_PRUNE_INTERVAL = float(os.getenv("EXPORT_PRUNE_INTERVAL", "600"))
+EXPORT_RETRY_AFTER = 5
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+DATA_SUFFIX = ".ndjson.gz"
+MANIFEST_SUFFIX = ".json"
+# Internal fields left out of exported entries, besides Cosmos' _ fields.
+EXCLUDED_FIELDS = ("user_id", "created_ts", "updated_ts")
+
+
+def export_entry(entry: Dict[str, Any]) -> Dict[str, Any]:
+    """Shapes a stored entry for export without validating it again."""
+    return {
+        field: value for field, value in entry.items()
+        if not field.startswith("_") and field not in EXCLUDED_FIELDS
+    }
+
+
+@dataclass
+class ExportJob:
+    """
+    An export and its checkpoint: the continuation token of the next page
+    and the size of the file once the pages before it were written.
+    """
+    id: str
+    user_id: str
+    status: str
+    created_at: str
+    finished_at: Optional[str] = None
+    finished_ts: Optional[float] = None
+    entries: int = 0
+    size: int = 0
+    continuation_token: Optional[str] = None
+
+    def public(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "status": self.status,
+            "entries": self.entries,
+            "size_bytes": self.size,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class ExportStore:
+    """
+    Keeps each export as a gzip file and a JSON manifest holding its
+    checkpoint. Blocking; run it off the event loop.
+
+    Every page is appended as its own gzip member. Concatenated members are
+    still one valid gzip file, so a page is durable on its own: the data is
+    fsynced before the manifest is replaced, and a resumed export first
+    truncates whatever was written after the last checkpoint.
+    """
+    def __init__(self, directory: str) -> None:
+        self.directory = Path(directory)
+
+    def data_path(self, job_id: str) -> Path:
+        return self.directory / f"{job_id}{DATA_SUFFIX}"
+
+    def _manifest_path(self, job_id: str) -> Path:
+        return self.directory / f"{job_id}{MANIFEST_SUFFIX}"
+
+    def save(self, job: Dict[str, Any]) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._manifest_path(job["id"])
+        temporary = path.with_suffix(".tmp")
+        temporary.write_text(json.dumps(job))
+        os.replace(temporary, path)
+
+    def append_page(self, job: Dict[str, Any], entries: List[Dict[str, Any]]) -> int:
+        """
+        Appends a page at the job's checkpoint, saves the job with the new
+        size and returns it.
+        """
+        body = "".join(
+            json.dumps(export_entry(entry)) + "\n" for entry in entries
+        ).encode("utf-8")
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.data_path(job["id"])
+        with open(path, "r+b" if path.exists() else "wb") as f:
+            f.truncate(job["size"])
+            f.seek(job["size"])
+            # An empty export still gets one member, so it is valid gzip.
+            if body or not job["size"]:
+                f.write(gzip.compress(body))
+            f.flush()
+            os.fsync(f.fileno())
+            job["size"] = f.tell()
+        self.save(job)
+        return job["size"]
+
+    def load_all(self) -> List[ExportJob]:
+        if not self.directory.exists():
+            return []
+        jobs = []
+        for path in self.directory.glob(f"*{MANIFEST_SUFFIX}"):
+            try:
+                jobs.append(ExportJob(**json.loads(path.read_text())))
+            except (OSError, ValueError, TypeError) as e:
+                logger.warning("Skipping unreadable export manifest %s: %s", path, e)
+        return jobs
+
+    def delete(self, job_id: str) -> None:
+        self.data_path(job_id).unlink(missing_ok=True)
+        self._manifest_path(job_id).unlink(missing_ok=True)
+
+
+class ExportService:
+    """
+    Runs full-account exports in the background and keeps the files on
+    local disk for download.
+
+    `workers` tasks take jobs from a queue and read the user's partition
+    one page at a time. Encoding, compression and disk writes run on a
+    thread pool of the same size, so an export holds one page in memory
+    and never blocks the event loop. Each page is checkpointed, and jobs
+    interrupted by a shutdown resume from their last continuation token on
+    the next start. A failed job resumes the same way when the user asks
+    for an export again.
+
+    Finished exports expire after `retention` seconds. They stop being
+    served right away, and a sweep every `prune_interval` seconds deletes
+    their files.
+
+    Jobs live on this process's disk, so with several app processes the
+    export routes must reach the one that started the job.
+    """
+    def __init__(
+            self,
+            db: DatabaseInterface,
+            directory: str = EXPORT_DIR,
+            workers: int = EXPORT_WORKERS,
+            max_pending: int = EXPORT_MAX_PENDING,
+            page_size: int = EXPORT_PAGE_SIZE,
+            retention: float = EXPORT_RETENTION,
+            prune_interval: float = EXPORT_PRUNE_INTERVAL
+    ) -> None:
+        self.db = db
+        self.store = ExportStore(directory)
+        self.page_size = page_size
+        self.retention = retention
+        self.prune_interval = prune_interval
+        self._workers = workers
+        self._capacity = workers + max_pending
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers,
+            thread_name_prefix="export"
+        )
+        self._queue: asyncio.Queue[ExportJob] = asyncio.Queue()
+        self._tasks: List[asyncio.Task] = []
+        self._jobs: Dict[str, ExportJob] = {}
+        # The latest job of each user.
+        self._latest: Dict[str, str] = {}
+        # Jobs queued or running. Only touched from the event loop thread.
+        self._active = 0
+
+    async def start(self) -> None:
+        """
+        Loads saved jobs, requeues the interrupted ones and starts the
+        workers and the sweep of expired exports.
+        """
+        loop = asyncio.get_running_loop()
+        jobs = await loop.run_in_executor(self._executor, self.store.load_all)
+        for job in sorted(jobs, key=lambda job: job.created_at):
+            self._jobs[job.id] = job
+            self._latest[job.user_id] = job.id
+            if job.status in (QUEUED, RUNNING):
+                logger.info("Resuming export %s after %s entries", job.id, job.entries)
+                self._enqueue(job)
+
+        self._tasks = [
+            asyncio.create_task(self._work()) for _ in range(self._workers)
+        ]
+        self._tasks.append(asyncio.create_task(self._prune_periodically()))
+
+    def shutdown(self) -> None:
+        """Stops the workers. Running jobs resume from their checkpoint on the next start."""
+        for task in self._tasks:
+            task.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _enqueue(self, job: ExportJob) -> None:
+        job.status = QUEUED
+        self._active += 1
+        self._queue.put_nowait(job)
+
+    async def submit(self, user_id: str) -> Dict[str, Any]:
+        """
+        Starts an export of the user's entries. Returns the user's export
+        that is already underway instead of starting another, and resumes it
+        if it failed.
+        """
+        await self._prune()
+
+        job = self._jobs.get(self._latest.get(user_id, ""))
+        if job is not None and job.status in (QUEUED, RUNNING):
+            return job.public()
+
+        if self._active >= self._capacity:
+            logger.warning("Export queue is full. Rejecting request.")
+            raise ServiceOverloaded(
+                "Too many exports are running. Please try again shortly.",
+                retry_after=EXPORT_RETRY_AFTER
+            )
+
+        if job is not None and job.status == FAILED:
+            logger.info("Resuming failed export %s for %s", job.id, user_id)
+        else:
+            job = ExportJob(
+                id=str(uuid.uuid4()),
+                user_id=user_id,
+                status=QUEUED,
+                created_at=datetime.now().isoformat("#", "seconds")
+            )
+            self._jobs[job.id] = job
+            self._latest[user_id] = job.id
+
+        job.status = QUEUED
+        self._active += 1
+        try:
+            # Saved before a worker can pick the job up, so this snapshot
+            # can't overwrite a later checkpoint.
+            await self._save(job)
+        except BaseException:
+            job.status = FAILED
+            self._active -= 1
+            raise
+        self._queue.put_nowait(job)
+        return job.public()
+
+    def get(self, user_id: str, job_id: str) -> Dict[str, Any]:
+        return self._job(user_id, job_id).public()
+
+    def download_path(self, user_id: str, job_id: str) -> Path:
+        job = self._job(user_id, job_id)
+        if job.status != DONE:
+            raise ExportNotReady(f"Export is {job.status}.")
+        return self.store.data_path(job.id)
+
+    def _job(self, user_id: str, job_id: str) -> ExportJob:
+        job = self._jobs.get(job_id)
+        # Expired exports may not have been swept yet.
+        if job is None or job.user_id != user_id or self._expired(job, time()):
+            raise ExportNotFound("Export not found.")
+        return job
+
+    def _expired(self, job: ExportJob, now: float) -> bool:
+        return job.finished_ts is not None and job.finished_ts < now - self.retention
+
+    async def _save(self, job: ExportJob) -> None:
+        await asyncio.get_running_loop().run_in_executor(
+            self._executor, self.store.save, asdict(job)
+        )
+
+    async def _prune(self) -> None:
+        """Deletes finished exports older than the retention period."""
+        now = time()
+        expired = [job for job in self._jobs.values() if self._expired(job, now)]
+        loop = asyncio.get_running_loop()
+        for job in expired:
+            del self._jobs[job.id]
+            if self._latest.get(job.user_id) == job.id:
+                del self._latest[job.user_id]
+            await loop.run_in_executor(self._executor, self.store.delete, job.id)
+
+    async def _prune_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.prune_interval)
+            try:
+                await self._prune()
+            except OSError:
+                logger.exception("Couldn't delete expired exports")
+
+    async def _work(self) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Export %s for %s failed", job.id, job.user_id)
+                job.status = FAILED
+                try:
+                    await self._save(job)
+                except OSError:
+                    logger.exception("Couldn't save export %s", job.id)
+            finally:
+                self._active -= 1
+
+    async def _run(self, job: ExportJob) -> None:
+        loop = asyncio.get_running_loop()
+        job.status = RUNNING
+        logger.info("Exporting entries for %s", job.user_id)
+
+        while True:
+            entries, continuation_token = await self.db.get_entries_page(
+                job.user_id,
+                self.page_size,
+                job.continuation_token
+            )
+            checkpoint = asdict(job)
+            checkpoint["entries"] += len(entries)
+            checkpoint["continuation_token"] = continuation_token
+            if continuation_token is None:
+                # Marked done in the same write as the last page, so a
+                # restart can't mistake a finished export for a new one.
+                checkpoint["status"] = DONE
+                checkpoint["finished_at"] = datetime.now().isoformat("#", "seconds")
+                checkpoint["finished_ts"] = time()
+
+            await loop.run_in_executor(
+                self._executor, self.store.append_page, checkpoint, entries
+            )
+            for field, value in checkpoint.items():
+                setattr(job, field, value)
+            if continuation_token is None:
+                break
+
+        logger.info("Exported %s entries for %s", job.entries, job.user_id)
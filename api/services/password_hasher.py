@@ -0,0 +1,114 @@
+import os
+import asyncio
+import logging
+from time import perf_counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Tuple
+
+import bcrypt
+from dotenv import load_dotenv
+
+from exceptions import ServiceOverloaded
+from utils.metrics import REGISTRY
+
+load_dotenv()
+logger = logging.getLogger("journal")
+
+SALT_ROUNDS = 10
+HASH_WORKERS = int(os.getenv("BCRYPT_WORKERS", str(min(4, os.cpu_count() or 1))))
+HASH_MAX_PENDING = int(os.getenv("BCRYPT_MAX_PENDING", "32"))
+HASH_RETRY_AFTER = int(os.getenv("BCRYPT_RETRY_AFTER", "1"))
+
+BCRYPT_DURATION = REGISTRY.histogram(
+    "bcrypt_duration_seconds",
+    "Time a bcrypt call spent running on a worker thread.",
+    ("operation",)
+)
+BCRYPT_WAIT = REGISTRY.histogram(
+    "bcrypt_queue_wait_seconds",
+    "Time a bcrypt call waited for a free worker thread.",
+    ("operation",)
+)
+
+
+def _timed(func: Callable[..., Any], *args: Any) -> Tuple[Any, float, float]:
+    """Runs on the worker thread and reports when it started and finished."""
+    started = perf_counter()
+    result = func(*args)
+    return result, started, perf_counter()
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt on a dedicated thread pool so hashing never blocks the event
+    loop. bcrypt releases the GIL, so threads give real parallelism here.
+
+    Admission is bounded: once every worker is busy and `max_pending` calls
+    are already waiting, new calls fail fast with ServiceOverloaded instead
+    of queueing without limit.
+    """
+    def __init__(
+            self,
+            max_workers: int = HASH_WORKERS,
+            max_pending: int = HASH_MAX_PENDING,
+            retry_after: int = HASH_RETRY_AFTER
+    ) -> None:
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="bcrypt"
+        )
+        self._capacity = max_workers + max_pending
+        self._retry_after = retry_after
+        # Only touched from the event loop thread, so no lock is needed.
+        self._in_flight = 0
+        logger.debug(
+            "Password hasher started with %s workers and %s pending slots.",
+            max_workers,
+            max_pending
+        )
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    async def _run(self, operation: str, func: Callable[..., Any], *args: Any) -> Any:
+        if self._in_flight >= self._capacity:
+            logger.warning("Password hasher is saturated. Rejecting request.")
+            raise ServiceOverloaded(
+                "Authentication is busy. Please try again shortly.",
+                retry_after=self._retry_after
+            )
+
+        self._in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            submitted = perf_counter()
+            result, started, finished = await loop.run_in_executor(
+                self._executor, _timed, func, *args
+            )
+            # Recorded here on the event loop, so the metrics need no lock.
+            BCRYPT_WAIT.labels(operation).observe(started - submitted)
+            BCRYPT_DURATION.labels(operation).observe(finished - started)
+            return result
+        finally:
+            self._in_flight -= 1
+
+    async def hash(self, plain_password: str) -> str:
+        hashed = await self._run(
+            "hash",
+            bcrypt.hashpw,
+            plain_password.encode('utf-8'),
+            bcrypt.gensalt(SALT_ROUNDS)
+        )
+        return hashed.decode('utf-8')
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(
+            "verify",
+            bcrypt.checkpw,
+            plain_password.encode('utf-8'),
+            hashed_password.encode('utf-8')
+        )
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
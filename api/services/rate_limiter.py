@@ -0,0 +1,85 @@
+import os
+import logging
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from time import monotonic
+from typing import Dict, List
+
+from dotenv import load_dotenv
+
+load_dotenv()
+logger = logging.getLogger("journal")
+
+# Clients whose token buckets are kept in memory. Evicting an idle
+# client's bucket only refills it early.
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+
+
+class RateLimitStore(ABC):
+    """
+    Keeps request budgets per client key: a token bucket for the request
+    rate and a count of requests in flight.
+
+    Methods are async so a shared backend (e.g. Redis) can implement them,
+    letting all workers enforce one budget.
+    """
+    @abstractmethod
+    async def take(self, key: str, rate: float, burst: int) -> float:
+        """
+        Takes a token from the key's bucket, which holds up to `burst`
+        tokens and refills at `rate` per second. Returns 0 when a token was
+        taken, otherwise the seconds until one is available.
+        """
+        pass
+
+    @abstractmethod
+    async def acquire(self, key: str, limit: int) -> bool:
+        """Counts a request in flight for the key, unless `limit` are already."""
+        pass
+
+    @abstractmethod
+    async def release(self, key: str) -> None:
+        pass
+
+
+class InMemoryRateLimitStore(RateLimitStore):
+    """
+    Budgets for this process only. With several workers, each one allows
+    the full budget.
+    """
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS) -> None:
+        self.max_keys = max_keys
+        # key -> [tokens, last refill], least recently used first.
+        self._buckets: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._in_flight: Dict[str, int] = {}
+        logger.debug("Initialized in-memory rate limit store")
+
+    async def take(self, key: str, rate: float, burst: int) -> float:
+        now = monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [float(burst), now]
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+            bucket[0] = min(float(burst), bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            return 0.0
+        return (1 - bucket[0]) / rate
+
+    async def acquire(self, key: str, limit: int) -> bool:
+        count = self._in_flight.get(key, 0)
+        if count >= limit:
+            return False
+        self._in_flight[key] = count + 1
+        return True
+
+    async def release(self, key: str) -> None:
+        count = self._in_flight.pop(key, 0) - 1
+        # Keys are dropped at zero, so the dict only holds active clients.
+        if count > 0:
+            self._in_flight[key] = count
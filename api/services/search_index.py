@@ -0,0 +1,342 @@
+import os
+import re
+import math
+import time
+import heapq
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from collections import Counter, OrderedDict
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Set
+
+from dotenv import load_dotenv
+
+load_dotenv()
+logger = logging.getLogger("journal")
+
+SEARCH_INDEX_MAX_USERS = int(os.getenv("SEARCH_INDEX_MAX_USERS", "1000"))
+# Each worker only sees its own writes. With several workers, set this so
+# an index older than it is rebuilt in the background, picking up other
+# workers' writes. 0 keeps an index until it is evicted.
+SEARCH_INDEX_TTL = float(os.getenv("SEARCH_INDEX_TTL", "0"))
+
+SEARCH_FIELDS = ("work", "struggle", "intention")
+# Page size used when loading a user's entries into a new index.
+LOAD_PAGE_SIZE = 1000
+# Standard BM25 parameters.
+K1 = 1.2
+B = 0.75
+
+_TOKEN = re.compile(r"\w+")
+# Words too common to help ranking. Dropping them keeps postings short.
+STOPWORDS = frozenset("""
+a an and are as at be but by do for from had has have i if in into is it
+its me my of on or so that the them then there these they this to was we
+were what when which will with you your
+""".split())
+# A postings list is reweighted once the average entry length has drifted
+# this much since its weights were computed.
+REWEIGHT_DRIFT = 0.1
+
+EntrySource = Callable[[], AsyncIterator[Dict[str, Any]]]
+
+
+def tokenize(text: str) -> List[str]:
+    return [
+        token for token in _TOKEN.findall(text.casefold())
+        if token not in STOPWORDS
+    ]
+
+
+class SearchIndex(ABC):
+    """
+    Full-text index over the searchable fields of each user's entries.
+    EntryService keeps it current on every write. An index that isn't
+    loaded yet is built from `source`, the user's partition, on first
+    search.
+
+    Methods are async so a shared backend can implement them.
+    """
+    @abstractmethod
+    async def search(
+        self,
+        user_id: str,
+        query: str,
+        limit: int,
+        source: EntrySource
+    ) -> List[Dict[str, Any]]:
+        pass
+
+    @abstractmethod
+    async def add(self, user_id: str, entry: Dict[str, Any]) -> None:
+        pass
+
+    @abstractmethod
+    async def remove(self, user_id: str, entry_id: str) -> None:
+        pass
+
+    @abstractmethod
+    async def remove_all(self, user_id: str) -> None:
+        pass
+
+
+class _Postings:
+    """
+    The entries containing a term, each with its BM25 term weight. Weights
+    depend on the average entry length, recorded in `average`.
+    """
+    __slots__ = ("weights", "average")
+
+    def __init__(self, average: float) -> None:
+        self.weights: Dict[str, float] = {}
+        self.average = average
+
+
+def _weight(frequency: int, length: int, average: float) -> float:
+    return frequency * (K1 + 1) / (frequency + K1 * (1 - B + B * length / average))
+
+
+class UserIndex:
+    """
+    An inverted index of one user's entries, ranked with BM25.
+
+    Term weights are computed when an entry is indexed, so a search only
+    multiplies them by the term's idf. A postings list is reweighted
+    lazily, when searched, if the average entry length has drifted.
+    """
+    def __init__(self) -> None:
+        self.postings: Dict[str, _Postings] = {}
+        self.term_counts: Dict[str, Counter] = {}
+        self.lengths: Dict[str, int] = {}
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.total_length = 0
+        self.built_at = time.monotonic()
+
+    @property
+    def average_length(self) -> float:
+        return (self.total_length / len(self.entries) if self.entries else 0) or 1
+
+    def add(self, entry: Dict[str, Any]) -> None:
+        entry_id = entry["id"]
+        self.remove(entry_id)
+
+        tokens = [
+            token
+            for field in SEARCH_FIELDS
+            for token in tokenize(entry.get(field) or "")
+        ]
+        length = len(tokens)
+        self.total_length += length
+        self.lengths[entry_id] = length
+        self.term_counts[entry_id] = term_counts = Counter(tokens)
+        self.entries[entry_id] = {
+            "id": entry_id,
+            **{field: entry.get(field) for field in SEARCH_FIELDS}
+        }
+
+        for term, frequency in term_counts.items():
+            postings = self.postings.get(term)
+            if postings is None:
+                postings = self.postings[term] = _Postings(self.average_length)
+            postings.weights[entry_id] = _weight(frequency, length, postings.average)
+
+    def remove(self, entry_id: str) -> None:
+        term_counts = self.term_counts.pop(entry_id, None)
+        if term_counts is None:
+            return
+
+        for term in term_counts:
+            weights = self.postings[term].weights
+            del weights[entry_id]
+            if not weights:
+                del self.postings[term]
+        self.total_length -= self.lengths.pop(entry_id)
+        del self.entries[entry_id]
+
+    def _current(self, term: str) -> _Postings:
+        postings = self.postings[term]
+        average = self.average_length
+        if abs(postings.average - average) > REWEIGHT_DRIFT * average:
+            postings.average = average
+            postings.weights = {
+                entry_id: _weight(
+                    self.term_counts[entry_id][term],
+                    self.lengths[entry_id],
+                    average
+                )
+                for entry_id in postings.weights
+            }
+        return postings
+
+    def search(self, terms: List[str], limit: int) -> List[Dict[str, Any]]:
+        """
+        Scores term by term, highest idf first. Once a term and all the
+        ones after it can't lift an unseen entry into the top `limit`, they
+        only add to entries already scored (MaxScore pruning), so common
+        words don't walk their whole postings list.
+        """
+        count = len(self.entries)
+        ranked = []
+        for term in set(terms):
+            if term not in self.postings:
+                continue
+            postings = self._current(term)
+            frequency = len(postings.weights)
+            idf = math.log(1 + (count - frequency + 0.5) / (frequency + 0.5))
+            ranked.append((idf * (K1 + 1), idf, postings.weights))
+        ranked.sort(key=lambda term: term[0], reverse=True)
+
+        scores: Dict[str, float] = {}
+        remaining = sum(bound for bound, _, _ in ranked)
+        for bound, idf, weights in ranked:
+            if len(scores) >= limit and remaining <= heapq.nlargest(limit, scores.values())[-1]:
+                for entry_id in scores:
+                    weight = weights.get(entry_id)
+                    if weight is not None:
+                        scores[entry_id] += idf * weight
+            elif not scores:
+                scores = {entry_id: idf * weight for entry_id, weight in weights.items()}
+            else:
+                for entry_id, weight in weights.items():
+                    scores[entry_id] = scores.get(entry_id, 0.0) + idf * weight
+            remaining -= bound
+
+        best = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+        return [
+            {**self.entries[entry_id], "score": round(score, 4)}
+            for entry_id, score in best
+        ]
+
+
+class _Build:
+    """An index being loaded, and the entries written while it loads."""
+    def __init__(self) -> None:
+        self.index = UserIndex()
+        self.touched: Set[str] = set()
+        self.task: Optional[asyncio.Future] = None
+
+
+class InMemorySearchIndex(SearchIndex):
+    """
+    Keeps a UserIndex per user in process memory, for the `max_users` most
+    recently searched users.
+
+    Writes that land while an index is loading are applied to it directly,
+    and the load skips those entries, so it can't bring back a stale or
+    deleted version.
+
+    An index older than `ttl` keeps answering searches while a new one
+    loads in the background, so only a user's first search waits for a
+    load.
+    """
+    def __init__(
+            self,
+            max_users: int = SEARCH_INDEX_MAX_USERS,
+            ttl: float = SEARCH_INDEX_TTL
+    ) -> None:
+        self.max_users = max_users
+        self.ttl = ttl
+        self._indexes: OrderedDict[str, UserIndex] = OrderedDict()
+        self._builds: Dict[str, _Build] = {}
+        logger.debug("Initialized in-memory search index")
+
+    async def search(
+        self,
+        user_id: str,
+        query: str,
+        limit: int,
+        source: EntrySource
+    ) -> List[Dict[str, Any]]:
+        index = await self._ready(user_id, source)
+        return index.search(tokenize(query), limit)
+
+    async def _ready(self, user_id: str, source: EntrySource) -> UserIndex:
+        index = self._indexes.get(user_id)
+        if index is not None:
+            self._indexes.move_to_end(user_id)
+            if self.ttl and time.monotonic() - index.built_at >= self.ttl:
+                build = self._build(user_id, source)
+                build.task.add_done_callback(
+                    lambda task: self._rebuilt(user_id, index, task)
+                )
+            return index
+
+        build = self._build(user_id, source)
+        # Shielded so a cancelled request doesn't abort the load for the
+        # other searches waiting on it.
+        return await asyncio.shield(build.task)
+
+    def _build(self, user_id: str, source: EntrySource) -> _Build:
+        """Returns the user's load in progress, starting one if needed."""
+        build = self._builds.get(user_id)
+        if build is None:
+            build = self._builds[user_id] = _Build()
+            build.task = asyncio.ensure_future(self._load(user_id, build, source))
+        return build
+
+    @staticmethod
+    def _rebuilt(user_id: str, index: UserIndex, task: asyncio.Future) -> None:
+        """
+        Logs a failed background rebuild, which nobody waits for, and keeps
+        the old index for another `ttl` before trying again.
+        """
+        if task.cancelled() or task.exception() is None:
+            return
+        index.built_at = time.monotonic()
+        logger.warning(
+            "Couldn't rebuild search index for %s", user_id, exc_info=task.exception()
+        )
+
+    async def _load(self, user_id: str, build: _Build, source: EntrySource) -> UserIndex:
+        try:
+            loaded = 0
+            async for entry in source():
+                if entry["id"] not in build.touched:
+                    build.index.add(entry)
+                loaded += 1
+                if loaded % LOAD_PAGE_SIZE == 0:
+                    # Indexing is CPU-bound; let other requests run.
+                    await asyncio.sleep(0)
+        except BaseException:
+            if self._builds.get(user_id) is build:
+                del self._builds[user_id]
+            raise
+
+        # remove_all() during the load drops the build; don't install it.
+        if self._builds.get(user_id) is build:
+            del self._builds[user_id]
+            self._install(user_id, build.index)
+            logger.info(
+                "Built search index for %s with %s entries",
+                user_id,
+                len(build.index.entries)
+            )
+        return build.index
+
+    def _install(self, user_id: str, index: UserIndex) -> None:
+        self._indexes[user_id] = index
+        self._indexes.move_to_end(user_id)
+        while len(self._indexes) > self.max_users:
+            self._indexes.popitem(last=False)
+
+    async def add(self, user_id: str, entry: Dict[str, Any]) -> None:
+        build = self._builds.get(user_id)
+        if build is not None:
+            build.touched.add(entry["id"])
+            build.index.add(entry)
+        index = self._indexes.get(user_id)
+        if index is not None:
+            index.add(entry)
+
+    async def remove(self, user_id: str, entry_id: str) -> None:
+        build = self._builds.get(user_id)
+        if build is not None:
+            build.touched.add(entry_id)
+            build.index.remove(entry_id)
+        index = self._indexes.get(user_id)
+        if index is not None:
+            index.remove(entry_id)
+
+    async def remove_all(self, user_id: str) -> None:
+        self._builds.pop(user_id, None)
+        self._install(user_id, UserIndex())
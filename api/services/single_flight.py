@@ -0,0 +1,63 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+from utils.metrics import REGISTRY
+
+logger = logging.getLogger("journal")
+
+COALESCED = REGISTRY.counter(
+    "entry_reads_coalesced",
+    "Reads that joined an identical read already in flight instead of querying.",
+    ("operation",)
+)
+
+
+class SingleFlight:
+    """
+    Runs identical reads that overlap in time only once. A read is keyed
+    by user and by `key`, its operation and arguments; callers asking for
+    the same key while it runs wait for it and get the same result or the
+    same exception.
+
+    Writes call `forget`, so reads that started before a write aren't
+    shared with callers that arrive after it. Dropping them doesn't stop
+    them filling the entry cache; writes also bump the cache's write
+    generation for that (see EntryCache).
+
+    Not thread-safe; it's meant to be used from the event loop thread.
+    """
+    def __init__(self) -> None:
+        self._flights: Dict[str, Dict[Tuple[Hashable, ...], asyncio.Future]] = {}
+        logger.debug("Initialized single-flight reads")
+
+    async def do(
+            self,
+            user_id: str,
+            key: Tuple[Hashable, ...],
+            call: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        flights = self._flights.setdefault(user_id, {})
+        flight = flights.get(key)
+        if flight is None:
+            flight = flights[key] = asyncio.ensure_future(call())
+            flight.add_done_callback(lambda done: self._land(user_id, key, done))
+        else:
+            COALESCED.labels(key[0]).inc()
+        # A caller that gives up, e.g. when its client disconnects, mustn't
+        # cancel the read for everyone else.
+        return await asyncio.shield(flight)
+
+    def forget(self, user_id: str) -> None:
+        """Makes later reads for the user start afresh."""
+        self._flights.pop(user_id, None)
+
+    def _land(self, user_id: str, key: Tuple[Hashable, ...], flight: asyncio.Future) -> None:
+        if not flight.cancelled():
+            # Marks the exception as retrieved in case every caller gave up.
+            flight.exception()
+        flights = self._flights.get(user_id)
+        if flights is not None and flights.get(key) is flight:
+            del flights[key]
+            if not flights:
+                del self._flights[user_id]
@@ -0,0 +1,52 @@
+import logging
+from datetime import date, timedelta
+from typing import Any, Dict, Optional
+
+from repositories.interface_repository import StatsDatabaseInterface
+
+logger = logging.getLogger("journal")
+
+
+def summarize_stats(
+    stats: Optional[Dict[str, Any]],
+    today: date
+) -> Dict[str, Any]:
+    """
+    Derives streaks from the per-day counts of an aggregate document. This
+    walks the active days once, which is bounded by the journal's age, not
+    its number of entries.
+    """
+    days = sorted(
+        day for day, count in (stats or {}).get("days", {}).items() if count > 0
+    )
+
+    longest = current = 0
+    previous = None
+    for day in map(date.fromisoformat, days):
+        current = current + 1 if previous == day - timedelta(days=1) else 1
+        longest = max(longest, current)
+        previous = day
+
+    # A streak is still current if the last entry was today or yesterday.
+    if previous is None or previous < today - timedelta(days=1):
+        current = 0
+
+    return {
+        "total_entries": (stats or {}).get("total", 0),
+        "active_days": len(days),
+        "current_streak": current,
+        "longest_streak": longest,
+        "first_entry_day": days[0] if days else None,
+        "last_entry_day": days[-1] if days else None,
+        "days": {day: stats["days"][day] for day in days},
+    }
+
+
+class StatsService:
+    def __init__(self, db: StatsDatabaseInterface):
+        self.db = db
+
+    async def get_stats(self, user_id: str) -> Dict[str, Any]:
+        stats = await self.db.get_stats(user_id)
+        logger.info("Successfully retrieved journal stats for %s", user_id)
+        return summarize_stats(stats, date.today())
@@ -0,0 +1,61 @@
+import os
+import time
+import logging
+
+import jwt
+from dotenv import load_dotenv
+
+from exceptions import IncorrectCredentials
+from utils.ttl_cache import TTLCache
+
+load_dotenv()
+logger = logging.getLogger("journal")
+
+SECRET_KEY = os.getenv("SECRET_KEY")
+ALGORITHM = os.getenv("ALGORITHM")
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+TOKEN_CACHE_TTL = float(os.getenv("TOKEN_CACHE_TTL", "300"))
+if not (SECRET_KEY and ALGORITHM):
+    logger.critical("Environment variables not loaded.")
+    raise ValueError("Environment variables not loaded.")
+
+
+class TokenVerifier:
+    """
+    Verifies access tokens without touching the database. Decoded tokens are
+    kept in an LRU with TTL, and never outlive their own `exp` claim.
+    """
+    def __init__(
+            self,
+            cache_size: int = TOKEN_CACHE_SIZE,
+            cache_ttl: float = TOKEN_CACHE_TTL
+    ) -> None:
+        self.cache = TTLCache(max_size=cache_size, ttl=cache_ttl)
+        logger.debug("Initialized token verifier")
+
+    def verify(self, token: str, log_failures: bool = True) -> str:
+        """
+        Returns the token's user id. Callers that only peek at the token,
+        leaving the route to reject it, pass `log_failures=False`.
+        """
+        user_id = self.cache.get(token)
+        if user_id is not None:
+            return user_id
+
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        except jwt.InvalidTokenError as e:
+            if log_failures:
+                logger.error("Could not validate token: %s", e)
+            raise IncorrectCredentials("Could not validate credentials") from e
+
+        user_id = payload.get("sub", None)
+        if user_id is None:
+            if log_failures:
+                logger.error("Incorrect username or password")
+            raise IncorrectCredentials("Incorrect username or password")
+
+        expires_at = payload.get("exp")
+        ttl = expires_at - time.time() if expires_at is not None else None
+        self.cache.set(token, user_id, ttl)
+        return user_id
@@ -0,0 +1,37 @@
+import base64
+import binascii
+from typing import Optional
+
+from exceptions import InvalidCursor
+
+# Separates the scope a cursor was issued for from the continuation token.
+SCOPE_SEPARATOR = "\n"
+
+
+def encode_cursor(continuation_token: Optional[str], scope: str) -> Optional[str]:
+    """
+    Wraps a database continuation token into an opaque, URL-safe cursor,
+    tagged with the scope it was issued for: the endpoint and the query
+    parameters that shape its results.
+    """
+    if continuation_token is None:
+        return None
+    cursor = f"{scope}{SCOPE_SEPARATOR}{continuation_token}"
+    return base64.urlsafe_b64encode(cursor.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str, scope: str) -> str:
+    """
+    Unwraps a cursor produced by encode_cursor for the same scope. Cursors
+    from another endpoint or query never reach the database.
+    """
+    try:
+        decoded = base64.b64decode(
+            cursor.encode("ascii"), altchars=b"-_", validate=True
+        ).decode("utf-8")
+    except (binascii.Error, UnicodeError, ValueError) as e:
+        raise InvalidCursor("Invalid pagination cursor.") from e
+    cursor_scope, separator, continuation_token = decoded.partition(SCOPE_SEPARATOR)
+    if not (separator and cursor_scope == scope and continuation_token):
+        raise InvalidCursor("Invalid pagination cursor.")
+    return continuation_token
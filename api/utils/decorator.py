@@ -1,41 +1,51 @@
 import inspect
 import logging
 from functools import wraps
+from typing import Any, Callable, Dict
 
 from azure.cosmos.exceptions import (
     CosmosHttpResponseError, 
     CosmosResourceNotFoundError
 )
 
-from exceptions import EntryNotFoundError
+from exceptions import EntryConflictError, EntryNotFoundError
 
 logger = logging.getLogger("journal")
 
+def _argument_binder(func) -> Callable[..., Dict[str, Any]]:
+    """
+    Computes the signature once, at decoration time, and returns a function
+    that maps call arguments to parameter names. Wrappers only call it when
+    something fails, so the success path doesn't pay for binding.
+    """
+    sig = inspect.signature(func)
+
+    def bind(*args, **kwargs) -> Dict[str, Any]:
+        # Trying to remove guesswork by binding argument names to their values
+        # and accessing them.
+        bound_args = sig.bind(*args, **kwargs)
+        bound_args.apply_defaults()
+
+        return {
+            name: value
+            for name, value in bound_args.arguments.items()
+            if name != 'self'
+        }
+    return bind
+
 def handle_cosmos_exception(error_msg: str):
     """
     Handles Cosmos DB exceptions with custom messages and logging.
     """
     def decorator(func):
+        bind_arguments = _argument_binder(func)
+
         @wraps(func)
         async def wrapper(*args, **kwargs):
             try:
                 return await func(*args, **kwargs)
             except (CosmosHttpResponseError, CosmosResourceNotFoundError) as e:
-                log_extra = {}
-
-                # Trying to remove guesswork by binding argument names to their values
-                # and accessing them.
-                sig = inspect.signature(func)
-
-                # Bind the arguments to the parameters
-                bound_args = sig.bind(*args, **kwargs)
-                bound_args.apply_defaults()
-
-                log_extra = {
-                    name: value
-                    for name, value in bound_args.arguments.items()
-                    if name != 'self'
-                }
+                log_extra = bind_arguments(*args, **kwargs)
 
                 if log_extra:
                     logger.exception(
@@ -55,36 +65,39 @@ def handle_cosmos_exception(error_msg: str):
     return decorator
 
 def log_service_call(error_msg: str):
-        """
-        Logs results and errors of methods in EntryService.
-        """
-        def decorator(func):
-            @wraps(func)
-            async def wrapper(*args, **kwargs):
-                log_extra = {}
-                
-                sig = inspect.signature(func)
-                bound_args = sig.bind(*args, **kwargs)
-                bound_args.apply_defaults()
+    """
+    Logs results and errors of methods in EntryService.
+    """
+    def decorator(func):
+        bind_arguments = _argument_binder(func)
 
-                log_extra = {
-                    name: value
-                    for name, value in bound_args.arguments.items()
-                    if name != 'self'
-                }
-                
-                try:
-                    return await func(*args, **kwargs)
-                except (CosmosHttpResponseError, CosmosResourceNotFoundError) as e:
-                    if e.status_code == 404:
-                        logger.warning("Couldn't %s. Details: %s", error_msg, log_extra)
-                        raise EntryNotFoundError("Entry not found.") from e
-                    else:
-                        logger.exception(
-                            "Couldnt %s: %s", 
-                            error_msg, 
-                            str(e)
-                        )
-                        raise e
-            return wrapper
-        return decorator
\ No newline at end of file
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            try:
+                return await func(*args, **kwargs)
+            except (CosmosHttpResponseError, CosmosResourceNotFoundError) as e:
+                if e.status_code == 404:
+                    logger.warning(
+                        "Couldn't %s. Details: %s",
+                        error_msg,
+                        bind_arguments(*args, **kwargs)
+                    )
+                    raise EntryNotFoundError("Entry not found.") from e
+                elif e.status_code == 412:
+                    logger.warning(
+                        "Couldn't %s. Details: %s",
+                        error_msg,
+                        bind_arguments(*args, **kwargs)
+                    )
+                    raise EntryConflictError(
+                        "Entry was modified by another request."
+                    ) from e
+                else:
+                    logger.exception(
+                        "Couldnt %s: %s", 
+                        error_msg, 
+                        str(e)
+                    )
+                    raise e
+        return wrapper
+    return decorator
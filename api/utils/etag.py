@@ -0,0 +1,29 @@
+import hashlib
+from typing import Iterable, Optional, Tuple
+
+
+def collection_etag(items: Iterable[Tuple[str, str]]) -> str:
+    """
+    Builds a weak ETag for a collection from its (id, _etag) pairs. The
+    order the database returns items in doesn't change the result.
+    """
+    digest = hashlib.sha256()
+    for entry_id, etag in sorted(items):
+        digest.update(f"{entry_id}:{etag};".encode("utf-8"))
+    return f'W/"{digest.hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: Optional[str]) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag"""
+    if not (if_none_match and etag):
+        return False
+
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    if "*" in candidates:
+        return True
+    return _opaque(etag) in {_opaque(candidate) for candidate in candidates}
+
+
+def _opaque(etag: str) -> str:
+    etag = etag.removeprefix("W/")
+    return etag if etag.startswith('"') else f'"{etag}"'
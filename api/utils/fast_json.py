@@ -0,0 +1,31 @@
+import json
+from typing import Any
+
+from starlette.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def dumps(content: Any) -> bytes:
+    """Serializes JSON-ready content with orjson when installed."""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(
+        content,
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":")
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    A JSONResponse for content that is already made of plain JSON types,
+    such as documents read from the database. Returning it from a route
+    skips FastAPI's validation and jsonable_encoder pass over the content.
+    """
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
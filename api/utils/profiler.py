@@ -0,0 +1,184 @@
+import sys
+import time
+import asyncio
+import threading
+from collections import Counter
+from pathlib import Path
+from types import CodeType, FrameType
+from typing import Dict, List, Optional
+from urllib.parse import quote, unquote
+
+PROFILE_SUFFIX = ".collapsed"
+
+
+class ProfileSession:
+    """The stack samples collected for one task (one request)."""
+    def __init__(self, task: asyncio.Task) -> None:
+        self.task = task
+        self.root_code: Optional[CodeType] = getattr(task.get_coro(), "cr_code", None)
+        self.stacks: Counter = Counter()
+        self.started = time.perf_counter()
+
+
+class TaskSampler:
+    """
+    Samples the stacks of selected asyncio tasks from a background thread,
+    every `interval` seconds, while they are being profiled.
+
+    Requests share the event loop, so the thread's stack alone can't say
+    which request is running. Each sample checks which task is current:
+    when it is the profiled task, the thread's stack is recorded under
+    "running". Otherwise the task's suspended coroutine chain is recorded
+    under "waiting", ending in what it awaits (e.g. a Cosmos response or a
+    bcrypt worker). Samples are wall-clock, so both kinds add up to the
+    request's duration.
+    """
+    def __init__(self, interval: float = 0.005) -> None:
+        self.interval = interval
+        self._sessions: Dict[asyncio.Task, ProfileSession] = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._labels: Dict[CodeType, str] = {}
+
+    def start(self) -> ProfileSession:
+        """Starts profiling the current task. Call from the event loop."""
+        task = asyncio.current_task()
+        session = ProfileSession(task)
+        with self._lock:
+            self._loop = asyncio.get_running_loop()
+            self._loop_thread_id = threading.get_ident()
+            self._sessions[task] = session
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._sample_forever,
+                    name="request-profiler",
+                    daemon=True
+                )
+                self._thread.start()
+        self._wakeup.set()
+        return session
+
+    def stop(self, session: ProfileSession) -> Counter:
+        with self._lock:
+            self._sessions.pop(session.task, None)
+        return session.stacks
+
+    def _sample_forever(self) -> None:
+        while True:
+            if not self._sessions:
+                # Sleep until the next profiled request instead of polling.
+                self._wakeup.wait()
+                self._wakeup.clear()
+                continue
+            time.sleep(self.interval)
+            self._sample()
+
+    def _sample(self) -> None:
+        with self._lock:
+            sessions = list(self._sessions.values())
+            loop = self._loop
+            thread_id = self._loop_thread_id
+        if not sessions:
+            return
+
+        current = asyncio.current_task(loop)
+        for session in sessions:
+            if session.task is current:
+                frame = sys._current_frames().get(thread_id)
+                stack = self._thread_stack(frame, session.root_code)
+                stack.insert(0, "running")
+            else:
+                stack = self._coroutine_stack(session.task)
+                stack.insert(0, "waiting")
+            with self._lock:
+                # Skip requests that finished while this sample was taken.
+                if session.task in self._sessions:
+                    session.stacks[";".join(stack)] += 1
+
+    def _label(self, code: CodeType, module: Optional[str]) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = self._labels[code] = f"{module}:{code.co_qualname}"
+        return label
+
+    def _thread_stack(self, frame: Optional[FrameType], root: Optional[CodeType]) -> List[str]:
+        """Walks from the leaf frame up to the task's root coroutine."""
+        stack = []
+        while frame is not None:
+            stack.append(self._label(frame.f_code, frame.f_globals.get("__name__")))
+            if frame.f_code is root:
+                break
+            frame = frame.f_back
+        stack.reverse()
+        return stack
+
+    def _coroutine_stack(self, task: asyncio.Task) -> List[str]:
+        """Follows what the suspended task awaits, from its root coroutine."""
+        stack = []
+        awaitable = task.get_coro()
+        while awaitable is not None:
+            frame = (
+                getattr(awaitable, "cr_frame", None)
+                or getattr(awaitable, "gi_frame", None)
+                or getattr(awaitable, "ag_frame", None)
+            )
+            if frame is None:
+                stack.append(f"<await {type(awaitable).__name__}>")
+                break
+            stack.append(self._label(frame.f_code, frame.f_globals.get("__name__")))
+            awaitable = (
+                getattr(awaitable, "cr_await", None)
+                or getattr(awaitable, "gi_yieldfrom", None)
+                or getattr(awaitable, "ag_await", None)
+            )
+        return stack
+
+
+def profile_filename(route: str, status_code: int, duration: float) -> str:
+    """
+    Encodes the request into the file name, so the ring can be listed and
+    aggregated without opening every file. Names sort by time.
+    """
+    return (
+        f"{time.time_ns()}_{status_code}_{round(duration * 1000)}"
+        f"_{quote(route, safe='')}{PROFILE_SUFFIX}"
+    )
+
+
+def parse_profile_filename(name: str) -> Dict[str, object]:
+    timestamp, status_code, duration_ms, route = name[:-len(PROFILE_SUFFIX)].split("_", 3)
+    return {
+        "timestamp_ns": int(timestamp),
+        "status_code": int(status_code),
+        "duration_ms": int(duration_ms),
+        "route": unquote(route),
+    }
+
+
+class ProfileRing:
+    """
+    Stores profiles as collapsed-stack files ("frame;frame;frame count"
+    per line, readable by flamegraph.pl and speedscope) and keeps only the
+    newest `max_files`.
+    """
+    def __init__(self, directory: str, max_files: int = 200) -> None:
+        self.directory = Path(directory)
+        self.max_files = max_files
+
+    def write(self, route: str, status_code: int, duration: float, stacks: Counter) -> Path:
+        """Blocking; run it off the event loop."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / profile_filename(route, status_code, duration)
+        path.write_text(
+            "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+        )
+        self._prune()
+        return path
+
+    def _prune(self) -> None:
+        profiles = sorted(self.directory.glob(f"*{PROFILE_SUFFIX}"))
+        for path in profiles[:-self.max_files or None]:
+            path.unlink(missing_ok=True)
@@ -0,0 +1,23 @@
+from datetime import datetime
+from typing import Optional
+
+
+def created_timestamp(created_at: Optional[str]) -> Optional[int]:
+    """
+    Converts a stored `created_at` or `updated_at` ("2024-05-01#09:30:00",
+    local time) to Unix seconds, which sort and range-query as numbers.
+    Returns None for values that can't be parsed, like the "None" older
+    entries have as `updated_at`.
+    """
+    if not created_at:
+        return None
+    try:
+        # fromisoformat accepts any single character as the separator.
+        return int(datetime.fromisoformat(created_at).timestamp())
+    except ValueError:
+        return None
+
+
+def created_day(created_at: str) -> str:
+    """The "YYYY-MM-DD" day of a stored `created_at`."""
+    return created_at[:10]